@@ -1,22 +1,198 @@
 import sys
+import time
+PROCESS_START = time.perf_counter()
 import requests
 import base64
-import time
 import json
+import mmap
 import os
-from datetime import datetime, timedelta
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+import bisect
+import argparse
+import csv
+import concurrent.futures
+import fnmatch
+import functools
+import heapq
+import itertools
+import hashlib
+import html
+import random
+import re
+import statistics
+import sqlite3
+import struct
+import zlib
+import importlib.util
+import threading
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import date as Date, datetime, timedelta
+from PyQt6.QtWidgets import (QApplication, QSplashScreen, QSystemTrayIcon, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QTextEdit, QFileDialog, QLabel, QProgressBar, 
-                             QListWidget, QTabWidget, QLineEdit, QFormLayout, QSpinBox,
+                             QListWidget, QListWidgetItem, QTabWidget, QLineEdit, QFormLayout, QSpinBox,
                              QComboBox, QCalendarWidget, QMessageBox, QScrollArea, QDateEdit,
-                             QDoubleSpinBox, QSlider, QTimeEdit)
-from PyQt6.QtGui import QPixmap, QFont, QIcon, QColor, QPalette
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QDate, QTime
-from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QDateTimeAxis, QValueAxis
+                             QDoubleSpinBox, QSlider, QTimeEdit, QDialog, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QCompleter, QListView)
+from PyQt6.QtWidgets import QGraphicsScene
+from PyQt6.QtGui import (QPixmap, QFont, QIcon, QColor, QPalette, QShortcut, QKeySequence,
+                         QTextCharFormat, QImage, QTextDocument, QPdfWriter, QPageSize)
+from PyQt6.QtCore import (Qt, QObject, QThread, pyqtSignal, QDate, QTime, QTimer, QStringListModel, QBuffer,
+                          QIODevice, QRectF, QPointF, QUrl, QAbstractListModel, QModelIndex)
+from PyQt6.QtCharts import (QChart, QChartView, QLineSeries, QDateTimeAxis, QValueAxis, QBarSeries, QBarSet,
+                             QBarCategoryAxis)
 from PyQt6.QtGui import QPainter
 
 API_KEY = ''
 API_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent'
+# Alternate models/endpoints used for hedged requests and for routing simple images to the fastest model
+API_HEDGE_URLS = [
+    'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-8b-latest:generateContent',
+]
+API_TIMEOUT = 30
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = 8.0
+SIMPLE_IMAGE_BYTES = 400 * 1024
+
+# Client-side quota for the Gemini API; match these to the limits of your API key tier
+API_RPM_LIMIT = 15
+API_TPM_LIMIT = 1000000
+IMAGE_TOKEN_COST = 258
+MAX_RATE_LIMIT_RETRIES = 10
+
+# Gemini rejects inline request bodies above 20 MB; batches are packed to stay under it
+MAX_REQUEST_BYTES = 20 * 1024 * 1024
+MAX_BATCH_IMAGES = 8
+BATCH_PART_OVERHEAD = 256
+
+BATCH_PROMPT = "You are given {count} images, each introduced by a line 'Image N:'. For every image, analyze the meal or exercise routine shown and provide personalized health advice, dietary suggestions, or fitness plans. Include estimated calorie count for meals and suggested duration for exercises. Respond with one entry per image, using its number as image_index."
+BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "image_index": {"type": "INTEGER"},
+            "analysis": {"type": "STRING"}
+        },
+        "required": ["image_index", "analysis"]
+    }
+}
+
+ANALYSIS_PROMPT = "Analyze this image of a meal or exercise routine and provide personalized health advice, dietary suggestions, or fitness plans based on what you see. Include estimated calorie count for meals and suggested duration for exercises."
+
+# Optional on-device food classifier (ONNX, 224x224 RGB input, one label per line in the labels file)
+LOCAL_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'food_classifier.onnx')
+LOCAL_LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'food_labels.txt')
+LOCAL_BATCH_SIZE = 8
+
+NUTRITION_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'nutrition.csv')
+DAILY_CALORIE_TARGET = 2000
+
+EXERCISE_TYPES = ['Running', 'Cycling', 'Swimming', 'Weight Training', 'Yoga']
+EXERCISE_INTENSITIES = ['Low', 'Medium', 'High']
+# MET values (Compendium of Physical Activities) per exercise type and intensity; kcal = MET * kg * hours
+EXERCISE_METS = {
+    'Running': {'Low': 7.0, 'Medium': 9.8, 'High': 11.8},
+    'Cycling': {'Low': 4.0, 'Medium': 6.8, 'High': 10.0},
+    'Swimming': {'Low': 5.8, 'Medium': 8.3, 'High': 10.0},
+    'Weight Training': {'Low': 3.5, 'Medium': 5.0, 'High': 6.0},
+    'Yoga': {'Low': 2.5, 'Medium': 3.0, 'High': 4.0},
+}
+# Used for exercise types or intensities outside the table (e.g. imported data)
+DEFAULT_MET = 4.0
+SLEEP_QUALITIES = ['Poor', 'Fair', 'Good', 'Excellent']
+# Nightly sleep need used for sleep-debt figures
+SLEEP_TARGET_MINUTES = 8 * 60
+# Exercise and sleep history lists expose this many more rows each time the view scrolls to the end
+TRACKER_FETCH_ROWS = 200
+
+# Append-only water intake log; rollups are checkpointed to the data store every few events
+WATER_LOG_PATH = "water_log.jsonl"
+WATER_CHECKPOINT_EVENTS = 25
+DEFAULT_WATER_GOAL = 8
+
+# Bulk export/import: columns per tracker, and rows merged per batch before the single save at the end
+TRACKER_FIELDS = {
+    "exercise": ["date", "type", "duration", "intensity"],
+    "sleep": ["date", "sleep_time", "wake_time", "quality"],
+    "water": ["ts", "glasses", "goal"],
+    "meals": ["date", "Breakfast", "Lunch", "Dinner", "Snacks"],
+}
+INTEGER_FIELDS = {"duration", "glasses", "goal"}
+EXPORT_FORMATS = ["csv", "jsonl", "parquet"]
+IMPORT_BATCH_ROWS = 5000
+MAX_REPORTED_ERRORS = 20
+# Header names used by Google Fit (Takeout CSV) and Apple Health CSV exporters, matched case-insensitively
+COLUMN_ALIASES = {
+    "date": ["start", "start date", "startdate", "start time", "day"],
+    "end": ["end", "end date", "enddate", "end time"],
+    "type": ["activity", "activity type", "workout type", "workoutactivitytype"],
+    "duration": ["duration (min)", "move minutes count", "minutes"],
+    "quality": ["sleep quality"],
+    "ts": ["date", "start", "startdate", "start date", "timestamp"],
+    "water_ml": ["water (ml)", "dietary water (ml)", "hydration (ml)"],
+}
+ACTIVITY_ALIASES = {
+    "Biking": "Cycling", "Running (treadmill)": "Running", "Strength training": "Weight Training",
+    "TraditionalStrengthTraining": "Weight Training", "FunctionalStrengthTraining": "Weight Training",
+    "SwimmingPool": "Swimming", "Pool swimming": "Swimming",
+}
+IMPORT_DEFAULTS = {"intensity": "Medium", "quality": "Good"}
+# Activities with no alias and no matching exercise type are stored under one label (DEFAULT_MET applies)
+OTHER_ACTIVITY = "Other"
+ML_PER_GLASS = 250
+
+# Sampling profiler: HEALTH_PROFILE=<file> profiles the whole session; Ctrl+Shift+P toggles it at runtime
+PROFILE_OUTPUT = os.environ.get("HEALTH_PROFILE")
+PROFILE_INTERVAL = float(os.environ.get("HEALTH_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_MAX_SAMPLES = 120000
+PROFILES_DIRECTORY = "profiles"
+
+# Analysis history lives in SQLite; only recent result texts and images are kept in memory
+HISTORY_DB_PATH = "analysis_history.db"
+HISTORY_CACHE_SIZE = 64
+HISTORY_IMAGE_CACHE_SIZE = 16
+HISTORY_FETCH_ROWS = 200
+# Documents written to the search index per transaction when it is rebuilt in the background
+SEARCH_INDEX_BATCH = 500
+
+# Health reports: output directory, chart image size, and a version folded into report hashes
+REPORTS_DIRECTORY = "reports"
+REPORT_CHART_SIZE = (960, 280)
+REPORT_FORMAT_VERSION = 1
+
+# Backups: content-defined chunks (gear hash, ~8 KB average) deduplicated by SHA-256 across snapshots
+BACKUP_TARGET = os.environ.get("HEALTH_BACKUP_TARGET", "backups")
+BACKUP_RULE = "FREQ=HOURLY;INTERVAL=6"
+BACKUP_PATTERNS = ("*.snap", "*.jsonl", "*.json", HISTORY_DB_PATH)
+BACKUP_MIN_CHUNK = 2 * 1024
+BACKUP_AVERAGE_CHUNK = 8 * 1024
+BACKUP_MAX_CHUNK = 64 * 1024
+
+# Built-in reminders (RRULE subset: FREQ, INTERVAL, BYDAY, BYHOUR, BYMINUTE, COUNT, UNTIL)
+DEFAULT_REMINDERS = [
+    {"id": "water", "title": "Water", "message": "Time for a glass of water.",
+     "rule": "FREQ=DAILY;BYHOUR=9,11,13,15,17,19;BYMINUTE=0", "enabled": True},
+    {"id": "bedtime", "title": "Bedtime", "message": "Wind down for bed to stay on your sleep target.",
+     "rule": "FREQ=DAILY;BYHOUR=22;BYMINUTE=30", "enabled": True},
+    {"id": "workout", "title": "Workout", "message": "Scheduled workout: log it in the Exercise Tracker.",
+     "rule": "FREQ=WEEKLY;BYDAY=MO,WE,FR;BYHOUR=18;BYMINUTE=0", "enabled": False},
+]
+
+# Maximum Hamming distance between 64-bit dHashes for two photos to count as the same meal
+NEAR_DUPLICATE_THRESHOLD = 10
+
+# Approximate calories per typical serving, used for offline estimates
+FOOD_CALORIES = {
+    'apple_pie': 411, 'bibimbap': 490, 'breakfast_burrito': 305, 'caesar_salad': 360,
+    'cheesecake': 401, 'chicken_curry': 293, 'chicken_wings': 430, 'chocolate_cake': 352,
+    'club_sandwich': 590, 'omelette': 154, 'donuts': 253, 'dumplings': 270, 'eggs_benedict': 520,
+    'french_fries': 365, 'french_toast': 229, 'fried_rice': 333, 'greek_salad': 211,
+    'grilled_salmon': 367, 'hamburger': 354, 'hot_dog': 290, 'ice_cream': 207, 'lasagna': 336,
+    'oatmeal': 158, 'pad_thai': 357, 'pancakes': 350, 'pizza': 285, 'ramen': 436, 'risotto': 420,
+    'spaghetti_bolognese': 418, 'steak': 679, 'sushi': 300, 'tacos': 226, 'waffles': 291,
+    'fruit_salad': 97, 'smoothie_bowl': 320, 'avocado_toast': 260,
+}
 
 class LightPalette(QPalette):
     def __init__(self):
@@ -35,73 +211,2787 @@ class LightPalette(QPalette):
         self.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
         self.setColor(QPalette.ColorRole.HighlightedText, QColor(255, 255, 255))
 
-class AnalysisThread(QThread):
-    analysis_complete = pyqtSignal(str)
-    analysis_error = pyqtSignal(str)
-    retry_attempt = pyqtSignal(int)
+class PerfMetrics:
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, max_samples=2048, max_trace_events=50000):
+        self.lock = threading.Lock()
+        self.max_samples = max_samples
+        self.samples = {}
+        self.bucket_counts = {}
+        self.counts = {}
+        self.sums = {}
+        self.trace_events = deque(maxlen=max_trace_events)
+        self.origin = time.perf_counter()
+
+    def record(self, name, start, duration):
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.max_samples)
+                self.bucket_counts[name] = [0] * len(self.BUCKETS)
+                self.counts[name] = 0
+                self.sums[name] = 0.0
+            self.samples[name].append(duration)
+            self.counts[name] += 1
+            self.sums[name] += duration
+            index = bisect.bisect_left(self.BUCKETS, duration)
+            if index < len(self.BUCKETS):
+                self.bucket_counts[name][index] += 1
+            self.trace_events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        with self.lock:
+            snapshot = {name: sorted(samples) for name, samples in self.samples.items()}
+            counts = dict(self.counts)
+        rows = []
+        for name, samples in sorted(snapshot.items()):
+            def percentile(q):
+                return samples[min(len(samples) - 1, int(q * len(samples)))]
+            rows.append({
+                "operation": name,
+                "count": counts[name],
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": samples[-1],
+            })
+        return rows
+
+    def export_prometheus(self):
+        lines = [
+            "# HELP health_assistant_operation_duration_seconds Time spent in instrumented operations.",
+            "# TYPE health_assistant_operation_duration_seconds histogram",
+        ]
+        with self.lock:
+            for name in sorted(self.counts):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS, self.bucket_counts[name]):
+                    cumulative += count
+                    lines.append(f'health_assistant_operation_duration_seconds_bucket{{operation="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'health_assistant_operation_duration_seconds_bucket{{operation="{label}",le="+Inf"}} {self.counts[name]}')
+                lines.append(f'health_assistant_operation_duration_seconds_sum{{operation="{label}"}} {self.sums[name]}')
+                lines.append(f'health_assistant_operation_duration_seconds_count{{operation="{label}"}} {self.counts[name]}')
+        for key, value in quota_limiter.snapshot().items():
+            lines.append(f"# TYPE health_assistant_api_{key} gauge")
+            lines.append(f"health_assistant_api_{key} {value}")
+        router = api_router.snapshot()
+        for key in ("hedges_sent", "hedges_won"):
+            lines.append(f"# TYPE health_assistant_api_{key} counter")
+            lines.append(f"health_assistant_api_{key} {router.pop(key)}")
+        for url, stats in router.items():
+            if stats["p95"] is not None:
+                lines.append(f'health_assistant_api_endpoint_p95_seconds{{endpoint="{url}"}} {stats["p95"]}')
+        return "\n".join(lines) + "\n"
+
+    def export_chrome_trace(self, path):
+        with self.lock:
+            events = list(self.trace_events)
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+perf_metrics = PerfMetrics()
+
+def run_event_loop(app):
+    # Kept as its own frame so the sampling profiler can tell Qt event dispatch apart from Python callers
+    return app.exec()
+
+class SamplingProfiler:
+    # Samples every thread's Python stack from a daemon thread and exports speedscope JSON.
+    # Only the most recent PROFILE_MAX_SAMPLES samples per thread are kept, so it can run for a whole session.
+    EVENT_LOOP = ("[Qt event loop]", "", 0)
+    # With no Python frame above the event loop, Qt is either waiting for events or running native code
+    # (layout, painting, style) that never calls back into Python; a stack sample cannot tell them apart.
+    IDLE = ("[Qt event loop: native/idle]", "", 0)
+
+    def __init__(self, interval=PROFILE_INTERVAL, max_samples=PROFILE_MAX_SAMPLES):
+        self.interval = interval
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+        self.reset()
+
+    def reset(self):
+        self.frames = {}
+        self.frame_list = []
+        self.stacks = {}
+        self.threads = {}
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        with self.lock:
+            self.reset()
+        self.stopping.clear()
+        self.gui_thread = threading.main_thread().ident
+        self.thread = threading.Thread(target=self.sample_loop, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def frame_index(self, key):
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frame_list)
+            self.frame_list.append(key)
+        return index
+
+    def code_key(self, code):
+        return (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+
+    def thread_name(self, ident, names, bottom):
+        if ident == self.gui_thread:
+            return "GUI thread"
+        # QThread workers are not in threading's registry; name them after their run() method
+        return names.get(ident) or self.code_key(bottom)[0]
+
+    def stack_id(self, ident, frame):
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        stack = []
+        for code in codes:
+            stack.append(self.frame_index(self.code_key(code)))
+            if code is run_event_loop.__code__ and ident == self.gui_thread:
+                stack.append(self.frame_index(self.EVENT_LOOP))
+        if codes[-1] is run_event_loop.__code__ and ident == self.gui_thread:
+            stack.append(self.frame_index(self.IDLE))
+        stack = tuple(stack)
+        return self.stacks.setdefault(stack, len(self.stacks)), codes[0]
+
+    def sample_loop(self):
+        own = threading.get_ident()
+        previous = time.perf_counter()
+        while not self.stopping.wait(self.interval):
+            now = time.perf_counter()
+            weight = (now - previous) * 1000
+            previous = now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            with self.lock:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack, bottom = self.stack_id(ident, frame)
+                    key = (ident, self.thread_name(ident, names, bottom))
+                    if key not in self.threads:
+                        self.threads[key] = deque(maxlen=self.max_samples)
+                    self.threads[key].append((stack, weight))
+
+    def export_speedscope(self, path):
+        with self.lock:
+            frames = [{"name": name, "file": file, "line": line} if file else {"name": name}
+                      for name, file, line in self.frame_list]
+            stacks = [None] * len(self.stacks)
+            for stack, index in self.stacks.items():
+                stacks[index] = list(stack)
+            profiles = []
+            for (ident, name), samples in sorted(self.threads.items(), key=lambda item: item[0][1] != "GUI thread"):
+                profiles.append({
+                    "type": "sampled", "name": f"{name} [{ident}]", "unit": "milliseconds",
+                    "startValue": 0, "endValue": sum(weight for _, weight in samples),
+                    "samples": [stacks[stack] for stack, _ in samples],
+                    "weights": [weight for _, weight in samples],
+                })
+        with open(path, "w") as file:
+            json.dump({"$schema": "https://www.speedscope.app/file-format-schema.json",
+                       "name": f"AI Health Assistant {datetime.now().isoformat(timespec='seconds')}",
+                       "exporter": "AI-Health.py SamplingProfiler", "activeProfileIndex": 0,
+                       "shared": {"frames": frames}, "profiles": profiles}, file)
+        return len(profiles)
+
+sampling_profiler = SamplingProfiler()
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated = now
+
+    def wait_time(self, amount, now):
+        self.refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount):
+        # A negative amount refunds an over-estimate, but never past a full bucket
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+class QuotaLimiter:
+    def __init__(self, rpm, tpm):
+        self.condition = threading.Condition()
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_bucket = TokenBucket(rpm, rpm / 60.0)
+        self.token_bucket = TokenBucket(tpm, tpm / 60.0)
+        self.blocked_until = 0.0
+        self.request_window = deque()
+        self.token_window = deque()
+        self.queued = 0
+        self.requests_sent = 0
+        self.bytes_sent = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+        self.rate_limited_responses = 0
+        self.throttled_seconds = 0.0
+
+    def acquire(self, estimated_tokens, payload_bytes, on_wait=None):
+        # Blocks the calling worker thread until both buckets have room, so excess work queues up
+        with self.condition:
+            self.queued += 1
+            notified = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = max(self.blocked_until - now,
+                               self.request_bucket.wait_time(1, now),
+                               self.token_bucket.wait_time(estimated_tokens, now))
+                    if wait <= 0:
+                        break
+                    if on_wait and not notified:
+                        on_wait(wait)
+                        notified = True
+                    self.condition.wait(wait)
+                    self.throttled_seconds += time.monotonic() - now
+                self.request_bucket.consume(1)
+                self.token_bucket.consume(estimated_tokens)
+                self.requests_sent += 1
+                self.bytes_sent += payload_bytes
+                self.request_window.append(now)
+                self.token_window.append((now, estimated_tokens))
+            finally:
+                self.queued -= 1
+
+    def try_acquire(self, estimated_tokens, payload_bytes):
+        with self.condition:
+            now = time.monotonic()
+            if (self.blocked_until > now or self.request_bucket.wait_time(1, now) > 0
+                    or self.token_bucket.wait_time(estimated_tokens, now) > 0):
+                return False
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(estimated_tokens)
+            self.requests_sent += 1
+            self.bytes_sent += payload_bytes
+            self.request_window.append(now)
+            self.token_window.append((now, estimated_tokens))
+            return True
+
+    def record_usage(self, estimated_tokens, usage_metadata):
+        if not usage_metadata:
+            return
+        prompt_tokens = usage_metadata.get('promptTokenCount', estimated_tokens)
+        output_tokens = usage_metadata.get('candidatesTokenCount', 0)
+        with self.condition:
+            # Settle the estimate against what the API actually billed
+            self.token_bucket.consume(prompt_tokens - estimated_tokens)
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            self.total_tokens += usage_metadata.get('totalTokenCount', prompt_tokens + output_tokens)
+            self.token_window.append((time.monotonic(), prompt_tokens - estimated_tokens))
+
+    def defer(self, seconds):
+        with self.condition:
+            self.rate_limited_responses += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.request_bucket.tokens = 0.0
+            self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            now = time.monotonic()
+            while self.request_window and now - self.request_window[0] > 60:
+                self.request_window.popleft()
+            while self.token_window and now - self.token_window[0][0] > 60:
+                self.token_window.popleft()
+            return {
+                "requests_last_minute": len(self.request_window),
+                "tokens_last_minute": sum(tokens for _, tokens in self.token_window),
+                "rpm_limit": self.rpm,
+                "tpm_limit": self.tpm,
+                "queued": self.queued,
+                "requests_sent": self.requests_sent,
+                "bytes_sent": self.bytes_sent,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.total_tokens,
+                "rate_limited_responses": self.rate_limited_responses,
+                "throttled_seconds": self.throttled_seconds,
+            }
+
+quota_limiter = QuotaLimiter(API_RPM_LIMIT, API_TPM_LIMIT)
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def is_open(self):
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            # After the cool-down let one request through to probe the API again
+            return time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+api_circuit = CircuitBreaker()
+
+class LocalFoodClassifier:
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
+
+    def __init__(self, model_path=LOCAL_MODEL_PATH, labels_path=LOCAL_LABELS_PATH, input_size=224):
+        self.model_path = model_path
+        self.labels_path = labels_path
+        self.input_size = input_size
+        self.session = None
+        self.labels = []
+        self.lock = threading.Lock()
+        self.load_error = None
+
+    def available(self):
+        # Cheap check for the GUI thread; the session itself is created lazily on a worker
+        if self.load_error is not None:
+            return False
+        if self.session is not None:
+            return True
+        return (os.path.exists(self.model_path) and os.path.exists(self.labels_path)
+                and importlib.util.find_spec('onnxruntime') is not None)
+
+    def load(self):
+        with self.lock:
+            if self.session is not None or self.load_error is not None:
+                return self.session
+            try:
+                import numpy
+                import onnxruntime
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+                self.session = onnxruntime.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+                with open(self.labels_path, "r") as file:
+                    self.labels = [line.strip() for line in file if line.strip()]
+            except (ImportError, OSError, RuntimeError, ValueError) as e:
+                self.load_error = str(e)
+                self.session = None
+            return self.session
+
+    def preprocess(self, image_path):
+        import numpy
+        from PyQt6.QtGui import QImage
+        image = QImage(image_path)
+        if image.isNull():
+            raise ValueError(f"Cannot read image: {image_path}")
+        image = image.convertToFormat(QImage.Format.Format_RGB888).scaled(
+            self.input_size, self.input_size,
+            Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
+        left = (image.width() - self.input_size) // 2
+        top = (image.height() - self.input_size) // 2
+        image = image.copy(left, top, self.input_size, self.input_size)
+        buffer = numpy.frombuffer(image.constBits().asstring(image.sizeInBytes()), dtype=numpy.uint8)
+        pixels = buffer.reshape(self.input_size, image.bytesPerLine())[:, :self.input_size * 3]
+        pixels = pixels.reshape(self.input_size, self.input_size, 3).astype(numpy.float32) / 255.0
+        pixels = (pixels - numpy.array(self.MEAN, dtype=numpy.float32)) / numpy.array(self.STD, dtype=numpy.float32)
+        return pixels.transpose(2, 0, 1)
+
+    @perf_metrics.timed('LocalFoodClassifier.classify_batch')
+    def classify_batch(self, image_paths, top_k=3):
+        import numpy
+        session = self.load()
+        if session is None:
+            return [[] for _ in image_paths]
+        batch = numpy.stack([self.preprocess(path) for path in image_paths])
+        input_name = session.get_inputs()[0].name
+        logits = session.run(None, {input_name: batch})[0]
+        exp = numpy.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities = exp / exp.sum(axis=1, keepdims=True)
+        predictions = []
+        for row in probabilities:
+            best = numpy.argsort(row)[::-1][:top_k]
+            predictions.append([(self.labels[i] if i < len(self.labels) else str(i), float(row[i])) for i in best])
+        return predictions
+
+local_classifier = LocalFoodClassifier()
+
+class NutritionDatabase:
+    # The fraction is tried first: the decimal branch would otherwise take the "1" of "1/2"
+    QUANTITY = re.compile(r'^\s*(\d+/\d+|\d+(?:\.\d+)?)\s*(?:x\s+)?(.*)$')
+    SEPARATORS = re.compile(r'\s*[,;+]\s*')
+
+    def __init__(self, path=NUTRITION_DB_PATH):
+        self.path = path
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.names = []
+        self.servings = []
+        self.calories = array('f')
+        self.protein = array('f')
+        self.carbs = array('f')
+        self.fat = array('f')
+        self.word_index = {}
+
+    @perf_metrics.timed('NutritionDatabase.load')
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            rows = []
+            if os.path.exists(self.path):
+                with open(self.path, newline='') as file:
+                    for row in csv.DictReader(file):
+                        rows.append(row)
+            rows.sort(key=lambda row: row['name'].lower())
+            for row_id, row in enumerate(rows):
+                name = row['name'].strip().lower()
+                self.names.append(name)
+                self.servings.append(row['serving'])
+                self.calories.append(float(row['calories']))
+                self.protein.append(float(row['protein_g']))
+                self.carbs.append(float(row['carbs_g']))
+                self.fat.append(float(row['fat_g']))
+                for word in set(name.split()):
+                    self.word_index.setdefault(word, array('H')).append(row_id)
+            self.loaded = True
+
+    def complete(self, prefix, limit=10):
+        self.load()
+        prefix = prefix.strip().lower()
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_right(self.names, prefix + '\uffff', lo=start)
+        return self.names[start:min(end, start + limit)]
+
+    def find(self, text):
+        self.load()
+        name = ' '.join(text.strip().lower().split())
+        if not name:
+            return None
+        for candidate in (name, name[:-1] if name.endswith('s') else None, name[:-2] if name.endswith('es') else None):
+            if candidate:
+                index = bisect.bisect_left(self.names, candidate)
+                if index < len(self.names) and self.names[index] == candidate:
+                    return index
+        matches = self.complete(name, limit=1)
+        if matches:
+            return bisect.bisect_left(self.names, matches[0])
+        # Fall back to the shortest entry containing every word, e.g. "grilled atlantic salmon" -> "salmon"
+        postings = []
+        for word in name.split():
+            ids = self.word_index.get(word) or (self.word_index.get(word[:-1]) if word.endswith('s') else None)
+            if ids:
+                postings.append(set(ids))
+        while postings:
+            candidates = set.intersection(*postings)
+            if candidates:
+                return min(candidates, key=lambda row_id: len(self.names[row_id]))
+            postings.pop(0)
+        return None
+
+    def calories_for(self, text):
+        row_id = self.find(text)
+        return None if row_id is None else self.calories[row_id]
+
+    def parse_quantity(self, item):
+        match = self.QUANTITY.match(item)
+        if not match:
+            return 1.0, item
+        amount, rest = match.groups()
+        if '/' in amount:
+            numerator, denominator = amount.split('/')
+            quantity = float(numerator) / float(denominator) if float(denominator) else 1.0
+        else:
+            quantity = float(amount)
+        return quantity, rest
+
+    def meal_totals(self, text):
+        totals = {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "unknown": []}
+        for item in self.SEPARATORS.split(text):
+            if not item.strip():
+                continue
+            quantity, name = self.parse_quantity(item)
+            row_id = self.find(name)
+            if row_id is None:
+                totals["unknown"].append(item.strip())
+                continue
+            totals["calories"] += self.calories[row_id] * quantity
+            totals["protein"] += self.protein[row_id] * quantity
+            totals["carbs"] += self.carbs[row_id] * quantity
+            totals["fat"] += self.fat[row_id] * quantity
+        return totals
+
+    def day_totals(self, meal_plan):
+        totals = {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "unknown": []}
+        for text in meal_plan.values():
+            meal = self.meal_totals(text)
+            for key in ("calories", "protein", "carbs", "fat"):
+                totals[key] += meal[key]
+            totals["unknown"].extend(meal["unknown"])
+        return totals
+
+nutrition_db = NutritionDatabase()
+
+def image_dhash(image):
+    from PyQt6.QtGui import QImage
+    small = image.convertToFormat(QImage.Format.Format_Grayscale8).scaled(
+        9, 8, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    value = 0
+    for y in range(8):
+        row = [small.pixel(x, y) & 0xFF for x in range(9)]
+        for x in range(8):
+            value = (value << 1) | (row[x] > row[x + 1])
+    return value
+
+class BKTree:
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, key, value):
+        self.size += 1
+        if self.root is None:
+            self.root = (key, [value], {})
+            return
+        node = self.root
+        while True:
+            distance = (node[0] ^ key).bit_count()
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (key, [value], {})
+                return
+            node = child
+
+    def items(self):
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            key, values, children = stack.pop()
+            for value in values:
+                yield key, value
+            stack.extend(children.values())
+
+    def search(self, key, threshold):
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = (node[0] ^ key).bit_count()
+            if distance <= threshold:
+                matches.extend((distance, value) for value in node[1])
+            # Triangle inequality: only subtrees within [d - t, d + t] can hold matches
+            for child_distance, child in node[2].items():
+                if distance - threshold <= child_distance <= distance + threshold:
+                    stack.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+def day_ordinal(date_string):
+    return Date.fromisoformat(date_string).toordinal()
+
+def ordinal_date(ordinal):
+    return Date.fromordinal(ordinal).isoformat()
+
+def clock_minutes(time_string):
+    hours, minutes = time_string.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def encode_label(labels, value):
+    # Enum-code a label, extending the codebook for values outside the defaults (e.g. imported data)
+    try:
+        return labels.index(value)
+    except ValueError:
+        labels.append(value)
+        return len(labels) - 1
+
+class ExerciseRecord:
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def date(self):
+        return ordinal_date(self.table.days[self.row])
+
+    @property
+    def type(self):
+        return self.table.type_labels[self.table.types[self.row]]
+
+    @property
+    def duration(self):
+        return self.table.durations[self.row]
+
+    @property
+    def intensity(self):
+        return self.table.intensity_labels[self.table.intensities[self.row]]
+
+    def as_dict(self):
+        return {"type": self.type, "duration": self.duration, "intensity": self.intensity}
+
+class ExerciseColumns:
+    def __init__(self):
+        self.days = array('l')
+        # Imported data can carry long sessions and many distinct labels; keep headroom over 'B'/'H'
+        self.durations = array('I')
+        self.types = array('H')
+        self.intensities = array('H')
+        self.type_labels = list(EXERCISE_TYPES)
+        self.intensity_labels = list(EXERCISE_INTENSITIES)
+
+    @classmethod
+    @perf_metrics.timed('ExerciseColumns.from_dict')
+    def from_dict(cls, exercise_data):
+        table = cls()
+        for date in sorted(exercise_data):
+            ordinal = day_ordinal(date)
+            for exercise in exercise_data[date]:
+                table.days.append(ordinal)
+                table.durations.append(int(exercise['duration']))
+                table.types.append(encode_label(table.type_labels, exercise['type']))
+                table.intensities.append(encode_label(table.intensity_labels, exercise['intensity']))
+        return table
+
+    def append(self, date, exercise):
+        ordinal = day_ordinal(date)
+        row = bisect.bisect_right(self.days, ordinal)
+        self.days.insert(row, ordinal)
+        self.durations.insert(row, int(exercise['duration']))
+        self.types.insert(row, encode_label(self.type_labels, exercise['type']))
+        self.intensities.insert(row, encode_label(self.intensity_labels, exercise['intensity']))
+        return row
+
+    def __len__(self):
+        return len(self.days)
+
+    def __getitem__(self, row):
+        return ExerciseRecord(self, row)
+
+    def __iter__(self):
+        return (ExerciseRecord(self, row) for row in range(len(self.days)))
+
+    def rows_between(self, start_date, end_date):
+        return (bisect.bisect_left(self.days, day_ordinal(start_date)),
+                bisect.bisect_right(self.days, day_ordinal(end_date)))
+
+    def between(self, start_date, end_date):
+        start, end = self.rows_between(start_date, end_date)
+        return [ExerciseRecord(self, row) for row in range(start, end)]
+
+    def to_dict(self):
+        exercise_data = {}
+        for record in self:
+            exercise_data.setdefault(record.date, []).append(record.as_dict())
+        return exercise_data
+
+    def as_numpy(self):
+        import numpy
+        return {
+            "days": numpy.frombuffer(self.days, dtype=numpy.int64 if self.days.itemsize == 8 else numpy.int32),
+            "durations": numpy.frombuffer(self.durations, dtype=f"u{self.durations.itemsize}"),
+            "types": numpy.frombuffer(self.types, dtype=numpy.uint16),
+            "intensities": numpy.frombuffer(self.intensities, dtype=numpy.uint16),
+        }
+
+@functools.lru_cache(maxsize=1024)
+def exercise_burn(weight, exercise_type, intensity, duration):
+    # Weight is part of the key, so engines with different weights share the cache safely
+    return CalorieEngine.met(exercise_type, intensity) * weight * duration / 60
+
+class CalorieEngine:
+    # Burn for a whole ExerciseColumns table is computed in one vectorized pass (numpy when installed)
+    # and kept as a prefix sum so any date range is two bisects. Results are cached for the current
+    # weight only; set_weight drops them.
+    def __init__(self, weight):
+        self.weight = weight
+        self.tables = {}
+
+    @staticmethod
+    def met(exercise_type, intensity):
+        return EXERCISE_METS.get(exercise_type, {}).get(intensity, DEFAULT_MET)
+
+    def set_weight(self, weight):
+        if weight != self.weight:
+            self.weight = weight
+            self.tables.clear()
+
+    def burn(self, exercise):
+        return exercise_burn(self.weight, exercise['type'], exercise['intensity'], int(exercise['duration']))
+
+    def met_matrix(self, table):
+        return [[self.met(exercise_type, intensity) for intensity in table.intensity_labels]
+                for exercise_type in table.type_labels]
+
+    @perf_metrics.timed('CalorieEngine.table_burns')
+    def table_burns(self, table):
+        # Keyed on the table and its length: ExerciseColumns only grows, so a length change means new rows.
+        # The startup loader fills this from a worker thread, so the weight used is stored and checked too.
+        weight = self.weight
+        cached = self.tables.get(id(table))
+        if cached is not None and cached[0] is table and len(cached[1]) == len(table) and cached[3] == weight:
+            return cached[1], cached[2]
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            columns = table.as_numpy()
+            mets = numpy.array(self.met_matrix(table), dtype=numpy.float64)
+            burns = mets[columns["types"], columns["intensities"]] * columns["durations"] * (weight / 60)
+            prefix = numpy.concatenate(([0.0], numpy.cumsum(burns)))
+        else:
+            mets = self.met_matrix(table)
+            factor = weight / 60
+            burns = array('d', (mets[kind][level] * minutes * factor
+                                for kind, level, minutes in zip(table.types, table.intensities, table.durations)))
+            prefix = array('d', [0.0])
+            prefix.extend(itertools.accumulate(burns))
+        self.tables[id(table)] = (table, burns, prefix, weight)
+        return burns, prefix
+
+    def row_burn(self, table, row):
+        return float(self.table_burns(table)[0][row])
+
+    def burned_between(self, table, start_date, end_date):
+        _, prefix = self.table_burns(table)
+        start, end = table.rows_between(start_date, end_date)
+        return float(prefix[end] - prefix[start])
+
+class SleepOverlapError(ValueError):
+    pass
+
+def sleep_sessions(value):
+    # sleep_data schema 1 stored a single session dict per date; schema 2 stores a list
+    if value is None:
+        return []
+    return [value] if isinstance(value, dict) else list(value)
+
+class SleepRecord:
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def date(self):
+        return ordinal_date(self.table.days[self.row])
+
+    @property
+    def start(self):
+        return self.table.starts[self.row]
+
+    @property
+    def end(self):
+        return self.table.ends[self.row]
+
+    @property
+    def sleep_time(self):
+        minutes = self.table.starts[self.row] % 1440
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    @property
+    def wake_time(self):
+        minutes = self.table.ends[self.row] % 1440
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    @property
+    def duration_minutes(self):
+        return self.table.ends[self.row] - self.table.starts[self.row]
+
+    @property
+    def quality(self):
+        return self.table.quality_labels[self.table.qualities[self.row]]
+
+    def as_dict(self):
+        return {"sleep_time": self.sleep_time, "wake_time": self.wake_time, "quality": self.quality}
+
+class SleepColumns:
+    # Sleep sessions are stored as absolute minutes (day ordinal * 1440 + clock minutes); a wake time
+    # at or before the sleep time belongs to the next morning. Rows are kept sorted by start, which
+    # also keeps days sorted, so every query is a couple of bisects plus a prefix-sum difference.
+    def __init__(self):
+        self.days = array('l')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.qualities = array('B')
+        self.quality_labels = list(SLEEP_QUALITIES)
+        self.index = None
+
+    @staticmethod
+    def span(date, sleep_info):
+        ordinal = day_ordinal(date)
+        start = ordinal * 1440 + clock_minutes(sleep_info['sleep_time'])
+        end = ordinal * 1440 + clock_minutes(sleep_info['wake_time'])
+        if end <= start:
+            end += 1440
+        return ordinal, start, end
+
+    @classmethod
+    @perf_metrics.timed('SleepColumns.from_dict')
+    def from_dict(cls, sleep_data):
+        table = cls()
+        rows = sorted(
+            (cls.span(date, session) + (encode_label(table.quality_labels, session['quality']),)
+             for date, value in sleep_data.items() for session in sleep_sessions(value)),
+            key=lambda row: row[1])
+        for ordinal, start, end, quality in rows:
+            table.days.append(ordinal)
+            table.starts.append(start)
+            table.ends.append(end)
+            table.qualities.append(quality)
+        return table
+
+    def build_index(self):
+        # reach[i] is the latest wake time among rows 0..i, so it stays sorted even if older data
+        # holds overlapping sessions; prefix[i] is the total minutes slept in rows before i.
+        if self.index is None:
+            reach, prefix = array('q'), array('q', [0])
+            latest = total = 0
+            for start, end in zip(self.starts, self.ends):
+                latest = max(latest, end)
+                total += end - start
+                reach.append(latest)
+                prefix.append(total)
+            self.index = (reach, prefix)
+        return self.index
+
+    def overlapping_rows(self, start, end):
+        reach, _ = self.build_index()
+        return bisect.bisect_right(reach, start), bisect.bisect_left(self.starts, end)
+
+    def overlapping(self, start, end):
+        first, last = self.overlapping_rows(start, end)
+        return [SleepRecord(self, row) for row in range(first, last) if self.ends[row] > start]
+
+    def add(self, date, sleep_info):
+        ordinal, start, end = self.span(date, sleep_info)
+        clashes = self.overlapping(start, end)
+        if clashes:
+            clash = clashes[0]
+            raise SleepOverlapError(
+                f"Overlaps the session logged on {clash.date} ({clash.sleep_time} - {clash.wake_time})")
+        row = bisect.bisect_left(self.starts, start)
+        self.days.insert(row, ordinal)
+        self.starts.insert(row, start)
+        self.ends.insert(row, end)
+        self.qualities.insert(row, encode_label(self.quality_labels, sleep_info['quality']))
+        if self.index is not None:
+            self.update_index(row)
+        return row
+
+    def update_index(self, row):
+        # The new row overlaps nothing, so every later row starts at or after its end and their reach is
+        # unchanged; only the prefix sums past the row move. Sessions are usually logged for the latest
+        # night, which keeps the shifted tail short instead of rebuilding the whole index.
+        reach, prefix = self.index
+        start, end = self.starts[row], self.ends[row]
+        reach.insert(row, max(reach[row - 1], end) if row else end)
+        prefix.insert(row + 1, prefix[row] + end - start)
+        for later in range(row + 2, len(prefix)):
+            prefix[later] += end - start
+
+    def __len__(self):
+        return len(self.days)
+
+    def __getitem__(self, row):
+        return SleepRecord(self, row)
+
+    def __iter__(self):
+        return (SleepRecord(self, row) for row in range(len(self.days)))
+
+    def rows_between(self, start_date, end_date):
+        return (bisect.bisect_left(self.days, day_ordinal(start_date)),
+                bisect.bisect_right(self.days, day_ordinal(end_date)))
+
+    def between(self, start_date, end_date):
+        start, end = self.rows_between(start_date, end_date)
+        return [SleepRecord(self, row) for row in range(start, end)]
+
+    def minutes_between(self, start_date, end_date):
+        # Sleep attributed to the nights of start_date..end_date inclusive
+        _, prefix = self.build_index()
+        first, last = self.rows_between(start_date, end_date)
+        return prefix[last] - prefix[first]
+
+    def minutes_in_window(self, start, end):
+        # Minutes asleep inside the absolute-minute window [start, end), clipping sessions that straddle it
+        _, prefix = self.build_index()
+        first, last = self.overlapping_rows(start, end)
+        if first >= last:
+            return 0
+        total = prefix[last] - prefix[first]
+        total -= max(0, start - self.starts[first])
+        total -= max(0, self.ends[last - 1] - end)
+        return max(0, total)
+
+    def sleep_debt(self, end_date, days=7, target=SLEEP_TARGET_MINUTES):
+        end = day_ordinal(end_date)
+        start_date = ordinal_date(end - days + 1)
+        return days * target - self.minutes_between(start_date, end_date)
+
+    def weekly_debt(self, end_date, weeks, target=SLEEP_TARGET_MINUTES):
+        # (week start date, debt minutes) for the `weeks` weeks ending on end_date, oldest first
+        end = day_ordinal(end_date)
+        return [(ordinal_date(end - 7 * week - 6), self.sleep_debt(ordinal_date(end - 7 * week), 7, target))
+                for week in reversed(range(weeks))]
+
+    def to_dict(self):
+        sleep_data = {}
+        for record in self:
+            sleep_data.setdefault(record.date, []).append(record.as_dict())
+        return sleep_data
+
+class SnapshotError(ValueError):
+    pass
+
+def json_dumps_bytes(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def snapshot_backends():
+    backends = {}
+    try:
+        import orjson
+        backends["orjson"] = (1, orjson.dumps, orjson.loads)
+    except ImportError:
+        pass
+    try:
+        import msgpack
+        backends["msgpack"] = (2, functools.partial(msgpack.packb, use_bin_type=True),
+                               functools.partial(msgpack.unpackb, raw=False, strict_map_key=False))
+    except ImportError:
+        pass
+    backends["json"] = (3, json_dumps_bytes, json.loads)
+    return backends
+
+class DataStore:
+    # Snapshot layout: fixed header (magic, format version, backend, schema name/version, CRC32, length)
+    # followed by the serialized payload. Plain .json files from older versions are still read.
+    MAGIC = b'AHSNAP'
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct('<6sBB16sHIQ')
+    SCHEMA_VERSIONS = {
+        "user_data": 1, "analysis_history": 1, "meal_plans": 1,
+        "exercise_data": 1, "water_data": 1, "sleep_data": 2, "water_rollups": 1,
+        "reminders": 1,
+    }
+
+    def __init__(self, directory=".", backend=None):
+        self.directory = directory
+        self.backends = snapshot_backends()
+        backend = backend or os.environ.get("HEALTH_SNAPSHOT_BACKEND") or next(iter(self.backends))
+        if backend not in self.backends:
+            raise SnapshotError(f"Snapshot backend '{backend}' is not installed")
+        self.backend = backend
+
+    def snapshot_path(self, name):
+        return os.path.join(self.directory, f"{name}.snap")
+
+    def legacy_path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def exists(self, name):
+        return os.path.exists(self.snapshot_path(name)) or os.path.exists(self.legacy_path(name))
+
+    def load(self, name, default):
+        path = self.snapshot_path(name)
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                return self.decode(name, file.read())
+        legacy = self.legacy_path(name)
+        if os.path.exists(legacy):
+            with open(legacy, "r") as file:
+                return json.load(file)
+        return default
+
+    def save(self, name, data):
+        path = self.snapshot_path(name)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(self.encode(name, data))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        legacy = self.legacy_path(name)
+        if os.path.exists(legacy):
+            os.replace(legacy, f"{legacy}.migrated")
+
+    def retire(self, name):
+        # Keep a store's files as *.migrated once its data has moved elsewhere
+        for path in (self.snapshot_path(name), self.legacy_path(name)):
+            if os.path.exists(path):
+                os.replace(path, f"{path}.migrated")
+
+    def encode(self, name, data):
+        code, dumps, _ = self.backends[self.backend]
+        payload = dumps(data)
+        header = self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, code, name.encode('ascii')[:16],
+                                  self.SCHEMA_VERSIONS.get(name, 1), zlib.crc32(payload), len(payload))
+        return header + payload
+
+    def decode(self, name, blob):
+        if len(blob) < self.HEADER.size:
+            raise SnapshotError(f"{name}: truncated snapshot header")
+        magic, version, code, schema, schema_version, checksum, length = self.HEADER.unpack_from(blob)
+        if magic != self.MAGIC or version > self.FORMAT_VERSION:
+            raise SnapshotError(f"{name}: unsupported snapshot format")
+        if schema_version > self.SCHEMA_VERSIONS.get(name, 1):
+            raise SnapshotError(f"{name}: written by a newer version (schema {schema_version})")
+        payload = memoryview(blob)[self.HEADER.size:]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            raise SnapshotError(f"{name}: snapshot checksum mismatch")
+        for backend, (backend_code, _, loads) in self.backends.items():
+            if backend_code == code:
+                return loads(bytes(payload) if backend == "json" else payload)
+        raise SnapshotError(f"{name}: snapshot backend {code} is not installed")
+
+data_store = DataStore()
+
+class WaterLog:
+    # Events are JSON lines {"ts": "YYYY-MM-DDTHH:MM:SS", "glasses": n} or {"ts": ..., "goal": n}.
+    # Daily and hourly rollups are kept up to date as events are appended and checkpointed with
+    # the log offset they cover, so a restart only replays the events written since.
+    def __init__(self, path=WATER_LOG_PATH, store=None):
+        self.path = path
+        self.store = store or data_store
+        self.daily = {}
+        self.hourly = {}
+        self.goals = {}
+        self.goal_dates = []
+        self.offset = 0
+        self.unsaved = 0
+
+    @perf_metrics.timed('WaterLog.load')
+    def load(self):
+        checkpoint = self.store.load("water_rollups", None)
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if checkpoint is not None and checkpoint["offset"] > log_size:
+            # Checkpoint is ahead of the log (e.g. restored from a backup taken mid-write): rebuild from the log
+            checkpoint = None
+        if checkpoint is not None:
+            self.daily = checkpoint["daily"]
+            self.hourly = checkpoint["hourly"]
+            self.goals = checkpoint["goals"]
+            self.offset = checkpoint["offset"]
+        else:
+            # First run on this version: seed the rollups from the old per-date slider totals
+            for date, entry in self.store.load("water_data", {}).items():
+                self.daily[date] = entry.get("intake", 0)
+                self.goals[date] = entry.get("goal", DEFAULT_WATER_GOAL)
+        self.goal_dates = sorted(self.goals)
+        self.replay()
+        return self
+
+    def replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as file:
+            file.seek(self.offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # Torn final write from a crash: drop it so new events start on a clean line
+                    file.truncate(self.offset)
+                    break
+                self.offset += len(line)
+                try:
+                    self.apply(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+                self.unsaved += 1
+
+    def apply(self, event):
+        date, hour = event["ts"][:10], int(event["ts"][11:13])
+        if "goal" in event:
+            if date not in self.goals:
+                bisect.insort(self.goal_dates, date)
+            self.goals[date] = event["goal"]
+        if event.get("glasses"):
+            self.daily[date] = self.daily.get(date, 0) + event["glasses"]
+            hours = self.hourly.setdefault(date, [0] * 24)
+            hours[hour] += event["glasses"]
+
+    def append(self, glasses=0, goal=None, timestamp=None):
+        event = {"ts": (timestamp or datetime.now()).isoformat(timespec="seconds")}
+        if glasses < 0 and self.intake(event["ts"][:10]) + glasses < 0:
+            raise ValueError(f"cannot remove {-glasses} glasses, only {self.intake(event['ts'][:10])} logged that day")
+        if glasses:
+            event["glasses"] = glasses
+        if goal is not None:
+            event["goal"] = goal
+        self.extend([event])
+        return event
+
+    def extend(self, events):
+        # One write and one fsync for the whole batch (bulk imports pass thousands of events)
+        lines = [(json.dumps(event, separators=(',', ':')) + "\n").encode("utf-8") for event in events]
+        with open(self.path, "ab") as file:
+            file.write(b"".join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        for event, line in zip(events, lines):
+            self.offset += len(line)
+            self.apply(event)
+        self.unsaved += len(lines)
+        if self.unsaved >= WATER_CHECKPOINT_EVENTS:
+            self.checkpoint()
+
+    def events(self):
+        # Totals seeded from the old water_data store have no events; report them as one midday event
+        for date in sorted(self.daily):
+            seeded = self.daily[date] - sum(self.hourly.get(date, ()))
+            if seeded > 0:
+                yield {"ts": f"{date}T12:00:00", "glasses": seeded, "goal": self.goals.get(date)}
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as file:
+                for line in file:
+                    if line.endswith(b"\n"):
+                        yield json.loads(line)
+
+    def checkpoint(self):
+        if self.unsaved:
+            self.store.save("water_rollups", {"offset": self.offset, "daily": self.daily,
+                                              "hourly": self.hourly, "goals": self.goals})
+            self.unsaved = 0
+
+    def copy(self):
+        # Read-only snapshot of the daily totals and goals for use off the GUI thread
+        snapshot = WaterLog(self.path, self.store)
+        snapshot.daily = dict(self.daily)
+        snapshot.goals = dict(self.goals)
+        snapshot.goal_dates = list(self.goal_dates)
+        return snapshot
+
+    def intake(self, date):
+        return self.daily.get(date, 0)
+
+    def hours(self, date):
+        # Stored buckets sum to the logged events, so a slider correction leaves its hour negative (events()
+        # relies on that sum). For display, each correction takes glasses back from the hours before it,
+        # latest first; glasses seeded from the old daily totals have no hour and are left out.
+        hours = list(self.hourly.get(date, [0] * 24))
+        for hour, count in enumerate(hours):
+            if count < 0:
+                hours[hour], remaining = 0, -count
+                for earlier in reversed(range(hour)):
+                    taken = min(remaining, hours[earlier])
+                    hours[earlier] -= taken
+                    remaining -= taken
+                    if not remaining:
+                        break
+        return hours
+
+    def goal(self, date):
+        # Goals carry forward from the last day they were changed
+        row = bisect.bisect_right(self.goal_dates, date)
+        return self.goals[self.goal_dates[row - 1]] if row else DEFAULT_WATER_GOAL
+
+    def month(self, year, month):
+        first = Date(year, month, 1)
+        days = ((first.replace(year=year + month // 12, month=month % 12 + 1)) - first).days
+        dates = [(first + timedelta(days=offset)).isoformat() for offset in range(days)]
+        return [(date, self.intake(date), self.goal(date)) for date in dates]
+
+# Fixed pseudo-random byte table for the gear rolling hash; changing it changes every chunk boundary
+_gear_random = random.Random(0x67656172)
+GEAR = [_gear_random.getrandbits(32) for _ in range(256)]
+
+def content_chunks(data, min_size=BACKUP_MIN_CHUNK, average=BACKUP_AVERAGE_CHUNK, max_size=BACKUP_MAX_CHUNK):
+    # Boundaries depend only on the bytes just before them, so an insert early in a file only
+    # changes the chunks around it and the rest still deduplicate against the previous snapshot
+    mask = (average - 1) << (32 - (average - 1).bit_length())
+    view = memoryview(data)
+    start, length = 0, len(data)
+    while start < length:
+        end = min(start + max_size, length)
+        cut, rolling, index = end, 0, start + min_size
+        while index < end:
+            rolling = ((rolling << 1) + GEAR[data[index]]) & 0xFFFFFFFF
+            index += 1
+            if not rolling & mask:
+                cut = index
+                break
+        yield view[start:cut]
+        start = cut
+
+def read_backup_source(path):
+    if not path.endswith(".db"):
+        with open(path, "rb") as file:
+            return file.read()
+    # A live SQLite database is copied through the backup API, which takes a consistent snapshot even if
+    # the GUI thread commits meanwhile; reading the file bytes could tear a transaction
+    source, copy = sqlite3.connect(path), sqlite3.connect(":memory:")
+    try:
+        source.backup(copy)
+        return copy.serialize()
+    finally:
+        source.close()
+        copy.close()
+
+class LocalBackupTarget:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    def get(self, key):
+        with open(self.path(key), "rb") as file:
+            return file.read()
+
+    def keys(self, prefix):
+        base = self.path(prefix.rstrip("/"))
+        found = []
+        for directory, _, files in os.walk(base):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            found.extend(f"{relative}/{name}" for name in files if not name.endswith(".tmp"))
+        return found
+
+    def __str__(self):
+        return self.root
+
+class S3BackupTarget:
+    # Any S3-compatible endpoint (AWS, MinIO, ...): s3://bucket/prefix with HEALTH_BACKUP_ENDPOINT for non-AWS
+    def __init__(self, url, endpoint_url=None):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("S3 backups need boto3 (pip install boto3)") from None
+        self.url = url
+        self.bucket, _, prefix = url[len("s3://"):].partition("/")
+        self.prefix = f"{prefix.strip('/')}/" if prefix.strip('/') else ""
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or os.environ.get("HEALTH_BACKUP_ENDPOINT"),
+                                   config=Config(s3={"addressing_style": "path"}))
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=bytes(data))
+
+    def get(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+
+    def keys(self, prefix):
+        found = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            found.extend(item["Key"][len(self.prefix):] for item in page.get("Contents", []))
+        return found
+
+    def __str__(self):
+        return self.url
+
+def backup_target(spec=None):
+    spec = spec or BACKUP_TARGET
+    return S3BackupTarget(spec) if spec.startswith("s3://") else LocalBackupTarget(spec)
+
+class BackupManager:
+    # Layout on the target: chunks/<sha[:2]>/<sha> (zlib-compressed) and snapshots/<id>.json manifests
+    # listing each file's size, mtime and chunk hashes. Files whose size and mtime match the previous
+    # manifest reuse its chunk list without being read.
+    def __init__(self, source=".", target=None):
+        self.source = source
+        self.target = target or backup_target()
+        self.lock = threading.Lock()
+
+    def source_files(self):
+        return sorted(name for name in os.listdir(self.source)
+                      if os.path.isfile(os.path.join(self.source, name))
+                      and any(fnmatch.fnmatch(name, pattern) for pattern in BACKUP_PATTERNS))
+
+    def snapshots(self):
+        return sorted(key[len("snapshots/"):-len(".json")] for key in self.target.keys("snapshots/")
+                      if key.endswith(".json"))
+
+    def manifest(self, snapshot):
+        return json.loads(self.target.get(f"snapshots/{snapshot}.json"))
+
+    @perf_metrics.timed('BackupManager.backup')
+    def backup(self):
+        with self.lock:
+            snapshots = self.snapshots()
+            previous = self.manifest(snapshots[-1])["files"] if snapshots else {}
+            stored = {key.rsplit("/", 1)[-1] for key in self.target.keys("chunks/")}
+            stats = {"files": 0, "new_chunks": 0, "reused_chunks": 0, "uploaded_bytes": 0}
+            files = {}
+            for name in self.source_files():
+                info = os.stat(os.path.join(self.source, name))
+                entry = previous.get(name)
+                if entry and entry["size"] == info.st_size and entry["mtime_ns"] == info.st_mtime_ns:
+                    files[name] = entry
+                    stats["reused_chunks"] += len(entry["chunks"])
+                    continue
+                data = read_backup_source(os.path.join(self.source, name))
+                chunks = []
+                for chunk in content_chunks(data):
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    if digest in stored:
+                        stats["reused_chunks"] += 1
+                    else:
+                        payload = zlib.compress(chunk, 6)
+                        self.target.put(f"chunks/{digest[:2]}/{digest}", payload)
+                        stored.add(digest)
+                        stats["new_chunks"] += 1
+                        stats["uploaded_bytes"] += len(payload)
+                    chunks.append(digest)
+                # A file that changed while it was read gets no mtime, so the next backup reads it again
+                files[name] = {"size": len(data), "mtime_ns": info.st_mtime_ns if len(data) == info.st_size else 0,
+                               "chunks": chunks}
+                stats["files"] += 1
+            snapshot = datetime.now().strftime("%Y%m%dT%H%M%S")
+            while snapshot in snapshots:
+                snapshot += "a"
+            manifest = {"created": datetime.now().isoformat(timespec="seconds"), "files": files, "stats": stats}
+            # The manifest goes last: a snapshot only exists once every chunk it names has been stored
+            self.target.put(f"snapshots/{snapshot}.json", json_dumps_bytes(manifest))
+            return snapshot, stats
+
+    def snapshot_at(self, moment=None):
+        # Latest snapshot taken at or before `moment` (a datetime); None if there is none
+        snapshots = self.snapshots()
+        if moment is not None:
+            snapshots = [snapshot for snapshot in snapshots
+                         if datetime.strptime(snapshot[:15], "%Y%m%dT%H%M%S") <= moment]
+        return snapshots[-1] if snapshots else None
+
+    def restore(self, destination, moment=None, snapshot=None):
+        snapshot = snapshot or self.snapshot_at(moment)
+        if snapshot is None:
+            raise FileNotFoundError(f"No backup in {self.target} taken before {moment}")
+        os.makedirs(destination, exist_ok=True)
+        files = self.manifest(snapshot)["files"]
+        for name, entry in files.items():
+            parts = []
+            for digest in entry["chunks"]:
+                chunk = zlib.decompress(self.target.get(f"chunks/{digest[:2]}/{digest}"))
+                if hashlib.sha256(chunk).hexdigest() != digest:
+                    raise SnapshotError(f"{name}: backup chunk {digest} is corrupt")
+                parts.append(chunk)
+            data = b"".join(parts)
+            if len(data) != entry["size"]:
+                raise SnapshotError(f"{name}: restored size does not match the backup")
+            path = os.path.join(destination, name)
+            with open(f"{path}.tmp", "wb") as file:
+                file.write(data)
+            os.replace(f"{path}.tmp", path)
+        return snapshot, sorted(files)
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.items:
+                return default
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+class HistoryStore:
+    # Row N of the table is "Analysis N + 1"; entries are append-only so list positions never shift
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.results = LRUCache(HISTORY_CACHE_SIZE)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (position INTEGER PRIMARY KEY, image_path TEXT NOT NULL, "
+                "result TEXT NOT NULL, created TEXT, dhash INTEGER)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+        self.size = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def migrate(self, store):
+        # One-time move of the snapshot-based analysis_history list into the table
+        with self.lock:
+            if self.size or not store.exists("analysis_history"):
+                return 0
+            entries = store.load("analysis_history", [])
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO entries (position, image_path, result, created, dhash) VALUES (?, ?, ?, ?, ?)",
+                    ((position, entry["image_path"], entry["result"], entry.get("created"), entry.get("dhash"))
+                     for position, entry in enumerate(entries)))
+            self.size = len(entries)
+        store.retire("analysis_history")
+        return self.size
+
+    def __len__(self):
+        return self.size
+
+    def append(self, image_path, result, image_hash=None):
+        with self.lock, self.connection:
+            position = self.size
+            self.connection.execute(
+                "INSERT INTO entries (position, image_path, result, created, dhash) VALUES (?, ?, ?, ?, ?)",
+                (position, image_path, result, datetime.now().isoformat(timespec="seconds"), image_hash))
+            self.size += 1
+        self.results.put(position, (image_path, result))
+        return position
+
+    def __getitem__(self, position):
+        entry = self.results.get(position)
+        if entry is None:
+            with self.lock:
+                row = self.connection.execute("SELECT image_path, result FROM entries WHERE position = ?",
+                                              (position,)).fetchone()
+            if row is None:
+                raise IndexError(position)
+            entry = tuple(row)
+            self.results.put(position, entry)
+        return entry
+
+    def created(self, start, count):
+        with self.lock:
+            return [row[0] for row in self.connection.execute(
+                "SELECT created FROM entries WHERE position >= ? ORDER BY position LIMIT ?", (start, count))]
+
+    def hashes(self):
+        with self.lock:
+            return self.connection.execute("SELECT position, dhash FROM entries WHERE dhash IS NOT NULL").fetchall()
+
+    def between(self, start_date, end_date):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT created, result FROM entries WHERE created >= ? AND created < ? ORDER BY position",
+                (start_date, f"{end_date}T99")).fetchall()
+
+    def documents(self):
+        # Streams search-index documents a page at a time; the lock is only held while a page is read,
+        # never while the consumer works through it
+        last = -1
+        while True:
+            with self.lock:
+                batch = self.connection.execute(
+                    "SELECT position, result FROM entries WHERE position > ? ORDER BY position LIMIT ?",
+                    (last, HISTORY_FETCH_ROWS)).fetchall()
+            if not batch:
+                break
+            for position, result in batch:
+                yield ("analysis", position, f"Analysis {position + 1}", result)
+            last = batch[-1][0]
+
+class HistoryListModel(QAbstractListModel):
+    # Rows are fetched HISTORY_FETCH_ROWS at a time as the view scrolls; only the short labels are held
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.created = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.created)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"Analysis {index.row() + 1}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.created[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.created) < len(self.store)
+
+    def fetchMore(self, parent=QModelIndex()):
+        created = self.store.created(len(self.created), HISTORY_FETCH_ROWS)
+        if created:
+            self.beginInsertRows(QModelIndex(), len(self.created), len(self.created) + len(created) - 1)
+            self.created.extend(created)
+            self.endInsertRows()
+
+    def ensure_loaded(self, row):
+        while row >= len(self.created) and self.canFetchMore():
+            self.fetchMore()
+
+    def reload(self):
+        self.beginResetModel()
+        self.created = []
+        self.endResetModel()
+
+    def entry_added(self):
+        # Only append when everything before it is loaded; otherwise fetchMore picks it up in order
+        if len(self.created) == len(self.store) - 1:
+            self.fetchMore()
+
+class TrackerListModel(QAbstractListModel):
+    # Rows of a column table are exposed TRACKER_FETCH_ROWS at a time as the view scrolls and formatted only
+    # when painted, so listing years of sessions costs the same as listing a week; the table stays the
+    # only copy of the data
+    def __init__(self, label, parent=None):
+        super().__init__(parent)
+        self.label = label
+        self.table = None
+        self.loaded = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self.label(self.table, index.row())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.table is not None and self.loaded < len(self.table)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(TRACKER_FETCH_ROWS, len(self.table) - self.loaded)
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+            self.loaded += count
+            self.endInsertRows()
+
+    def set_table(self, table):
+        # Also used after rows are added or their burns change; rows already scrolled into view stay loaded
+        self.beginResetModel()
+        loaded = max(self.loaded, TRACKER_FETCH_ROWS) if table is self.table else TRACKER_FETCH_ROWS
+        self.table = table
+        self.loaded = min(len(table), loaded)
+        self.endResetModel()
+
+def report_periods(kind, end, count):
+    # `count` consecutive weeks (Monday-Sunday) or calendar months, oldest first, ending with the one holding `end`
+    periods = []
+    for index in reversed(range(count)):
+        if kind == "weekly":
+            start = end - timedelta(days=end.weekday(), weeks=index)
+            year, week, _ = start.isocalendar()
+            periods.append((kind, f"{year}-W{week:02d}", start, start + timedelta(days=6)))
+        else:
+            month = end.year * 12 + end.month - 1 - index
+            start = Date(month // 12, month % 12 + 1, 1)
+            following = Date((month + 1) // 12, (month + 1) % 12 + 1, 1)
+            periods.append((kind, f"{start:%Y-%m}", start, following - timedelta(days=1)))
+    return [(kind, label, start.isoformat(), finish.isoformat()) for kind, label, start, finish in periods]
+
+def period_statistics(period, exercise, sleep, water, engine, history, meal_plans):
+    # history is a HistoryStore; only the period's analyses are read from disk
+    kind, label, start, end = period
+    days = [ordinal_date(ordinal) for ordinal in range(day_ordinal(start), day_ordinal(end) + 1)]
+    minutes = dict.fromkeys(days, 0)
+    first, last = exercise.rows_between(start, end)
+    for row in range(first, last):
+        minutes[ordinal_date(exercise.days[row])] += exercise.durations[row]
+    nights = [sleep.minutes_between(day, day) for day in days]
+    logged_nights = [night for night in nights if night]
+    water_days = [(water.intake(day), water.goal(day)) for day in days]
+    planned = [nutrition_db.day_totals(meal_plans[day])["calories"] for day in days
+               if any(text.strip() for text in meal_plans.get(day, {}).values())]
+    analyses = [(created[:10], result.strip().split("\n", 1)[0][:160]) for created, result in history.between(start, end)]
+    stats = {
+        "kind": kind, "label": label, "start": start, "end": end, "days": days,
+        "exercise_minutes": [minutes[day] for day in days],
+        "exercise_sessions": last - first,
+        "exercise_kcal": round(engine.burned_between(exercise, start, end)),
+        "sleep_minutes": nights,
+        "sleep_average": round(sum(logged_nights) / len(logged_nights)) if logged_nights else 0,
+        "sleep_debt": len(days) * SLEEP_TARGET_MINUTES - sum(nights),
+        "water_glasses": [glasses for glasses, _ in water_days],
+        "water_goals": [goal for _, goal in water_days],
+        "water_adherence": sum(1 for glasses, goal in water_days if glasses >= goal) / len(days),
+        "planned_calories": round(sum(planned) / len(planned)) if planned else 0,
+        "analyses": analyses,
+    }
+    # Everything a report shows is in `stats`, so an unchanged hash means the existing report is still correct
+    stats["hash"] = hashlib.sha256(json_dumps_bytes([REPORT_FORMAT_VERSION, engine.weight, stats])).hexdigest()
+    return stats
+
+def report_chart_specs(stats):
+    categories = [str(int(day[8:])) for day in stats["days"]]
+    return {
+        "exercise": {"title": "Exercise minutes", "categories": categories,
+                     "series": [{"name": "Minutes", "type": "bar", "values": stats["exercise_minutes"]}]},
+        "sleep": {"title": "Sleep (hours)", "categories": categories,
+                  "series": [{"name": "Slept", "type": "line", "values": [round(m / 60, 2) for m in stats["sleep_minutes"]]},
+                             {"name": "Target", "type": "line", "values": [SLEEP_TARGET_MINUTES / 60] * len(categories)}]},
+        "water": {"title": "Water (glasses)", "categories": categories,
+                  "series": [{"name": "Glasses", "type": "bar", "values": stats["water_glasses"]},
+                             {"name": "Goal", "type": "line", "values": stats["water_goals"]}]},
+    }
+
+class ChartRenderer:
+    # Renders chart specs offscreen through QChart into PNG bytes. Images are cached in memory and on disk
+    # under the hash of the spec (which holds the data), so an unchanged period never re-renders.
+    # QChart is a graphics item and must stay on the GUI thread.
+    def __init__(self, directory, size=REPORT_CHART_SIZE):
+        self.directory = directory
+        self.size = size
+        self.memory = {}
+        self.renders = 0
+
+    def render(self, spec):
+        key = hashlib.sha256(json_dumps_bytes([self.size, spec])).hexdigest()
+        if key in self.memory:
+            return self.memory[key]
+        path = os.path.join(self.directory, f"{key}.png")
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                image = file.read()
+        else:
+            image = self.draw(spec)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(image)
+        self.memory[key] = image
+        return image
+
+    @perf_metrics.timed('ChartRenderer.draw')
+    def draw(self, spec):
+        self.renders += 1
+        chart = QChart()
+        chart.setTitle(spec["title"])
+        chart.setAnimationOptions(QChart.AnimationOption.NoAnimation)
+        chart.setBackgroundBrush(QColor(255, 255, 255))
+        x_axis = QBarCategoryAxis()
+        x_axis.append(spec["categories"])
+        small_font = QFont()
+        small_font.setPointSize(7)
+        x_axis.setLabelsFont(small_font)
+        y_axis = QValueAxis()
+        y_axis.setRange(0, max([value for series in spec["series"] for value in series["values"]] + [1]) * 1.1)
+        chart.addAxis(x_axis, Qt.AlignmentFlag.AlignBottom)
+        chart.addAxis(y_axis, Qt.AlignmentFlag.AlignLeft)
+        for series_spec in spec["series"]:
+            if series_spec["type"] == "bar":
+                bar_set = QBarSet(series_spec["name"])
+                bar_set.append([float(value) for value in series_spec["values"]])
+                series = QBarSeries()
+                series.append(bar_set)
+            else:
+                series = QLineSeries()
+                series.setName(series_spec["name"])
+                for index, value in enumerate(series_spec["values"]):
+                    series.append(index, value)
+            chart.addSeries(series)
+            series.attachAxis(x_axis)
+            series.attachAxis(y_axis)
+
+        width, height = self.size
+        scene = QGraphicsScene()
+        scene.addItem(chart)
+        chart.resize(width, height)
+        image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(QColor(255, 255, 255))
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        scene.render(painter, QRectF(0, 0, width, height), QRectF(0, 0, width, height))
+        painter.end()
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "PNG")
+        return bytes(buffer.data())
+
+def report_html(stats, image_source):
+    def duration(minutes):
+        return f"{minutes // 60}h {minutes % 60:02d}m"
+    analyses = "".join(f"<li>{day}: {html.escape(summary)}</li>" for day, summary in stats["analyses"]) \
+        or "<li>No meals analyzed in this period.</li>"
+    title = f"{'Weekly' if stats['kind'] == 'weekly' else 'Monthly'} health report {stats['label']}"
+    return f"""<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body style="font-family: sans-serif; color: #2C3E50;">
+<h1>{title}</h1>
+<p>{stats['start']} to {stats['end']}</p>
+<h2>Exercise</h2>
+<p>{sum(stats['exercise_minutes'])} minutes over {stats['exercise_sessions']} sessions, about {stats['exercise_kcal']} kcal burned.</p>
+<img src="{image_source('exercise')}">
+<h2>Sleep</h2>
+<p>Average {duration(stats['sleep_average'])} on logged nights; sleep debt {duration(max(0, stats['sleep_debt']))}.</p>
+<img src="{image_source('sleep')}">
+<h2>Water</h2>
+<p>Goal met on {stats['water_adherence']:.0%} of days ({sum(stats['water_glasses'])} glasses in total).</p>
+<img src="{image_source('water')}">
+<h2>Meals</h2>
+<p>Planned meals average {stats['planned_calories']} kcal per planned day.</p>
+<ul>{analyses}</ul>
+</body></html>"""
+
+def write_report(stats, charts, path, file_format):
+    if file_format == "html":
+        content = report_html(stats, lambda name: "data:image/png;base64," + base64.b64encode(charts[name]).decode("ascii"))
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return
+    # QTextDocument cannot read data: URLs, so the PDF gets the charts as document resources
+    document = QTextDocument()
+    for name, image in charts.items():
+        document.addResource(QTextDocument.ResourceType.ImageResource.value, QUrl(f"chart://{name}"),
+                             QImage.fromData(image, "PNG"))
+    document.setHtml(report_html(stats, lambda name: f"chart://{name}"))
+    writer = QPdfWriter(path)
+    writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+    writer.setResolution(96)
+    document.print(writer)
+
+class SearchIndex:
+    # FTS5 cannot index the UNINDEXED kind/ref columns, so document_keys maps (kind, ref) to the document's
+    # rowid: replacing a document is a primary-key lookup and a delete by rowid instead of a table scan.
+    # The connection is shared with the background rebuild; the lock serialises its use.
+    def __init__(self, path="search_index.db"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            try:
+                self.connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+                    "kind UNINDEXED, ref UNINDEXED, title, body, tokenize='porter unicode61')")
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: keep the same table and fall back to LIKE scans
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS documents (kind TEXT, ref TEXT, title TEXT, body TEXT)")
+                self.full_text = False
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS document_keys (kind TEXT, ref TEXT, docid INTEGER NOT NULL, "
+                "PRIMARY KEY (kind, ref)) WITHOUT ROWID")
+            # Indexes written before the key table existed are keyed once
+            if self.connection.execute("SELECT NOT EXISTS (SELECT 1 FROM document_keys)").fetchone()[0]:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO document_keys (kind, ref, docid) SELECT kind, ref, rowid FROM documents")
+
+    def is_empty(self):
+        with self.lock:
+            return self.connection.execute("SELECT NOT EXISTS (SELECT 1 FROM documents)").fetchone()[0] == 1
+
+    def replace(self, kind, ref, title, body):
+        # Called with the lock held, inside the caller's transaction
+        ref = str(ref)
+        row = self.connection.execute("SELECT docid FROM document_keys WHERE kind = ? AND ref = ?",
+                                      (kind, ref)).fetchone()
+        if row is not None:
+            self.connection.execute("DELETE FROM documents WHERE rowid = ?", row)
+        if body.strip():
+            docid = self.connection.execute("INSERT INTO documents (kind, ref, title, body) VALUES (?, ?, ?, ?)",
+                                            (kind, ref, title, body)).lastrowid
+            self.connection.execute("INSERT OR REPLACE INTO document_keys (kind, ref, docid) VALUES (?, ?, ?)",
+                                    (kind, ref, docid))
+        elif row is not None:
+            self.connection.execute("DELETE FROM document_keys WHERE kind = ? AND ref = ?", (kind, ref))
+
+    @perf_metrics.timed('SearchIndex.update')
+    def update(self, kind, ref, title, body):
+        with self.lock, self.connection:
+            self.replace(kind, ref, title, body)
+
+    @perf_metrics.timed('SearchIndex.update_many')
+    def update_many(self, documents):
+        with self.lock, self.connection:
+            for kind, ref, title, body in documents:
+                self.replace(kind, ref, title, body)
+
+    @perf_metrics.timed('SearchIndex.search')
+    def search(self, text, limit=50):
+        terms = re.findall(r'\w+', text.lower())
+        if not terms:
+            return []
+        if self.full_text:
+            query = ' '.join(f'"{term}"*' for term in terms)
+            with self.lock:
+                return self.connection.execute(
+                    "SELECT kind, ref, title, snippet(documents, 3, '[', ']', '...', 12) FROM documents "
+                    "WHERE documents MATCH ? ORDER BY bm25(documents, 0, 0, 2.0, 1.0) LIMIT ?",
+                    (query, limit)).fetchall()
+        clauses = ' AND '.join("(title LIKE ? OR body LIKE ?)" for _ in terms)
+        parameters = [value for term in terms for value in (f'%{term}%', f'%{term}%')]
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT kind, ref, title, body FROM documents WHERE {clauses} LIMIT ?",
+                parameters + [limit]).fetchall()
+        return [(kind, ref, title, body[:120]) for kind, ref, title, body in rows]
+
+def meal_plan_document(date, meal_plan):
+    body = '\n'.join(f"{meal}: {text}" for meal, text in meal_plan.items() if text)
+    return ("meal_plan", date, f"Meal plan {date}", body)
+
+class MealCompleter(QCompleter):
+    # Completes the item after the last separator so "eggs, sal" offers "salmon", "salad", ...
+    def splitPath(self, path):
+        return [NutritionDatabase.SEPARATORS.split(path)[-1].lstrip().lower()]
+
+    def pathFromIndex(self, index):
+        completion = super().pathFromIndex(index)
+        text = self.widget().text()
+        prefix = NutritionDatabase.SEPARATORS.split(text)[-1].lstrip()
+        head = text[:len(text) - len(prefix)] if prefix else text
+        return head + completion
+
+def format_local_estimate(predictions):
+    if not predictions:
+        return "No offline estimate available for this image."
+    lines = ["Quick offline estimate (on-device model):"]
+    for label, probability in predictions:
+        name = label.replace('_', ' ').title()
+        calories = FOOD_CALORIES.get(label) or nutrition_db.calories_for(label.replace('_', ' '))
+        calorie_text = f" - about {calories:.0f} kcal per serving" if calories else ""
+        lines.append(f"  {name} ({probability:.0%}){calorie_text}")
+    lines.append("Click Analyze for detailed advice from the remote model.")
+    return "\n".join(lines)
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        # Concurrent callers with the same key share one execution of func; returns (result, shared)
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+        else:
+            try:
+                call["result"] = func()
+            except Exception as e:
+                call["error"] = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call["done"].set()
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"], not leader
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
+
+analysis_flight = SingleFlight()
+
+def analysis_request_key(image_path, prompt):
+    digest = hashlib.sha256(prompt.encode('utf-8'))
+    with open(image_path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def estimate_request_tokens(prompt, image_count=1):
+    return len(prompt) // 4 + IMAGE_TOKEN_COST * image_count
+
+def retry_after_seconds(response, default):
+    try:
+        return float(response.headers.get('Retry-After', default))
+    except (TypeError, ValueError):
+        return default
+
+class StreamingRequestBody:
+    # Serializes a generateContent request without holding the image or its base64 text in memory:
+    # the JSON envelope is emitted around base64 chunks read from a memory-mapped file.
+    CHUNK_BYTES = 3 * 64 * 1024
+
+    def __init__(self, parts, **fields):
+        self.images = []
+        placeholder_parts = []
+        for part in parts:
+            if isinstance(part, tuple):
+                path, mime_type = part
+                placeholder = f"@@image-{len(self.images)}@@"
+                self.images.append(path)
+                placeholder_parts.append({"inline_data": {"mime_type": mime_type, "data": placeholder}})
+            else:
+                placeholder_parts.append(part)
+        envelope = json.dumps({"contents": [{"parts": placeholder_parts}], **fields})
+        self.segments = []
+        for index in range(len(self.images)):
+            head, envelope = envelope.split(f'"@@image-{index}@@"', 1)
+            self.segments.append(head.encode('utf-8'))
+        self.segments.append(envelope.encode('utf-8'))
+        self.image_sizes = [os.path.getsize(path) for path in self.images]
+
+    def __len__(self):
+        encoded = sum(4 * ((size + 2) // 3) + 2 for size in self.image_sizes)
+        return sum(len(segment) for segment in self.segments) + encoded
+
+    def __iter__(self):
+        for index, path in enumerate(self.images):
+            yield self.segments[index]
+            yield b'"'
+            yield from self.iter_base64(path)
+            yield b'"'
+        yield self.segments[-1]
+
+    def iter_base64(self, path):
+        with open(path, "rb") as image_file:
+            if os.fstat(image_file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Chunks are a multiple of 3 bytes so only the final one carries padding
+                for offset in range(0, len(mapped), self.CHUNK_BYTES):
+                    yield base64.b64encode(mapped[offset:offset + self.CHUNK_BYTES])
+
+def post_generate_content(data, estimated_tokens, payload_bytes, max_retries=3, retry_delay=5,
+                          on_retry=None, on_quota_wait=None):
+    headers = {
+        'Content-Type': 'application/json'
+    }
+
+    attempt = 0
+    rate_limited = 0
+    while attempt < max_retries:
+        try:
+            quota_limiter.acquire(estimated_tokens, payload_bytes, on_wait=on_quota_wait)
+            with perf_metrics.span('api.generateContent'):
+                response = api_router.post(data, headers, payload_bytes, estimated_tokens)
+
+            if response.status_code == 200:
+                result = response.json()
+                quota_limiter.record_usage(estimated_tokens, result.get('usageMetadata'))
+                api_circuit.record_success()
+                return True, result
+            elif response.status_code == 429 and rate_limited < MAX_RATE_LIMIT_RETRIES:
+                # Quota exhausted upstream: hold the request in the limiter queue rather than failing it
+                rate_limited += 1
+                quota_limiter.defer(retry_after_seconds(response, retry_delay))
+                continue
+            elif response.status_code in (429, 503):
+                if attempt < max_retries - 1:
+                    if on_retry:
+                        on_retry(attempt + 1)
+                    time.sleep(retry_delay)
+            else:
+                return False, f"Error: {response.status_code} - {response.text}"
+        except requests.RequestException as e:
+            if attempt < max_retries - 1:
+                if on_retry:
+                    on_retry(attempt + 1)
+                time.sleep(retry_delay)
+            else:
+                api_circuit.record_failure()
+                return False, f"Network error: {str(e)}"
+        attempt += 1
+
+    api_circuit.record_failure()
+    return False, "The model is currently overloaded. Please try again later."
+
+def encoded_image_size(image_path):
+    return 4 * ((os.path.getsize(image_path) + 2) // 3)
+
+def plan_batches(image_paths, max_bytes=MAX_REQUEST_BYTES, max_images=MAX_BATCH_IMAGES):
+    batches = []
+    current = []
+    current_bytes = 0
+    for path in image_paths:
+        size = encoded_image_size(path) + BATCH_PART_OVERHEAD
+        if current and (current_bytes + size > max_bytes or len(current) >= max_images):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append(path)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+class LatencyHistogram:
+    def __init__(self, max_samples=512):
+        self.samples = deque(maxlen=max_samples)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def count(self):
+        return len(self.samples)
+
+    def percentile(self, q):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class ModelRouter:
+    def __init__(self, endpoints=None, hedging=True, max_workers=8):
+        self.endpoints = endpoints
+        self.hedging = hedging
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def current_endpoints(self):
+        return self.endpoints or [API_URL] + list(API_HEDGE_URLS)
+
+    def histogram(self, url):
+        with self.lock:
+            if url not in self.histograms:
+                self.histograms[url] = LatencyHistogram()
+            return self.histograms[url]
+
+    def ranked(self, endpoints):
+        # Endpoints without enough samples are ranked at the median p50 of the measured ones,
+        # so they sort between faster and slower endpoints and keep their configured order on ties
+        medians = {}
+        for url in endpoints:
+            histogram = self.histogram(url)
+            if histogram.count() >= HEDGE_MIN_SAMPLES:
+                medians[url] = histogram.percentile(0.50)
+        prior = statistics.median(medians.values()) if medians else 0.0
+        return sorted(endpoints, key=lambda url: (medians.get(url, prior), endpoints.index(url)))
+
+    def choose(self, payload_bytes):
+        endpoints = self.current_endpoints()
+        if payload_bytes <= SIMPLE_IMAGE_BYTES:
+            return self.ranked(endpoints)[0]
+        return endpoints[0]
+
+    def hedge_delay(self, url):
+        histogram = self.histogram(url)
+        if histogram.count() < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return histogram.percentile(0.95)
+
+    def send(self, url, data, headers, timeout):
+        start = time.perf_counter()
+        model = url.rsplit('/', 1)[-1].split(':')[0]
+        with perf_metrics.span(f'api.{model}'):
+            if isinstance(data, StreamingRequestBody):
+                response = requests.post(f'{url}?key={API_KEY}', headers=headers, data=data, timeout=timeout)
+            else:
+                response = requests.post(f'{url}?key={API_KEY}', headers=headers, json=data, timeout=timeout)
+        self.histogram(url).record(time.perf_counter() - start)
+        return response
+
+    def post(self, data, headers, payload_bytes, estimated_tokens, timeout=API_TIMEOUT):
+        primary = self.choose(payload_bytes)
+        alternates = [url for url in self.ranked(self.current_endpoints()) if url != primary]
+        first = self.executor.submit(self.send, primary, data, headers, timeout)
+        if not self.hedging or not alternates:
+            return first.result()
+        try:
+            return first.result(timeout=self.hedge_delay(primary))
+        except concurrent.futures.TimeoutError:
+            pass
+        # The primary is slower than its observed p95: race a duplicate against it if quota allows
+        if not quota_limiter.try_acquire(estimated_tokens, payload_bytes):
+            return first.result()
+        with self.lock:
+            self.hedges_sent += 1
+        second = self.executor.submit(self.send, alternates[0], data, headers, timeout)
+        pending = {first, second}
+        failure = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    failure = e
+                    continue
+                if response.status_code == 200 or not pending:
+                    if future is second:
+                        with self.lock:
+                            self.hedges_won += 1
+                    return response
+                failure = response
+        if isinstance(failure, Exception):
+            raise failure
+        return failure
+
+    def snapshot(self):
+        with self.lock:
+            urls = list(self.histograms)
+            stats = {"hedges_sent": self.hedges_sent, "hedges_won": self.hedges_won}
+        for url in urls:
+            histogram = self.histogram(url)
+            stats[url] = {"count": histogram.count(), "p50": histogram.percentile(0.50), "p95": histogram.percentile(0.95)}
+        return stats
+
+api_router = ModelRouter()
+
+class AnalysisThread(QThread):
+    analysis_complete = pyqtSignal(str)
+    analysis_error = pyqtSignal(str)
+    retry_attempt = pyqtSignal(int)
+    quota_wait = pyqtSignal(float)
+
+    def __init__(self, image_path, max_retries=3, retry_delay=5):
+        QThread.__init__(self)
+        self.image_path = image_path
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    @perf_metrics.timed()
+    def run(self):
+        if api_circuit.is_open():
+            self.analysis_error.emit("Remote analysis is temporarily unavailable after repeated failures.")
+            return
+
+        key = analysis_request_key(self.image_path, ANALYSIS_PROMPT)
+        (succeeded, message), shared = analysis_flight.do(key, self.request_analysis)
+        if succeeded:
+            self.analysis_complete.emit(message)
+        else:
+            self.analysis_error.emit(message)
+
+    def request_analysis(self):
+        prompt = ANALYSIS_PROMPT
+        data = StreamingRequestBody([{"text": prompt}, (self.image_path, "image/jpeg")])
+
+        estimated_tokens = estimate_request_tokens(prompt)
+        payload_bytes = len(data)
+
+        succeeded, result = post_generate_content(data, estimated_tokens, payload_bytes, self.max_retries,
+                                                  self.retry_delay, self.retry_attempt.emit, self.quota_wait.emit)
+        if not succeeded:
+            return False, result
+        return True, result['candidates'][0]['content']['parts'][0]['text']
+
+class BatchAnalysisThread(QThread):
+    batch_result = pyqtSignal(str, str, object)
+    batch_error = pyqtSignal(str)
+    batch_progress = pyqtSignal(int, int)
+    retry_attempt = pyqtSignal(int)
+    quota_wait = pyqtSignal(float)
+
+    def __init__(self, image_paths, max_retries=3, retry_delay=5):
+        QThread.__init__(self)
+        self.image_paths = list(image_paths)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.completed = 0
+
+    @perf_metrics.timed()
+    def run(self):
+        if api_circuit.is_open():
+            self.batch_error.emit("Remote analysis is temporarily unavailable after repeated failures.")
+            return
+        pending = plan_batches(self.image_paths)
+        while pending:
+            batch = pending.pop(0)
+            succeeded, result = self.request_batch(batch)
+            if not succeeded and result == 413 and len(batch) > 1:
+                # The server disagreed with our size estimate: split and try the halves
+                middle = len(batch) // 2
+                pending[:0] = [batch[:middle], batch[middle:]]
+                continue
+            if not succeeded:
+                self.batch_error.emit(result if isinstance(result, str) else f"Error: {result}")
+                return
+            self.emit_results(batch, result)
+
+    def request_batch(self, batch):
+        prompt = BATCH_PROMPT.format(count=len(batch))
+        parts = [{"text": prompt}]
+        for index, path in enumerate(batch, start=1):
+            parts.append({"text": f"Image {index}:"})
+            parts.append((path, "image/jpeg"))
+        data = StreamingRequestBody(parts, generationConfig={
+            "responseMimeType": "application/json",
+            "responseSchema": BATCH_RESPONSE_SCHEMA
+        })
+        succeeded, result = post_generate_content(data, estimate_request_tokens(prompt, len(batch)), len(data),
+                                                  self.max_retries, self.retry_delay,
+                                                  self.retry_attempt.emit, self.quota_wait.emit)
+        if not succeeded and result.startswith("Error: 413"):
+            return False, 413
+        return succeeded, result
+
+    def emit_results(self, batch, result):
+        text = result['candidates'][0]['content']['parts'][0]['text']
+        try:
+            entries = json.loads(text)
+            analyses = {int(entry["image_index"]): entry["analysis"] for entry in entries}
+        except (ValueError, TypeError, KeyError):
+            analyses = {1: text} if len(batch) == 1 else {}
+        from PyQt6.QtGui import QImage
+        for index, path in enumerate(batch, start=1):
+            image = QImage(path)
+            image_hash = None if image.isNull() else image_dhash(image)
+            self.batch_result.emit(path, analyses.get(index, "No analysis was returned for this image."), image_hash)
+            self.completed += 1
+            self.batch_progress.emit(self.completed, len(self.image_paths))
+
+class LocalAnalysisThread(QThread):
+    estimate_ready = pyqtSignal(str, str)
+
+    def __init__(self, image_paths, batch_size=LOCAL_BATCH_SIZE):
+        QThread.__init__(self)
+        self.image_paths = list(image_paths)
+        self.batch_size = batch_size
+
+    @perf_metrics.timed()
+    def run(self):
+        for start in range(0, len(self.image_paths), self.batch_size):
+            batch = self.image_paths[start:start + self.batch_size]
+            try:
+                predictions = local_classifier.classify_batch(batch)
+            except (ValueError, RuntimeError) as e:
+                for path in batch:
+                    self.estimate_ready.emit(path, f"Offline estimate failed: {str(e)}")
+                continue
+            for path, prediction in zip(batch, predictions):
+                self.estimate_ready.emit(path, format_local_estimate(prediction))
+
+class MealPlanPrefetchThread(QThread):
+    # The meal plans file is decoded once and split by month; later prefetches reuse the split until the
+    # file changes. Decoding holds the GIL for the whole file, which would stall the GUI thread on every page.
+    plans_loaded = pyqtSignal(list, dict)
+    cache_lock = threading.Lock()
+    cache = (None, {})
+
+    def __init__(self, months):
+        QThread.__init__(self)
+        self.months = months
+
+    @classmethod
+    def plans_by_month(cls):
+        stamp = None
+        for path in (data_store.snapshot_path("meal_plans"), data_store.legacy_path("meal_plans")):
+            if os.path.exists(path):
+                info = os.stat(path)
+                stamp = (path, info.st_ino, info.st_size, info.st_mtime_ns)
+                break
+        with cls.cache_lock:
+            if stamp is None or stamp != cls.cache[0]:
+                by_month = {}
+                for date, plan in data_store.load("meal_plans", {}).items():
+                    by_month.setdefault((int(date[:4]), int(date[5:7])), {})[date] = plan
+                cls.cache = (stamp, by_month)
+            return cls.cache[1]
+
+    @perf_metrics.timed()
+    def run(self):
+        by_month = self.plans_by_month()
+        self.plans_loaded.emit(self.months, {date: plan for month in self.months
+                                             for date, plan in by_month.get(tuple(month), {}).items()})
+
+class SearchIndexThread(QThread):
+    # Rebuilds the search index a batch at a time, so a search or a new analysis on the GUI thread only
+    # ever waits for the batch being written
+    index_built = pyqtSignal(int)
+    index_error = pyqtSignal(str)
+
+    def __init__(self, index, history):
+        QThread.__init__(self)
+        self.index = index
+        self.history = history
+
+    @perf_metrics.timed('SearchIndexThread.run')
+    def run(self):
+        try:
+            meal_plans = data_store.load("meal_plans", {})
+            documents = itertools.chain(self.history.documents(),
+                                        (meal_plan_document(date, plan) for date, plan in meal_plans.items()))
+            count = 0
+            for batch in iter(lambda: list(itertools.islice(documents, SEARCH_INDEX_BATCH)), []):
+                self.index.update_many(batch)
+                count += len(batch)
+        except Exception as e:
+            self.index_error.emit(str(e))
+            return
+        self.index_built.emit(count)
+
+class BackupThread(QThread):
+    backup_complete = pyqtSignal(str, object)
+    backup_error = pyqtSignal(str)
+
+    def __init__(self, manager):
+        QThread.__init__(self)
+        self.manager = manager
+
+    def run(self):
+        try:
+            snapshot, stats = self.manager.backup()
+        except Exception as e:
+            # Network, permission and S3 errors all end the same way: report and retry on the next run
+            self.backup_error.emit(str(e))
+            return
+        self.backup_complete.emit(snapshot, stats)
 
-    def __init__(self, image_path, max_retries=3, retry_delay=5):
+class ReportThread(QThread):
+    period_ready = pyqtSignal(object)
+    period_failed = pyqtSignal(str, str)
+    report_error = pyqtSignal(str)
+
+    def __init__(self, periods, water, weight, history):
         QThread.__init__(self)
-        self.image_path = image_path
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
+        self.periods = periods
+        self.water = water
+        self.weight = weight
+        self.history = history
 
+    @perf_metrics.timed('ReportThread.run')
     def run(self):
-        prompt = "Analyze this image of a meal or exercise routine and provide personalized health advice, dietary suggestions, or fitness plans based on what you see. Include estimated calorie count for meals and suggested duration for exercises."
-        
-        headers = {
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            "contents": [{
-                "parts": [
-                    {"text": prompt},
-                    {"inline_data": {
-                        "mime_type": "image/jpeg",
-                        "data": self.encode_image(self.image_path)
-                    }}
-                ]
-            }]
-        }
+        try:
+            exercise = ExerciseColumns.from_dict(data_store.load("exercise_data", {}))
+            sleep = SleepColumns.from_dict(data_store.load("sleep_data", {}))
+            meal_plans = data_store.load("meal_plans", {})
+        except Exception as e:
+            self.report_error.emit(str(e))
+            return
+        engine = CalorieEngine(self.weight)
+        # Build the lazily computed indexes once, before the pool threads share the tables
+        engine.table_burns(exercise)
+        sleep.build_index()
+        nutrition_db.load()
+        workers = min(len(self.periods), os.cpu_count() or 2)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") as pool:
+            futures = {pool.submit(period_statistics, period, exercise, sleep, self.water, engine, self.history,
+                                   meal_plans): period
+                       for period in self.periods}
+            for future in concurrent.futures.as_completed(futures):
+                # Every period is reported, one way or the other, so the window's pending count reaches zero
+                try:
+                    self.period_ready.emit(future.result())
+                except Exception as e:
+                    _, label, _, _ = futures[future]
+                    self.period_failed.emit(label, str(e))
 
-        for attempt in range(self.max_retries):
+def neighbouring_months(year, month):
+    months = []
+    for offset in (-1, 0, 1):
+        index = year * 12 + (month - 1) + offset
+        months.append((index // 12, index % 12 + 1))
+    return months
+
+class StartupLoader(QObject):
+    dataset_loaded = pyqtSignal(str, object)
+
+    def __init__(self, tasks, max_workers=4):
+        super().__init__()
+        self.tasks = tasks
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+
+    def start(self):
+        for name, task in self.tasks.items():
+            future = self.executor.submit(self.run_task, name, task)
+            # Emitted from the worker; Qt queues delivery onto the GUI thread
+            future.add_done_callback(lambda done, name=name: self.dataset_loaded.emit(name, done.result()))
+        self.executor.shutdown(wait=False)
+
+    def run_task(self, name, task):
+        with perf_metrics.span(f'startup.load.{name}'):
             try:
-                response = requests.post(f'{API_URL}?key={API_KEY}', headers=headers, json=data, timeout=30)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    generated_text = result['candidates'][0]['content']['parts'][0]['text']
-                    self.analysis_complete.emit(generated_text)
-                    return
-                elif response.status_code == 503:
-                    if attempt < self.max_retries - 1:
-                        self.retry_attempt.emit(attempt + 1)
-                        time.sleep(self.retry_delay)
-                    else:
-                        self.analysis_error.emit("The model is currently overloaded. Please try again later.")
-                else:
-                    self.analysis_error.emit(f"Error: {response.status_code} - {response.text}")
-                    return
-            except requests.RequestException as e:
-                if attempt < self.max_retries - 1:
-                    self.retry_attempt.emit(attempt + 1)
-                    time.sleep(self.retry_delay)
-                else:
-                    self.analysis_error.emit(f"Network error: {str(e)}")
-                    return
-
-    def encode_image(self, image_path):
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+                return task()
+            except Exception as e:
+                # Any failure (corrupt sqlite, overflowing column, malformed row) must still be reported,
+                # otherwise the dataset is never delivered and startup never finishes
+                return e
+
+class RecurrenceRule:
+    FREQUENCIES = {'MINUTELY': 60, 'HOURLY': 3600, 'DAILY': None, 'WEEKLY': None}
+    WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+    def __init__(self, text):
+        self.text = text
+        fields = dict(part.split('=', 1) for part in text.upper().split(';') if part)
+        self.freq = fields.get('FREQ')
+        if self.freq not in self.FREQUENCIES:
+            raise ValueError(f"Unsupported recurrence rule '{text}'")
+        self.interval = int(fields.get('INTERVAL', 1))
+        if self.interval < 1:
+            raise ValueError(f"Invalid INTERVAL in '{text}'")
+        self.by_day = [self.WEEKDAYS.index(day) for day in fields['BYDAY'].split(',')] if 'BYDAY' in fields else None
+        self.by_hour = sorted(int(hour) for hour in fields['BYHOUR'].split(',')) if 'BYHOUR' in fields else None
+        self.by_minute = sorted(int(minute) for minute in fields['BYMINUTE'].split(',')) if 'BYMINUTE' in fields else None
+        self.count = int(fields['COUNT']) if 'COUNT' in fields else None
+        self.until = datetime.strptime(fields['UNTIL'], '%Y%m%dT%H%M%S') if 'UNTIL' in fields else None
+
+    def matches(self, moment):
+        return ((self.by_day is None or moment.weekday() in self.by_day)
+                and (self.by_hour is None or moment.hour in self.by_hour)
+                and (self.by_minute is None or moment.minute in self.by_minute))
+
+    def after(self, start, moment):
+        # First occurrence of the series anchored at `start` strictly after `moment`, or None once it ends
+        occurrence = self.next_occurrence(start.replace(second=0, microsecond=0), moment)
+        if occurrence is None or (self.until is not None and occurrence > self.until):
+            return None
+        return occurrence
+
+    def next_occurrence(self, start, moment):
+        step = self.FREQUENCIES[self.freq]
+        if step is not None:
+            step *= self.interval
+            elapsed = (moment - start).total_seconds()
+            candidate = start if elapsed < 0 else start + timedelta(seconds=(elapsed // step + 1) * step)
+            for _ in range(7 * 24 * 60):
+                if self.matches(candidate):
+                    return candidate
+                candidate += timedelta(seconds=step)
+            return None
+        times = [(hour, minute) for hour in (self.by_hour or [start.hour]) for minute in (self.by_minute or [start.minute])]
+        weekdays = self.by_day if self.by_day is not None else (None if self.freq == 'DAILY' else [start.weekday()])
+        day = max(start.date(), moment.date())
+        week_zero = start.date() - timedelta(days=start.weekday())
+        for _ in range(7 * self.interval + 7):
+            if self.freq == 'DAILY':
+                in_period = (day - start.date()).days % self.interval == 0
+            else:
+                in_period = ((day - week_zero).days // 7) % self.interval == 0
+            if in_period and (weekdays is None or day.weekday() in weekdays):
+                for hour, minute in times:
+                    candidate = datetime(day.year, day.month, day.day, hour, minute)
+                    if candidate > moment and candidate >= start:
+                        return candidate
+            day += timedelta(days=1)
+        return None
+
+class Reminder:
+    __slots__ = ('id', 'title', 'message', 'rule', 'start', 'enabled', 'fired', 'due', 'token')
+
+    def __init__(self, id, title, message, rule, start=None, enabled=True, fired=0):
+        self.id = id
+        self.title = title
+        self.message = message
+        self.rule = rule if isinstance(rule, RecurrenceRule) else RecurrenceRule(rule)
+        self.start = start or datetime.now().replace(second=0, microsecond=0)
+        self.enabled = enabled
+        self.fired = fired
+        self.due = None
+        self.token = None
+
+    @classmethod
+    def from_dict(cls, data):
+        start = datetime.fromisoformat(data["start"]) if data.get("start") else None
+        return cls(data["id"], data["title"], data["message"], data["rule"], start,
+                   data.get("enabled", True), data.get("fired", 0))
+
+    def to_dict(self):
+        return {"id": self.id, "title": self.title, "message": self.message, "rule": self.rule.text,
+                "start": self.start.isoformat(), "enabled": self.enabled, "fired": self.fired}
+
+class SystemClock:
+    realtime = True
+
+    def now(self):
+        return datetime.now()
+
+class VirtualClock:
+    # Headless stand-in for SystemClock: time only moves when advance() is called
+    realtime = False
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+        return self.current
+
+class ReminderScheduler(QObject):
+    # All reminders share one min-heap of (due timestamp, token) and a single-shot QTimer armed for the
+    # earliest entry. Rescheduling or removing a reminder leaves its old entry behind; it is skipped
+    # when popped because the token no longer matches, and the heap is compacted once stale entries dominate.
+    reminder_due = pyqtSignal(object)
+    # Re-check at least this often so suspend/resume and wall-clock changes cannot strand the timer
+    MAX_TIMER_SECONDS = 60
+
+    def __init__(self, clock=None, parent=None):
+        super().__init__(parent)
+        self.clock = clock or SystemClock()
+        self.reminders = {}
+        self.heap = []
+        self.stale = 0
+        self.tokens = itertools.count()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run_pending)
+
+    def add(self, reminder):
+        if reminder.id in self.reminders:
+            self.remove(reminder.id)
+        self.reminders[reminder.id] = reminder
+        self.schedule(reminder, self.clock.now())
+        self.arm()
+        return reminder
+
+    def remove(self, reminder_id):
+        reminder = self.reminders.pop(reminder_id, None)
+        if reminder is not None and reminder.token is not None:
+            self.stale += 1
+        return reminder
+
+    def set_enabled(self, reminder_id, enabled):
+        reminder = self.reminders[reminder_id]
+        reminder.enabled = enabled
+        self.add(reminder)
+
+    def schedule(self, reminder, moment):
+        reminder.due = None
+        reminder.token = None
+        if not reminder.enabled or (reminder.rule.count is not None and reminder.fired >= reminder.rule.count):
+            return
+        due = reminder.rule.after(reminder.start, moment)
+        if due is not None:
+            reminder.due = due
+            reminder.token = next(self.tokens)
+            heapq.heappush(self.heap, (due.timestamp(), reminder.token, reminder.id))
+
+    def run_pending(self):
+        now = self.clock.now()
+        cutoff = now.timestamp()
+        fired = []
+        while self.heap and self.heap[0][0] <= cutoff:
+            _, token, reminder_id = heapq.heappop(self.heap)
+            reminder = self.reminders.get(reminder_id)
+            if reminder is None or reminder.token != token:
+                self.stale = max(0, self.stale - 1)
+                continue
+            reminder.fired += 1
+            fired.append(reminder)
+            # Occurrences missed while the app was closed or asleep collapse into this one notification
+            self.schedule(reminder, max(reminder.due, now))
+        for reminder in fired:
+            self.reminder_due.emit(reminder)
+        if self.stale > len(self.reminders):
+            self.heap = [entry for entry in self.heap
+                         if entry[2] in self.reminders and self.reminders[entry[2]].token == entry[1]]
+            heapq.heapify(self.heap)
+            self.stale = 0
+        self.arm()
+        return fired
+
+    def next_due(self):
+        while self.heap:
+            _, token, reminder_id = self.heap[0]
+            reminder = self.reminders.get(reminder_id)
+            if reminder is not None and reminder.token == token:
+                return reminder
+            heapq.heappop(self.heap)
+            self.stale = max(0, self.stale - 1)
+        return None
+
+    def arm(self):
+        reminder = self.next_due()
+        if reminder is None or not self.clock.realtime:
+            self.timer.stop()
+            return
+        delay = (reminder.due - self.clock.now()).total_seconds()
+        self.timer.start(int(max(0.0, min(delay, self.MAX_TIMER_SECONDS)) * 1000))
+
+class DiagnosticsDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Performance Diagnostics')
+        self.resize(700, 400)
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(['Operation', 'Count', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Max (ms)'])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        prometheus_button = QPushButton('Export Prometheus')
+        prometheus_button.clicked.connect(self.export_prometheus)
+        button_layout.addWidget(prometheus_button)
+        trace_button = QPushButton('Export Chrome Trace')
+        trace_button.clicked.connect(self.export_chrome_trace)
+        button_layout.addWidget(trace_button)
+        self.profiler_button = QPushButton('Start Profiler')
+        self.profiler_button.clicked.connect(self.toggle_profiler)
+        button_layout.addWidget(self.profiler_button)
+        layout.addLayout(button_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def toggle_profiler(self):
+        self.parent().toggle_profiler()
+        self.refresh()
+
+    def refresh(self):
+        self.profiler_button.setText('Stop Profiler' if sampling_profiler.running else 'Start Profiler')
+        rows = perf_metrics.summary()
+        self.table.setRowCount(len(rows))
+        for row, stats in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(stats['operation']))
+            self.table.setItem(row, 1, QTableWidgetItem(str(stats['count'])))
+            for column, key in enumerate(['p50', 'p95', 'p99', 'max'], start=2):
+                self.table.setItem(row, column, QTableWidgetItem(f"{stats[key] * 1000:.2f}"))
+
+    def export_prometheus(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Metrics', 'metrics.prom', 'Prometheus Text (*.prom *.txt)')
+        if path:
+            with open(path, 'w') as file:
+                file.write(perf_metrics.export_prometheus())
+
+    def export_chrome_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Trace', 'trace.json', 'Chrome Trace (*.json)')
+        if path:
+            perf_metrics.export_chrome_trace(path)
 
 class HealthAssistant(QMainWindow):
     def __init__(self):
         super().__init__()
         self.initUI()
-        self.history = []
-        self.load_user_data()
+        self.history = HistoryStore()
+        self.history_model = HistoryListModel(self.history, self)
+        self.history_list.setModel(self.history_model)
+        self.history_images = LRUCache(HISTORY_IMAGE_CACHE_SIZE)
+        self.image_path = None
+        self.local_estimates = {}
+        self.local_threads = []
+        self.image_hashes = {}
+        self.image_index = BKTree()
+        self.search_index = SearchIndex()
+        self.search_thread = None
+        self.exercise_table = None
+        self.sleep_table = None
+        self.water_log = None
+        self.calories_eaten = 0
+        self.calorie_engine = CalorieEngine(self.weight_input.value())
+        self.weight_input.valueChanged.connect(self.on_weight_changed)
+        self.tray_icon = None
+        self.reminder_scheduler = ReminderScheduler(parent=self)
+        self.reminder_scheduler.reminder_due.connect(self.on_reminder_due)
+        self.report_thread = None
+        self.report_renderer = None
+        self.reports_pending = 0
+        self.backup_manager = None
+        self.backup_thread = None
+        self.job_scheduler = ReminderScheduler(parent=self)
+        self.job_scheduler.reminder_due.connect(self.run_scheduled_job)
+        self.job_scheduler.add(Reminder("backup", "Backup", "", BACKUP_RULE, datetime.now() + timedelta(minutes=1)))
+        self.time_to_interactive = None
+        self.prefetch_meal_plans(self.meal_calendar.yearShown(), self.meal_calendar.monthShown())
+        self.start_hydration()
 
+    def start_hydration(self):
+        # The window is usable immediately; each tab fills in as its data arrives from the worker pool
+        today = QDate.currentDate().toString("yyyy-MM-dd")
+        self.startup_loader = StartupLoader({
+            "profile": lambda: data_store.load("user_data", None),
+            "history": self.load_history_hashes,
+            "exercise": self.load_exercise_table,
+            "sleep": self.load_sleep_table,
+            "water": lambda: WaterLog().load(),
+            "calories": lambda: nutrition_db.day_totals(self.load_meal_plan(today)),
+            "reminders": lambda: [Reminder.from_dict(data) for data in data_store.load("reminders", DEFAULT_REMINDERS)],
+        })
+        self.pending_datasets = set(self.startup_loader.tasks)
+        self.startup_loader.dataset_loaded.connect(self.on_dataset_loaded)
+        self.statusBar().showMessage("Loading your data...")
+        self.startup_loader.start()
+
+    @perf_metrics.timed()
+    def on_dataset_loaded(self, name, data):
+        self.pending_datasets.discard(name)
+        if isinstance(data, Exception):
+            self.statusBar().showMessage(f"Could not load {name}: {data}", 10000)
+        elif name == "profile":
+            if data is not None:
+                self.apply_user_data(data)
+        elif name == "history":
+            self.apply_history(data)
+            if self.search_index.is_empty():
+                self.rebuild_search_index()
+        elif name == "exercise":
+            # Keep a table that was already loaded synchronously by an early log_exercise
+            if self.exercise_table is None:
+                self.exercise_table = data
+            self.update_exercise_history()
+            self.show_dashboard_calories()
+        elif name == "sleep":
+            if self.sleep_table is None:
+                self.sleep_table = data
+            self.update_sleep_history()
+            self.update_dashboard_sleep()
+        elif name == "water":
+            if self.water_log is None:
+                self.water_log = data
+            self.update_water_views()
+        elif name == "reminders":
+            self.apply_reminders(data)
+        elif name == "calories":
+            self.calories_eaten = data['calories']
+            self.show_dashboard_calories()
+        if not self.pending_datasets and self.time_to_interactive is None:
+            self.time_to_interactive = time.perf_counter() - PROCESS_START
+            perf_metrics.record('startup.time_to_interactive', PROCESS_START, self.time_to_interactive)
+            self.statusBar().showMessage(f"Ready in {self.time_to_interactive * 1000:.0f} ms", 5000)
+
+    @perf_metrics.timed()
     def initUI(self):
         self.setWindowTitle('AI Health Assistant')
         self.setGeometry(100, 100, 1200, 800)
@@ -116,7 +3006,7 @@ class HealthAssistant(QMainWindow):
         left_layout = QVBoxLayout(left_panel)
         
         self.nav_buttons = []
-        for nav_item in ['Dashboard', 'Image Analysis', 'Meal Planner', 'Exercise Tracker', 'Water Tracker', 'Sleep Tracker', 'Profile']:
+        for nav_item in ['Dashboard', 'Image Analysis', 'Meal Planner', 'Exercise Tracker', 'Water Tracker', 'Sleep Tracker', 'Search', 'Profile']:
             btn = QPushButton(nav_item)
             btn.setStyleSheet("""
                 QPushButton {
@@ -148,14 +3038,42 @@ class HealthAssistant(QMainWindow):
         self.init_exercise_tracker_tab()
         self.init_water_tracker_tab()
         self.init_sleep_tracker_tab()
+        self.init_search_tab()
         self.init_profile_tab()
 
         # Add panels to main layout
         main_layout.addWidget(left_panel, 1)
         main_layout.addWidget(self.content_tabs, 4)
 
+        self.diagnostics_dialog = None
+        self.diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.diagnostics_shortcut.activated.connect(self.toggle_diagnostics)
+        self.profiler_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self.profiler_shortcut.activated.connect(self.toggle_profiler)
+
         self.switch_tab('Dashboard')
 
+    def toggle_diagnostics(self):
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self)
+        self.diagnostics_dialog.setVisible(not self.diagnostics_dialog.isVisible())
+
+    def toggle_profiler(self):
+        if not sampling_profiler.running:
+            sampling_profiler.start()
+            self.statusBar().showMessage("Profiling... press Ctrl+Shift+P again to stop and save.")
+            return
+        sampling_profiler.stop()
+        os.makedirs(PROFILES_DIRECTORY, exist_ok=True)
+        path = os.path.join(PROFILES_DIRECTORY, f"profile-{datetime.now():%Y%m%d-%H%M%S}.speedscope.json")
+        try:
+            sampling_profiler.export_speedscope(path)
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not save profile: {e}", 10000)
+            return
+        self.statusBar().showMessage(f"Profile saved to {path} (open it at https://www.speedscope.app)", 10000)
+
+    @perf_metrics.timed()
     def switch_tab(self, tab_name):
         self.content_tabs.setCurrentIndex(self.content_tabs.indexOf(self.content_tabs.findChild(QWidget, tab_name)))
         for btn in self.nav_buttons:
@@ -200,10 +3118,10 @@ class HealthAssistant(QMainWindow):
         summary_widget = QWidget()
         summary_layout = QHBoxLayout(summary_widget)
         
-        calories_label = QLabel("Today's Calories: 1800 / 2000")
+        self.calories_label = calories_label = QLabel(f"Today's Calories: 0 / {DAILY_CALORIE_TARGET}")
         steps_label = QLabel("Steps: 8000 / 10000")
-        water_label = QLabel("Water: 6 / 8 glasses")
-        sleep_label = QLabel("Sleep: 7h 30m")
+        self.water_summary_label = water_label = QLabel("Water: --")
+        self.sleep_summary_label = sleep_label = QLabel("Sleep: --")
         
         for label in [calories_label, steps_label, water_label, sleep_label]:
             label.setStyleSheet("""
@@ -220,8 +3138,32 @@ class HealthAssistant(QMainWindow):
         
         layout.addWidget(summary_widget)
 
+        report_layout = QHBoxLayout()
+        report_layout.addWidget(QLabel("Reports:"))
+        self.report_format = QComboBox()
+        self.report_format.addItems(["HTML", "PDF"])
+        report_layout.addWidget(self.report_format)
+        for text, kind, count in [("This Week", "weekly", 1), ("This Month", "monthly", 1),
+                                  ("Last 12 Months", "monthly", 12)]:
+            report_button = QPushButton(text)
+            report_button.setStyleSheet("""
+                QPushButton {
+                    background-color: #3498DB;
+                    color: white;
+                    padding: 8px;
+                    border-radius: 5px;
+                }
+                QPushButton:hover {
+                    background-color: #2980B9;
+                }
+            """)
+            report_button.clicked.connect(lambda _, kind=kind, count=count: self.generate_reports(kind, count))
+            report_layout.addWidget(report_button)
+        layout.addLayout(report_layout)
+
         self.content_tabs.addTab(dashboard, "Dashboard")
 
+    @perf_metrics.timed()
     def create_weight_chart(self):
         series = QLineSeries()
         # Sample data - replace with actual user data
@@ -230,7 +3172,6 @@ class HealthAssistant(QMainWindow):
 
         chart = QChart()
         chart.addSeries(series)
-        chart.createDefaultAxes()
         chart.setTitle("Weight Trend")
         chart.setTitleBrush(QColor(0, 0, 0))  # Black color for title
         chart.setBackgroundBrush(QColor(255, 255, 255))  # White background
@@ -297,6 +3238,21 @@ class HealthAssistant(QMainWindow):
         self.analyze_button.setEnabled(False)
         button_layout.addWidget(self.analyze_button)
 
+        self.batch_button = QPushButton('Batch Analyze')
+        self.batch_button.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                padding: 10px;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        self.batch_button.clicked.connect(self.batch_analyze_images)
+        button_layout.addWidget(self.batch_button)
+
         layout.addLayout(button_layout)
 
         self.progress_bar = QProgressBar()
@@ -311,11 +3267,21 @@ class HealthAssistant(QMainWindow):
             }
         """)
         layout.addWidget(self.progress_bar)
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(self.advance_progress)
 
         self.status_label = QLabel()
         self.status_label.setStyleSheet("color: #3498DB;")
         layout.addWidget(self.status_label)
 
+        self.quota_label = QLabel()
+        self.quota_label.setStyleSheet("color: #7F8C8D;")
+        layout.addWidget(self.quota_label)
+        self.quota_timer = QTimer(self)
+        self.quota_timer.timeout.connect(self.update_quota_label)
+        self.quota_timer.start(1000)
+        self.update_quota_label()
+
         self.result_text = QTextEdit()
         self.result_text.setReadOnly(True)
         self.result_text.setFont(QFont("Arial", 12))
@@ -328,18 +3294,20 @@ class HealthAssistant(QMainWindow):
         layout.addWidget(QLabel("Analysis Results:"))
         layout.addWidget(self.result_text)
 
-        self.history_list = QListWidget()
+        # The model is attached in __init__ once the history store is open
+        self.history_list = QListView()
+        self.history_list.setUniformItemSizes(True)
         self.history_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #ECF0F1;
                 color: #2C3E50;
                 border-radius: 5px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #3498DB;
             }
         """)
-        self.history_list.itemClicked.connect(self.load_history_item)
+        self.history_list.clicked.connect(lambda index: self.load_history_item(index.row()))
         layout.addWidget(QLabel("Analysis History:"))
         layout.addWidget(self.history_list)
 
@@ -379,10 +3347,20 @@ class HealthAssistant(QMainWindow):
             }
         """)
         self.meal_calendar.selectionChanged.connect(self.update_meal_plan)
+        self.meal_calendar.currentPageChanged.connect(self.prefetch_meal_plans)
+        self.meal_plan_cache = {}
+        self.meal_plan_months = set()
+        self.meal_plan_dates = set()
+        self.meal_prefetch_threads = []
+        self.planned_day_format = QTextCharFormat()
+        self.planned_day_format.setFontWeight(QFont.Weight.Bold)
+        self.planned_day_format.setForeground(QColor("#27AE60"))
         layout.addWidget(self.meal_calendar)
 
         # Meal inputs
         self.meal_inputs = {}
+        nutrition_db.load()
+        self.meal_completer_model = QStringListModel(nutrition_db.names, self)
         for meal in ['Breakfast', 'Lunch', 'Dinner', 'Snacks']:
             meal_layout = QHBoxLayout()
             meal_layout.addWidget(QLabel(f"{meal}:"))
@@ -396,10 +3374,19 @@ class HealthAssistant(QMainWindow):
                     padding: 5px;
                 }
             """)
+            completer = MealCompleter(self.meal_completer_model, meal_input)
+            completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+            completer.setModelSorting(QCompleter.ModelSorting.CaseInsensitivelySortedModel)
+            meal_input.setCompleter(completer)
+            meal_input.textChanged.connect(self.update_meal_totals)
             self.meal_inputs[meal] = meal_input
             meal_layout.addWidget(meal_input)
             layout.addLayout(meal_layout)
 
+        self.meal_totals_label = QLabel()
+        self.meal_totals_label.setStyleSheet("color: #2C3E50; font-size: 14px;")
+        layout.addWidget(self.meal_totals_label)
+
         # Save button
         save_button = QPushButton("Save Meal Plan")
         save_button.setStyleSheet("""
@@ -440,7 +3427,7 @@ class HealthAssistant(QMainWindow):
         # Exercise inputs
         form_layout = QFormLayout()
         self.exercise_type = QComboBox()
-        self.exercise_type.addItems(['Running', 'Cycling', 'Swimming', 'Weight Training', 'Yoga'])
+        self.exercise_type.addItems(EXERCISE_TYPES)
         self.exercise_type.setStyleSheet("""
             QComboBox {
                 background-color: #ECF0F1;
@@ -475,7 +3462,7 @@ class HealthAssistant(QMainWindow):
         form_layout.addRow("Duration:", self.exercise_duration)
 
         self.exercise_intensity = QComboBox()
-        self.exercise_intensity.addItems(['Low', 'Medium', 'High'])
+        self.exercise_intensity.addItems(EXERCISE_INTENSITIES)
         self.exercise_intensity.setStyleSheet("""
             QComboBox {
                 background-color: #ECF0F1;
@@ -514,17 +3501,20 @@ class HealthAssistant(QMainWindow):
         layout.addWidget(save_button)
 
         # Exercise history
-        self.exercise_history = QListWidget()
+        self.exercise_history = QListView()
+        self.exercise_history.setUniformItemSizes(True)
         self.exercise_history.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #ECF0F1;
                 color: #2C3E50;
                 border-radius: 5px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #3498DB;
             }
         """)
+        self.exercise_history_model = TrackerListModel(self.exercise_history_label, self)
+        self.exercise_history.setModel(self.exercise_history_model)
         layout.addWidget(QLabel("Exercise History:"))
         layout.addWidget(self.exercise_history)
 
@@ -540,6 +3530,7 @@ class HealthAssistant(QMainWindow):
         goal_layout.addWidget(QLabel("Daily Water Goal:"))
         self.water_goal = QSpinBox()
         self.water_goal.setRange(1, 20)
+        self.water_goal.setValue(DEFAULT_WATER_GOAL)
         self.water_goal.setSuffix(" glasses")
         self.water_goal.setStyleSheet("""
             QSpinBox {
@@ -594,7 +3585,64 @@ class HealthAssistant(QMainWindow):
             }
         """)
         save_button.clicked.connect(self.save_water_intake)
-        layout.addWidget(save_button)
+
+        add_glass_button = QPushButton("Add Glass")
+        add_glass_button.setStyleSheet("""
+            QPushButton {
+                background-color: #3498DB;
+                color: white;
+                padding: 10px;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #2980B9;
+            }
+        """)
+        add_glass_button.clicked.connect(self.add_water_glass)
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(add_glass_button)
+        button_layout.addWidget(save_button)
+        layout.addLayout(button_layout)
+
+        # Monthly history, paged from the daily rollups
+        month_layout = QHBoxLayout()
+        previous_button = QPushButton("<")
+        previous_button.clicked.connect(lambda: self.page_water_chart(-1))
+        next_button = QPushButton(">")
+        next_button.clicked.connect(lambda: self.page_water_chart(1))
+        self.water_month_label = QLabel()
+        self.water_month_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        month_layout.addWidget(previous_button)
+        month_layout.addWidget(self.water_month_label, 1)
+        month_layout.addWidget(next_button)
+        layout.addLayout(month_layout)
+
+        # The chart is built once; paging only replaces the series data, which is far cheaper than a new QChart
+        self.water_month = QDate.currentDate()
+        self.water_bars = QBarSet("Glasses")
+        water_series = QBarSeries()
+        water_series.append(self.water_bars)
+        self.water_goal_line = QLineSeries()
+        self.water_goal_line.setName("Goal")
+        self.water_days_axis = QBarCategoryAxis()
+        self.water_glasses_axis = QValueAxis()
+        self.water_glasses_axis.setTitleText("Glasses")
+        chart = QChart()
+        chart.addSeries(water_series)
+        chart.addSeries(self.water_goal_line)
+        chart.setBackgroundBrush(QColor(255, 255, 255))
+        chart.addAxis(self.water_days_axis, Qt.AlignmentFlag.AlignBottom)
+        chart.addAxis(self.water_glasses_axis, Qt.AlignmentFlag.AlignLeft)
+        for chart_series in (water_series, self.water_goal_line):
+            chart_series.attachAxis(self.water_days_axis)
+            chart_series.attachAxis(self.water_glasses_axis)
+        # The first range change lays out the axis labels; do it here rather than when the water log arrives
+        self.water_glasses_axis.setRange(0, DEFAULT_WATER_GOAL + 1)
+        self.water_chart = QChartView(chart)
+        self.water_chart.setRenderHint(QPainter.RenderHint.Antialiasing)
+        layout.addWidget(self.water_chart)
+        self.water_chart_stale = False
+        self.content_tabs.currentChanged.connect(self.refresh_water_chart)
 
         self.content_tabs.addTab(water_tracker, "Water Tracker")
 
@@ -649,7 +3697,7 @@ class HealthAssistant(QMainWindow):
         quality_layout = QHBoxLayout()
         quality_layout.addWidget(QLabel("Sleep Quality:"))
         self.sleep_quality = QComboBox()
-        self.sleep_quality.addItems(['Poor', 'Fair', 'Good', 'Excellent'])
+        self.sleep_quality.addItems(SLEEP_QUALITIES)
         self.sleep_quality.setStyleSheet("""
             QComboBox {
                 background-color: #ECF0F1;
@@ -687,22 +3735,70 @@ class HealthAssistant(QMainWindow):
         layout.addWidget(save_button)
 
         # Sleep history
-        self.sleep_history = QListWidget()
+        self.sleep_history = QListView()
+        self.sleep_history.setUniformItemSizes(True)
         self.sleep_history.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #ECF0F1;
                 color: #2C3E50;
                 border-radius: 5px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #3498DB;
             }
         """)
+        self.sleep_history_model = TrackerListModel(self.sleep_history_label, self)
+        self.sleep_history.setModel(self.sleep_history_model)
+        self.sleep_week_label = QLabel("Last 7 nights: --")
+        layout.addWidget(self.sleep_week_label)
         layout.addWidget(QLabel("Sleep History:"))
         layout.addWidget(self.sleep_history)
 
         self.content_tabs.addTab(sleep_tracker, "Sleep Tracker")
 
+    def init_search_tab(self):
+        search = QWidget()
+        search.setObjectName("Search")
+        layout = QVBoxLayout(search)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search analyses and meal plans, e.g. salmon")
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                background-color: #ECF0F1;
+                color: #2C3E50;
+                border: 1px solid #3498DB;
+                border-radius: 5px;
+                padding: 5px;
+            }
+        """)
+        layout.addWidget(self.search_input)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        self.search_results = QListWidget()
+        self.search_results.setStyleSheet("""
+            QListWidget {
+                background-color: #ECF0F1;
+                color: #2C3E50;
+                border-radius: 5px;
+            }
+            QListWidget::item:selected {
+                background-color: #3498DB;
+            }
+        """)
+        # One line per result keeps repaints from laying out every wrapped snippet; the tooltip has the full text
+        self.search_results.setUniformItemSizes(True)
+        self.search_results.itemClicked.connect(self.open_search_result)
+        layout.addWidget(QLabel("Results:"))
+        layout.addWidget(self.search_results)
+
+        self.content_tabs.addTab(search, "Search")
+
     def init_profile_tab(self):
         profile = QWidget()
         profile.setObjectName("Profile")
@@ -772,6 +3868,7 @@ class HealthAssistant(QMainWindow):
 
         self.weight_input = QDoubleSpinBox()
         self.weight_input.setRange(30, 300)
+        self.weight_input.setValue(70)
         self.weight_input.setSuffix(" kg")
         self.weight_input.setStyleSheet("""
             QDoubleSpinBox {
@@ -800,6 +3897,18 @@ class HealthAssistant(QMainWindow):
         save_button.clicked.connect(self.save_profile)
         layout.addWidget(save_button)
 
+        self.reminder_list = QListWidget()
+        self.reminder_list.setStyleSheet("""
+            QListWidget {
+                background-color: #ECF0F1;
+                color: #2C3E50;
+                border-radius: 5px;
+            }
+        """)
+        self.reminder_list.itemChanged.connect(self.toggle_reminder)
+        layout.addWidget(QLabel("Reminders:"))
+        layout.addWidget(self.reminder_list)
+
         self.content_tabs.addTab(profile, "Profile")
 
     def upload_image(self):
@@ -810,45 +3919,128 @@ class HealthAssistant(QMainWindow):
             self.image_label.setPixmap(pixmap.scaled(400, 400, Qt.AspectRatioMode.KeepAspectRatio))
             self.analyze_button.setEnabled(True)
             self.status_label.setText("Image uploaded. Ready for analysis.")
+            if not pixmap.isNull():
+                self.image_hashes[self.image_path] = image_dhash(pixmap.toImage())
+            if not self.offer_similar_analysis(self.image_path):
+                self.request_local_estimate(self.image_path)
+
+    @perf_metrics.timed()
+    def offer_similar_analysis(self, image_path):
+        image_hash = self.image_hashes.get(image_path)
+        if image_hash is None:
+            return False
+        matches = self.image_index.search(image_hash, NEAR_DUPLICATE_THRESHOLD)
+        if not matches:
+            return False
+        distance, index = matches[0]
+        _, result = self.history[index]
+        self.result_text.setText(result)
+        self.select_history_row(index)
+        self.status_label.setText(
+            f"Looks like Analysis {index + 1} (distance {distance}); showing its result. "
+            "Click Analyze for a fresh analysis.")
+        return True
+
+    def request_local_estimate(self, image_path):
+        if image_path in self.local_estimates:
+            self.on_local_estimate(image_path, self.local_estimates[image_path])
+            return
+        if not local_classifier.available():
+            return
+        thread = LocalAnalysisThread([image_path])
+        thread.estimate_ready.connect(self.on_local_estimate)
+        thread.finished.connect(lambda: self.local_threads.remove(thread))
+        self.local_threads.append(thread)
+        thread.start()
+
+    def on_local_estimate(self, image_path, estimate):
+        self.local_estimates[image_path] = estimate
+        if image_path == self.image_path and self.upload_button.isEnabled():
+            self.result_text.setText(estimate)
+            self.status_label.setText("Offline estimate ready. Click Analyze for detailed advice.")
 
     def analyze_image(self):
         if not self.image_path:
             self.result_text.setText("Please upload an image first.")
             return
 
+        if api_circuit.is_open() and self.image_path in self.local_estimates:
+            self.result_text.setText(self.local_estimates[self.image_path])
+            self.status_label.setText("Remote analysis unavailable, showing offline estimate.")
+            return
+
         self.progress_bar.setValue(0)
-        self.analyze_button.setEnabled(False)
-        self.upload_button.setEnabled(False)
+        self.set_analysis_controls_enabled(False)
         self.status_label.setText("Analyzing image...")
 
         self.analysis_thread = AnalysisThread(self.image_path)
         self.analysis_thread.analysis_complete.connect(self.on_analysis_complete)
         self.analysis_thread.analysis_error.connect(self.on_analysis_error)
         self.analysis_thread.retry_attempt.connect(self.on_retry_attempt)
+        self.analysis_thread.quota_wait.connect(self.on_quota_wait)
         self.analysis_thread.start()
 
-        # Simulate progress
-        for i in range(101):
-            self.progress_bar.setValue(i)
-            QApplication.processEvents()
-            self.analysis_thread.msleep(50)
+        # Simulated progress, stepped by a timer so the event loop keeps running while the request is in flight
+        self.progress_timer.start(50)
+
+    def advance_progress(self):
+        self.progress_bar.setValue(min(self.progress_bar.value() + 1, 99))
 
     def on_analysis_complete(self, result):
+        self.progress_timer.stop()
         self.result_text.setText(result)
-        self.analyze_button.setEnabled(True)
-        self.upload_button.setEnabled(True)
+        self.set_analysis_controls_enabled(True)
         self.progress_bar.setValue(100)
         self.status_label.setText("Analysis complete.")
 
-        # Add to history
-        history_item = f"Analysis {len(self.history) + 1}"
-        self.history.append((self.image_path, result))
-        self.history_list.addItem(history_item)
+        self.add_history_entry(self.image_path, result, self.image_hashes.get(self.image_path))
+
+    def add_history_entry(self, image_path, result, image_hash=None):
+        index = self.history.append(image_path, result, image_hash)
+        self.history_model.entry_added()
+        if image_hash is not None:
+            self.image_index.add(image_hash, index)
+        self.search_index.update("analysis", index, f"Analysis {index + 1}", result)
+
+    def batch_analyze_images(self):
+        image_paths, _ = QFileDialog.getOpenFileNames(self, 'Open Images', '', 'Image Files (*.png *.jpg *.jpeg)')
+        if not image_paths:
+            return
+        self.set_analysis_controls_enabled(False)
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"Analyzing {len(image_paths)} images in {len(plan_batches(image_paths))} request(s)...")
+
+        self.batch_thread = BatchAnalysisThread(image_paths)
+        self.batch_thread.batch_result.connect(self.on_batch_result)
+        self.batch_thread.batch_progress.connect(self.on_batch_progress)
+        self.batch_thread.batch_error.connect(self.on_analysis_error)
+        self.batch_thread.retry_attempt.connect(self.on_retry_attempt)
+        self.batch_thread.quota_wait.connect(self.on_quota_wait)
+        self.batch_thread.finished.connect(lambda: self.set_analysis_controls_enabled(True))
+        self.batch_thread.start()
+
+    def set_analysis_controls_enabled(self, enabled):
+        self.upload_button.setEnabled(enabled)
+        self.batch_button.setEnabled(enabled)
+        self.analyze_button.setEnabled(enabled and bool(self.image_path))
+
+    def on_batch_result(self, image_path, result, image_hash):
+        if image_hash is not None:
+            self.image_hashes[image_path] = image_hash
+        self.add_history_entry(image_path, result, image_hash)
+        self.result_text.setText(result)
+
+    def on_batch_progress(self, completed, total):
+        self.progress_bar.setValue(int(completed * 100 / total))
+        self.status_label.setText(f"Analyzed {completed} of {total} images.")
 
     def on_analysis_error(self, error_message):
-        self.result_text.setText(error_message)
-        self.analyze_button.setEnabled(True)
-        self.upload_button.setEnabled(True)
+        self.progress_timer.stop()
+        if self.image_path in self.local_estimates:
+            self.result_text.setText(f"{error_message}\n\n{self.local_estimates[self.image_path]}")
+        else:
+            self.result_text.setText(error_message)
+        self.set_analysis_controls_enabled(True)
         self.progress_bar.setValue(0)
         self.status_label.setText("Analysis failed. Please try again.")
         
@@ -858,23 +4050,165 @@ class HealthAssistant(QMainWindow):
         self.status_label.setText(f"Retrying analysis (Attempt {attempt})...")
         self.progress_bar.setValue(0)
 
-    def load_history_item(self, item):
-        index = self.history_list.row(item)
+    def on_quota_wait(self, seconds):
+        self.status_label.setText(f"API quota reached, request queued (about {seconds:.0f}s)...")
+        self.update_quota_label()
+
+    def update_quota_label(self):
+        quota = quota_limiter.snapshot()
+        self.quota_label.setText(
+            f"API quota: {quota['requests_last_minute']}/{quota['rpm_limit']} requests/min, "
+            f"{quota['tokens_last_minute']:,}/{quota['tpm_limit']:,} tokens/min, "
+            f"{quota['queued']} queued, {quota['total_tokens']:,} tokens used this session"
+        )
+
+    def apply_history(self, loaded):
+        image_index, known = loaded
+        # Analyses stored after the loader counted the history are only in the index built so far
+        for image_hash, index in self.image_index.items():
+            if index >= known:
+                image_index.add(image_hash, index)
+        self.image_index = image_index
+        # Entries added before hydration finished were already appended to the model
+        if self.history_model.rowCount() == 0:
+            self.history_model.reload()
+
+    def select_history_row(self, index):
+        self.history_model.ensure_loaded(index)
+        self.history_list.setCurrentIndex(self.history_model.index(index))
+
+    def rebuild_search_index(self):
+        if self.search_thread is not None and self.search_thread.isRunning():
+            return
+        self.search_thread = SearchIndexThread(self.search_index, self.history)
+        self.search_thread.index_built.connect(self.on_search_index_built)
+        self.search_thread.index_error.connect(
+            lambda message: self.statusBar().showMessage(f"Could not build the search index: {message}", 10000))
+        self.search_thread.start()
+
+    def on_search_index_built(self, count):
+        # Searches typed while the index was filling only saw part of it
+        if self.search_input.text():
+            self.run_search()
+
+    def run_search(self):
+        self.search_results.clear()
+        for kind, ref, title, snippet in self.search_index.search(self.search_input.text()):
+            item = QListWidgetItem(f"{title}: {' '.join(snippet.split())}")
+            item.setToolTip(item.text())
+            item.setData(Qt.ItemDataRole.UserRole, (kind, ref))
+            self.search_results.addItem(item)
+
+    def open_search_result(self, item):
+        kind, ref = item.data(Qt.ItemDataRole.UserRole)
+        if kind == "analysis":
+            index = int(ref)
+            if index < len(self.history):
+                self.switch_tab('Image Analysis')
+                self.select_history_row(index)
+                self.load_history_item(index)
+        elif kind == "meal_plan":
+            self.switch_tab('Meal Planner')
+            self.meal_calendar.setSelectedDate(QDate.fromString(ref, "yyyy-MM-dd"))
+
+    def load_history_item(self, index):
         image_path, result = self.history[index]
-        pixmap = QPixmap(image_path)
-        self.image_label.setPixmap(pixmap.scaled(400, 400, Qt.AspectRatioMode.KeepAspectRatio))
+        pixmap = self.history_images.get(image_path)
+        if pixmap is None:
+            pixmap = QPixmap(image_path).scaled(400, 400, Qt.AspectRatioMode.KeepAspectRatio)
+            self.history_images.put(image_path, pixmap)
+        self.image_label.setPixmap(pixmap)
         self.result_text.setText(result)
 
     def update_meal_plan(self):
-        selected_date = self.meal_calendar.selectedDate().toString("yyyy-MM-dd")
-        meal_plan = self.load_meal_plan(selected_date)
+        selected = self.meal_calendar.selectedDate()
+        if (selected.year(), selected.month()) not in self.meal_plan_months:
+            # Not prefetched yet: leave the form empty and fill it when the worker delivers the month
+            for input_field in self.meal_inputs.values():
+                input_field.clear()
+            self.prefetch_meal_plans(selected.year(), selected.month())
+            return
+        meal_plan = self.meal_plan_cache.get(selected.toString("yyyy-MM-dd"), {})
         for meal, input_field in self.meal_inputs.items():
             input_field.setText(meal_plan.get(meal, ""))
 
+    def prefetch_meal_plans(self, year, month):
+        months = [page for page in neighbouring_months(year, month) if page not in self.meal_plan_months]
+        if not months:
+            return
+        # Claim the months up front so repeated page changes don't queue duplicate loads
+        self.meal_plan_months.update(months)
+        thread = MealPlanPrefetchThread(months)
+        thread.plans_loaded.connect(self.on_meal_plans_loaded)
+        thread.finished.connect(lambda: self.meal_prefetch_threads.remove(thread))
+        self.meal_prefetch_threads.append(thread)
+        thread.start()
+
+    @perf_metrics.timed()
+    def on_meal_plans_loaded(self, months, meal_plans):
+        # A prefetch may have read the store before a save_meal_plan; dates already cached are newer, keep them
+        fresh = {date: plan for date, plan in meal_plans.items() if date not in self.meal_plan_cache}
+        self.meal_plan_cache.update(fresh)
+        planned = {date for date, plan in fresh.items() if any(text.strip() for text in plan.values())}
+        self.meal_plan_dates.update(planned)
+        # One repaint for the whole batch of highlighted days
+        self.meal_calendar.setUpdatesEnabled(False)
+        for date in planned:
+            self.meal_calendar.setDateTextFormat(QDate.fromString(date, "yyyy-MM-dd"), self.planned_day_format)
+        self.meal_calendar.setUpdatesEnabled(True)
+        selected = self.meal_calendar.selectedDate()
+        if (selected.year(), selected.month()) in months and not any(field.text() for field in self.meal_inputs.values()):
+            self.update_meal_plan()
+
+    def update_meal_totals(self):
+        totals = nutrition_db.day_totals({meal: field.text() for meal, field in self.meal_inputs.items()})
+        text = (f"Daily total: {totals['calories']:.0f} kcal, protein {totals['protein']:.0f} g, "
+                f"carbs {totals['carbs']:.0f} g, fat {totals['fat']:.0f} g")
+        if totals['unknown']:
+            text += f" ({len(totals['unknown'])} item(s) not recognized: {', '.join(totals['unknown'][:3])})"
+        self.meal_totals_label.setText(text)
+
+    def update_dashboard_sleep(self):
+        table = self.sleep_columns()
+        if len(table):
+            # Naps logged on the same date count toward that day's total
+            latest = table[len(table) - 1].date
+            minutes = table.minutes_between(latest, latest)
+            self.sleep_summary_label.setText(f"Sleep: {minutes // 60}h {minutes % 60}m")
+
+    def update_dashboard_calories(self):
+        today = QDate.currentDate().toString("yyyy-MM-dd")
+        self.calories_eaten = nutrition_db.day_totals(self.load_meal_plan(today))['calories']
+        self.show_dashboard_calories()
+
+    def show_dashboard_calories(self):
+        text = f"Today's Calories: {self.calories_eaten:.0f} / {DAILY_CALORIE_TARGET}"
+        # Burn is only shown once the exercise table is in memory; never force a load for the dashboard
+        if self.exercise_table is not None:
+            today = QDate.currentDate().toString("yyyy-MM-dd")
+            text += f" ({self.calorie_engine.burned_between(self.exercise_table, today, today):.0f} burned)"
+        self.calories_label.setText(text)
+
+    def on_weight_changed(self, weight):
+        self.calorie_engine.set_weight(weight)
+        if self.exercise_table is not None:
+            self.update_exercise_history()
+            self.show_dashboard_calories()
+
     def save_meal_plan(self):
         selected_date = self.meal_calendar.selectedDate().toString("yyyy-MM-dd")
         meal_plan = {meal: input_field.text() for meal, input_field in self.meal_inputs.items()}
         self.save_meal_plan_data(selected_date, meal_plan)
+        self.meal_plan_cache[selected_date] = meal_plan
+        day = self.meal_calendar.selectedDate()
+        if any(text.strip() for text in meal_plan.values()):
+            self.meal_plan_dates.add(selected_date)
+            self.meal_calendar.setDateTextFormat(day, self.planned_day_format)
+        else:
+            self.meal_plan_dates.discard(selected_date)
+            self.meal_calendar.setDateTextFormat(day, QTextCharFormat())
+        self.search_index.update(*meal_plan_document(selected_date, meal_plan))
+        self.update_dashboard_calories()
         QMessageBox.information(self, "Meal Plan", "Meal plan saved successfully!")
 
     def log_exercise(self):
@@ -884,30 +4218,111 @@ class HealthAssistant(QMainWindow):
             "duration": self.exercise_duration.value(),
             "intensity": self.exercise_intensity.currentText()
         }
+        table = self.exercise_columns()
         self.save_exercise_data(date, exercise_data)
+        table.append(date, exercise_data)
         self.update_exercise_history()
-        QMessageBox.information(self, "Exercise Logged", "Exercise session logged successfully!")
+        self.show_dashboard_calories()
+        QMessageBox.information(self, "Exercise Logged",
+                                f"Exercise session logged successfully! "
+                                f"About {self.calorie_engine.burn(exercise_data):.0f} kcal burned.")
+
+    def load_exercise_table(self):
+        table = ExerciseColumns.from_dict(self.load_exercise_data())
+        # Burns, and the numpy import behind them, are computed on the loader thread rather than on first paint
+        self.calorie_engine.table_burns(table)
+        return table
+
+    def load_sleep_table(self):
+        table = SleepColumns.from_dict(self.load_sleep_data())
+        table.build_index()
+        return table
 
+    def exercise_columns(self):
+        if self.exercise_table is None:
+            self.exercise_table = ExerciseColumns.from_dict(self.load_exercise_data())
+        return self.exercise_table
+
+    def sleep_columns(self):
+        if self.sleep_table is None:
+            self.sleep_table = SleepColumns.from_dict(self.load_sleep_data())
+        return self.sleep_table
+
+    @perf_metrics.timed()
     def update_exercise_history(self):
-        self.exercise_history.clear()
-        exercise_data = self.load_exercise_data()
-        for date, exercises in exercise_data.items():
-            for exercise in exercises:
-                item_text = f"{date}: {exercise['type']} - {exercise['duration']} mins ({exercise['intensity']})"
-                self.exercise_history.addItem(item_text)
+        self.exercise_history_model.set_table(self.exercise_columns())
+
+    def exercise_history_label(self, table, row):
+        record = table[row]
+        return (f"{record.date}: {record.type} - {record.duration} mins ({record.intensity}) - "
+                f"{self.calorie_engine.row_burn(table, row):.0f} kcal")
 
     def update_water_label(self):
         self.water_label.setText(f"Water intake: {self.water_slider.value()} glasses")
 
+    def water_events(self):
+        if self.water_log is None:
+            self.water_log = WaterLog().load()
+        return self.water_log
+
+    def add_water_glass(self):
+        log = self.water_events()
+        log.append(glasses=1)
+        self.update_water_views()
+
     def save_water_intake(self):
+        # The slider sets today's total; log the difference so the per-glass history stays intact
+        log = self.water_events()
         date = QDate.currentDate().toString("yyyy-MM-dd")
-        water_data = {
-            "goal": self.water_goal.value(),
-            "intake": self.water_slider.value()
-        }
-        self.save_water_data(date, water_data)
+        glasses = self.water_slider.value() - log.intake(date)
+        goal = self.water_goal.value() if self.water_goal.value() != log.goal(date) else None
+        if glasses or goal is not None:
+            try:
+                log.append(glasses=glasses, goal=goal)
+            except ValueError as e:
+                QMessageBox.warning(self, "Water Intake", f"Could not log water intake: {e}")
+                return
+        self.update_water_views()
         QMessageBox.information(self, "Water Intake", "Water intake logged successfully!")
 
+    def update_water_views(self):
+        log = self.water_events()
+        date = QDate.currentDate().toString("yyyy-MM-dd")
+        intake, goal = log.intake(date), log.goal(date)
+        self.water_goal.setValue(goal)
+        # Add Glass and imports can go past the slider's default range; never let it clamp the real total
+        self.water_slider.setMaximum(max(20, intake))
+        self.water_slider.setValue(intake)
+        self.water_summary_label.setText(f"Water: {intake} / {goal} glasses")
+        self.water_summary_label.setToolTip("\n".join(
+            f"{hour:02d}:00  {count} glass{'es' if count != 1 else ''}"
+            for hour, count in enumerate(log.hours(date)) if count))
+        self.update_water_chart()
+
+    def page_water_chart(self, months):
+        self.water_month = self.water_month.addMonths(months)
+        self.update_water_chart()
+
+    def refresh_water_chart(self):
+        if self.water_chart_stale and self.water_chart.isVisible():
+            self.update_water_chart()
+
+    @perf_metrics.timed()
+    def update_water_chart(self):
+        if not self.water_chart.isVisible():
+            # A hidden chart still lays itself out on every change; catch up once its tab is shown
+            self.water_chart_stale = True
+            return
+        self.water_chart_stale = False
+        days = self.water_events().month(self.water_month.year(), self.water_month.month())
+        self.water_month_label.setText(self.water_month.toString("MMMM yyyy"))
+        self.water_bars.remove(0, self.water_bars.count())
+        self.water_bars.append([float(glasses) for _, glasses, _ in days])
+        self.water_goal_line.replace([QPointF(index, goal) for index, (_, _, goal) in enumerate(days)])
+        self.water_days_axis.setCategories([str(day) for day in range(1, len(days) + 1)])
+        self.water_glasses_axis.setRange(
+            0, max([glasses for _, glasses, _ in days] + [goal for _, _, goal in days]) + 1)
+
     def log_sleep(self):
         date = self.sleep_date.date().toString("yyyy-MM-dd")
         sleep_data = {
@@ -915,16 +4330,31 @@ class HealthAssistant(QMainWindow):
             "wake_time": self.wake_time.time().toString("hh:mm"),
             "quality": self.sleep_quality.currentText()
         }
+        try:
+            self.sleep_columns().add(date, sleep_data)
+        except SleepOverlapError as e:
+            QMessageBox.warning(self, "Sleep Overlap", str(e))
+            return
         self.save_sleep_data(date, sleep_data)
         self.update_sleep_history()
+        self.update_dashboard_sleep()
         QMessageBox.information(self, "Sleep Logged", "Sleep data logged successfully!")
 
+    @perf_metrics.timed()
     def update_sleep_history(self):
-        self.sleep_history.clear()
-        sleep_data = self.load_sleep_data()
-        for date, sleep_info in sleep_data.items():
-            item_text = f"{date}: {sleep_info['sleep_time']} - {sleep_info['wake_time']} ({sleep_info['quality']})"
-            self.sleep_history.addItem(item_text)
+        table = self.sleep_columns()
+        self.sleep_history_model.set_table(table)
+        today = QDate.currentDate().toString("yyyy-MM-dd")
+        week_start = QDate.currentDate().addDays(-6).toString("yyyy-MM-dd")
+        slept = table.minutes_between(week_start, today)
+        debt = table.sleep_debt(today)
+        self.sleep_week_label.setText(
+            f"Last 7 nights: {slept // 60}h {slept % 60}m, "
+            + (f"sleep debt {debt // 60}h {debt % 60}m" if debt > 0 else "no sleep debt"))
+
+    def sleep_history_label(self, table, row):
+        record = table[row]
+        return f"{record.date}: {record.sleep_time} - {record.wake_time} ({record.quality})"
 
     def save_profile(self):
         profile_data = {
@@ -937,45 +4367,48 @@ class HealthAssistant(QMainWindow):
         self.save_user_data(profile_data)
         QMessageBox.information(self, "Profile Saved", "Your profile has been updated successfully!")
 
+    @perf_metrics.timed()
     def load_user_data(self):
-        if os.path.exists("user_data.json"):
-            with open("user_data.json", "r") as file:
-                data = json.load(file)
-                self.name_input.setText(data.get("name", ""))
-                self.age_input.setValue(data.get("age", 0))
-                self.gender_input.setCurrentText(data.get("gender", ""))
-                self.height_input.setValue(data.get("height", 170))
-                self.weight_input.setValue(data.get("weight", 70))
+        if data_store.exists("user_data"):
+            self.apply_user_data(data_store.load("user_data", {}))
+
+    def apply_user_data(self, data):
+        self.name_input.setText(data.get("name", ""))
+        self.age_input.setValue(data.get("age", 0))
+        self.gender_input.setCurrentText(data.get("gender", ""))
+        self.height_input.setValue(data.get("height", 170))
+        self.weight_input.setValue(data.get("weight", 70))
 
+    @perf_metrics.timed()
     def save_user_data(self, data):
-        with open("user_data.json", "w") as file:
-            json.dump(data, file)
+        data_store.save("user_data", data)
 
+    @perf_metrics.timed()
+    def load_history_hashes(self):
+        # The near-duplicate index is built on the loader thread; apply_history swaps it in
+        self.history.migrate(data_store)
+        known = len(self.history)
+        image_index = BKTree()
+        for index, image_hash in self.history.hashes():
+            if index < known:
+                image_index.add(image_hash, index)
+        return image_index, known
+
+    @perf_metrics.timed()
     def load_meal_plan(self, date):
-        if os.path.exists("meal_plans.json"):
-            with open("meal_plans.json", "r") as file:
-                all_meal_plans = json.load(file)
-                return all_meal_plans.get(date, {})
-        return {}
+        return data_store.load("meal_plans", {}).get(date, {})
 
+    @perf_metrics.timed()
     def save_meal_plan_data(self, date, meal_plan):
-        if os.path.exists("meal_plans.json"):
-            with open("meal_plans.json", "r") as file:
-                all_meal_plans = json.load(file)
-        else:
-            all_meal_plans = {}
-        
+        all_meal_plans = data_store.load("meal_plans", {})
         all_meal_plans[date] = meal_plan
-        
-        with open("meal_plans.json", "w") as file:
-            json.dump(all_meal_plans, file)
+        data_store.save("meal_plans", all_meal_plans)
 
+    @perf_metrics.timed()
     def load_exercise_data(self):
-        if os.path.exists("exercise_data.json"):
-            with open("exercise_data.json", "r") as file:
-                return json.load(file)
-        return {}
+        return data_store.load("exercise_data", {})
 
+    @perf_metrics.timed()
     def save_exercise_data(self, date, exercise_data):
         all_exercise_data = self.load_exercise_data()
         
@@ -984,44 +4417,521 @@ class HealthAssistant(QMainWindow):
         else:
             all_exercise_data[date] = [exercise_data]
         
-        with open("exercise_data.json", "w") as file:
-            json.dump(all_exercise_data, file)
-
-    def load_water_data(self):
-        if os.path.exists("water_data.json"):
-            with open("water_data.json", "r") as file:
-                return json.load(file)
-        return {}
-
-    def save_water_data(self, date, water_data):
-        all_water_data = self.load_water_data()
-        all_water_data[date] = water_data
-        
-        with open("water_data.json", "w") as file:
-            json.dump(all_water_data, file)
+        data_store.save("exercise_data", all_exercise_data)
 
+    @perf_metrics.timed()
     def load_sleep_data(self):
-        if os.path.exists("sleep_data.json"):
-            with open("sleep_data.json", "r") as file:  # Removed extra closing parenthesis
-                return json.load(file)
-        return {}
-
+        return data_store.load("sleep_data", {})
 
+    @perf_metrics.timed()
     def save_sleep_data(self, date, sleep_data):
         all_sleep_data = self.load_sleep_data()
-        all_sleep_data[date] = sleep_data
-        
-        with open("sleep_data.json", "w") as file:
-            json.dump(all_sleep_data, file)
+        all_sleep_data[date] = sleep_sessions(all_sleep_data.get(date)) + [sleep_data]
+        data_store.save("sleep_data", all_sleep_data)
+
+    def apply_reminders(self, reminders):
+        self.reminder_list.blockSignals(True)
+        self.reminder_list.clear()
+        for reminder in reminders:
+            self.reminder_scheduler.add(reminder)
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, reminder.id)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if reminder.enabled else Qt.CheckState.Unchecked)
+            self.reminder_list.addItem(item)
+            self.update_reminder_item(item)
+        self.reminder_list.blockSignals(False)
+
+    def update_reminder_item(self, item):
+        reminder = self.reminder_scheduler.reminders[item.data(Qt.ItemDataRole.UserRole)]
+        due = f"next {reminder.due:%a %d %b %H:%M}" if reminder.due else "off"
+        self.reminder_list.blockSignals(True)
+        item.setText(f"{reminder.title} ({due})")
+        self.reminder_list.blockSignals(False)
+
+    def toggle_reminder(self, item):
+        self.reminder_scheduler.set_enabled(item.data(Qt.ItemDataRole.UserRole),
+                                            item.checkState() == Qt.CheckState.Checked)
+        self.update_reminder_item(item)
+        self.save_reminders()
+
+    def save_reminders(self):
+        data_store.save("reminders", [reminder.to_dict() for reminder in self.reminder_scheduler.reminders.values()])
+
+    def on_reminder_due(self, reminder):
+        if self.tray_icon is None and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray_icon = QSystemTrayIcon(self.windowIcon(), self)
+            self.tray_icon.show()
+        if self.tray_icon is not None:
+            self.tray_icon.showMessage(reminder.title, reminder.message)
+        else:
+            self.statusBar().showMessage(f"{reminder.title}: {reminder.message}", 60000)
+        for row in range(self.reminder_list.count()):
+            if self.reminder_list.item(row).data(Qt.ItemDataRole.UserRole) == reminder.id:
+                self.update_reminder_item(self.reminder_list.item(row))
+        if reminder.rule.count is not None:
+            self.save_reminders()
+
+    def generate_reports(self, kind, count, end=None):
+        if self.reports_pending:
+            return
+        if self.report_renderer is None:
+            self.report_renderer = ChartRenderer(os.path.join(REPORTS_DIRECTORY, ".chart_cache"))
+        index_path = os.path.join(REPORTS_DIRECTORY, ".index.json")
+        self.report_index = {}
+        if os.path.exists(index_path):
+            with open(index_path, "r") as file:
+                self.report_index = json.load(file)
+        self.report_counts = {"written": 0, "unchanged": 0, "failed": 0}
+        self.report_file_format = self.report_format.currentText().lower()
+        periods = report_periods(kind, end or Date.today(), count)
+        self.reports_pending = len(periods)
+        self.report_thread = ReportThread(periods, self.water_events().copy(), self.weight_input.value(),
+                                          self.history)
+        self.report_thread.period_ready.connect(self.on_report_period_ready)
+        self.report_thread.period_failed.connect(self.on_report_period_failed)
+        self.report_thread.report_error.connect(self.on_report_error)
+        self.statusBar().showMessage(f"Generating {len(periods)} {kind} report(s)...")
+        self.report_thread.start()
+
+    @perf_metrics.timed()
+    def on_report_period_ready(self, stats):
+        name = f"{stats['kind']}-{stats['label']}.{self.report_file_format}"
+        path = os.path.join(REPORTS_DIRECTORY, name)
+        if self.report_index.get(name) == stats["hash"] and os.path.exists(path):
+            self.report_counts["unchanged"] += 1
+        else:
+            try:
+                charts = {chart: self.report_renderer.render(spec) for chart, spec in report_chart_specs(stats).items()}
+                os.makedirs(REPORTS_DIRECTORY, exist_ok=True)
+                write_report(stats, charts, path, self.report_file_format)
+            except Exception as e:
+                self.on_report_period_failed(stats["label"], str(e))
+                return
+            self.report_index[name] = stats["hash"]
+            self.report_counts["written"] += 1
+        self.finish_report_period()
+
+    def on_report_period_failed(self, label, message):
+        self.report_counts["failed"] += 1
+        self.report_failure = f"{label}: {message}"
+        self.finish_report_period()
+
+    def finish_report_period(self):
+        self.reports_pending -= 1
+        if self.reports_pending:
+            return
+        text = (f"Reports in {os.path.abspath(REPORTS_DIRECTORY)}: {self.report_counts['written']} written, "
+                f"{self.report_counts['unchanged']} unchanged")
+        if self.report_counts["failed"]:
+            text += f", {self.report_counts['failed']} failed (last error {self.report_failure})"
+        try:
+            os.makedirs(REPORTS_DIRECTORY, exist_ok=True)
+            with open(os.path.join(REPORTS_DIRECTORY, ".index.json"), "w") as file:
+                json.dump(self.report_index, file)
+        except OSError as e:
+            text += f"; could not save the report index: {e}"
+        self.statusBar().showMessage(text, 10000)
+
+    def on_report_error(self, message):
+        self.reports_pending = 0
+        self.statusBar().showMessage(f"Report generation failed: {message}", 10000)
+
+    def run_scheduled_job(self, job):
+        if job.id == "backup":
+            self.start_backup()
+
+    def start_backup(self):
+        if self.backup_thread is not None and self.backup_thread.isRunning():
+            return
+        if self.backup_manager is None:
+            try:
+                self.backup_manager = BackupManager(".", backup_target())
+            except RuntimeError as e:
+                self.statusBar().showMessage(f"Backup disabled: {e}", 10000)
+                return
+        self.backup_thread = BackupThread(self.backup_manager)
+        self.backup_thread.backup_complete.connect(self.on_backup_complete)
+        self.backup_thread.backup_error.connect(lambda message: self.statusBar().showMessage(f"Backup failed: {message}", 10000))
+        self.backup_thread.start()
+
+    def on_backup_complete(self, snapshot, stats):
+        self.statusBar().showMessage(
+            f"Backed up to {self.backup_manager.target} ({stats['files']} changed files, "
+            f"{stats['new_chunks']} new chunks, {stats['uploaded_bytes'] / 1024:.0f} KB)", 5000)
+
+    def closeEvent(self, event):
+        if self.water_log is not None:
+            self.water_log.checkpoint()
+        super().closeEvent(event)
+
+def parse_moment(text):
+    # ISO dates/times as written by this app, Google Fit and Apple Health; any UTC offset is dropped
+    # so the wall-clock time the user saw is kept
+    text = str(text).strip()
+    try:
+        return datetime.fromisoformat(text[:19].replace(' ', 'T') if len(text) > 10 else text)
+    except ValueError:
+        raise ValueError(f"unrecognised date/time '{text}'") from None
+
+def column_lookup(columns, fields):
+    # Map each canonical field to the source column holding it: the field name itself, then its aliases
+    by_name = {column.strip().lower(): column for column in columns}
+    lookup = {}
+    for field in fields:
+        for name in [field.lower()] + COLUMN_ALIASES.get(field, []):
+            if name in by_name:
+                lookup[field] = by_name[name]
+                break
+    return lookup
+
+def read_rows(path, file_format):
+    # Yields (row number, dict) one row at a time, so memory stays flat however large the file is
+    if file_format == "csv":
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            for number, row in enumerate(csv.DictReader(file), start=2):
+                yield number, row
+    elif file_format == "jsonl":
+        with open(path, encoding='utf-8') as file:
+            for number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError as e:
+                        yield number, e
+    elif file_format == "parquet":
+        import pyarrow.parquet
+        number = 0
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=IMPORT_BATCH_ROWS):
+            for row in batch.to_pylist():
+                number += 1
+                yield number, row
+    else:
+        raise ValueError(f"Unsupported format '{file_format}'")
+
+def write_rows(path, file_format, fields, rows):
+    count = 0
+    if file_format == "csv":
+        with open(path, "w", newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    elif file_format == "jsonl":
+        with open(path, "w", encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps({field: row.get(field) for field in fields}, separators=(',', ':')) + "\n")
+                count += 1
+    elif file_format == "parquet":
+        import pyarrow
+        import pyarrow.parquet
+        schema = pyarrow.schema([(field, pyarrow.int64() if field in INTEGER_FIELDS else pyarrow.string())
+                                 for field in fields])
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            while True:
+                batch = list(itertools.islice(rows, IMPORT_BATCH_ROWS))
+                if not batch:
+                    break
+                writer.write_batch(pyarrow.RecordBatch.from_pylist(batch, schema=schema))
+                count += len(batch)
+    else:
+        raise ValueError(f"Unsupported format '{file_format}'")
+    return count
+
+def export_rows(tracker, store):
+    if tracker == "exercise":
+        exercise_data = store.load("exercise_data", {})
+        for date in sorted(exercise_data):
+            for exercise in exercise_data[date]:
+                yield dict(exercise, date=date)
+    elif tracker == "sleep":
+        sleep_data = store.load("sleep_data", {})
+        for date in sorted(sleep_data):
+            for session in sleep_sessions(sleep_data[date]):
+                yield dict(session, date=date)
+    elif tracker == "water":
+        yield from WaterLog(os.path.join(store.directory, WATER_LOG_PATH), store).load().events()
+    elif tracker == "meals":
+        meal_plans = store.load("meal_plans", {})
+        for date in sorted(meal_plans):
+            # Plans saved from the form hold every meal, imported ones only the filled ones; export both alike
+            yield dict({meal: meal_plans[date].get(meal, "") for meal in TRACKER_FIELDS["meals"][1:]}, date=date)
+
+def export_tracker(tracker, path, file_format, store=None):
+    return write_rows(path, file_format, TRACKER_FIELDS[tracker], export_rows(tracker, store or data_store))
+
+def import_value(row, lookup, field, default=None):
+    value = row.get(lookup[field]) if field in lookup else None
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if default is None:
+            raise ValueError(f"missing {field}")
+        return default
+    return value.strip() if isinstance(value, str) else value
+
+def import_count(value, field, upper, lower=0):
+    try:
+        number = int(round(float(value)))
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} '{value}' is not a number") from None
+    if not lower <= number <= upper:
+        raise ValueError(f"{field} {number} is out of range")
+    return number
+
+def normalise_import_row(tracker, row, lookup):
+    if tracker == "exercise":
+        start = parse_moment(import_value(row, lookup, "date"))
+        duration = import_value(row, lookup, "duration", "")
+        if duration != "":
+            duration = import_count(duration, "duration", 1440)
+        else:
+            duration = int((parse_moment(import_value(row, lookup, "end")) - start).total_seconds() // 60)
+        if not 0 < duration <= 1440:
+            raise ValueError(f"duration {duration} is out of range")
+        kind = str(import_value(row, lookup, "type")).replace("HKWorkoutActivityType", "")
+        kind = ACTIVITY_ALIASES.get(kind, kind)
+        kind = next((known for known in EXERCISE_TYPES if known.lower() == kind.lower()), OTHER_ACTIVITY)
+        intensity = str(import_value(row, lookup, "intensity", IMPORT_DEFAULTS["intensity"])).title()
+        if intensity not in EXERCISE_INTENSITIES:
+            raise ValueError(f"unknown intensity '{intensity}'")
+        return start.date().isoformat(), {"type": kind, "duration": duration, "intensity": intensity}
+    if tracker == "sleep":
+        if "sleep_time" in lookup:
+            date = parse_moment(import_value(row, lookup, "date")).date().isoformat()
+            sleep_time, wake_time = import_value(row, lookup, "sleep_time"), import_value(row, lookup, "wake_time")
+            for value in (sleep_time, wake_time):
+                if not re.fullmatch(r'([01]\d|2[0-3]):[0-5]\d', value):
+                    raise ValueError(f"time '{value}' is not HH:MM")
+        else:
+            start, end = parse_moment(import_value(row, lookup, "date")), parse_moment(import_value(row, lookup, "end"))
+            if not timedelta(0) < end - start < timedelta(days=1):
+                raise ValueError("sleep session must end within a day of starting")
+            date, sleep_time, wake_time = start.date().isoformat(), f"{start:%H:%M}", f"{end:%H:%M}"
+        quality = str(import_value(row, lookup, "quality", IMPORT_DEFAULTS["quality"])).title()
+        if quality not in SLEEP_QUALITIES:
+            raise ValueError(f"unknown sleep quality '{quality}'")
+        return date, {"sleep_time": sleep_time, "wake_time": wake_time, "quality": quality}
+    if tracker == "water":
+        moment = parse_moment(import_value(row, lookup, "ts"))
+        goal = import_value(row, lookup, "goal", "")
+        # Goal changes are exported with a blank amount; only a row with neither is missing data
+        amount_default = 0 if goal != "" else None
+        if "glasses" in lookup:
+            # Negative glasses are the slider's corrections, exported as logged
+            glasses = import_count(import_value(row, lookup, "glasses", amount_default), "glasses", 100, -100)
+        else:
+            glasses = round(import_count(import_value(row, lookup, "water_ml", amount_default), "water_ml", 25000)
+                            / ML_PER_GLASS)
+        event = {"ts": moment.isoformat(timespec="seconds")}
+        if glasses:
+            event["glasses"] = glasses
+        if goal != "":
+            event["goal"] = import_count(goal, "goal", 20)
+        return moment.date().isoformat(), event
+    if tracker == "meals":
+        date = parse_moment(import_value(row, lookup, "date")).date().isoformat()
+        return date, {meal: str(import_value(row, lookup, meal, "")) for meal in TRACKER_FIELDS["meals"][1:]}
+    raise ValueError(f"Unknown tracker '{tracker}'")
+
+class TrackerImporter:
+    # Merges validated rows into the tracker in batches, then saves once: the snapshot formats are whole-file,
+    # so a per-row save would rewrite years of data for every imported line
+    def __init__(self, tracker, store):
+        self.tracker = tracker
+        self.store = store
+        if tracker == "exercise":
+            # Only rows already stored count as duplicates; two identical sessions in one file are both kept
+            self.data = store.load("exercise_data", {})
+            self.existing = {(date, exercise["type"], int(exercise["duration"]), exercise["intensity"])
+                             for date, exercises in self.data.items() for exercise in exercises}
+        elif tracker == "sleep":
+            # Stored sessions are checked through the table's index (built once); imported ones go into
+            # plain sorted lists so the index is not rebuilt for every row
+            self.data = store.load("sleep_data", {})
+            self.table = SleepColumns.from_dict(self.data)
+            self.starts, self.ends = [], []
+        elif tracker == "water":
+            self.log = WaterLog(os.path.join(store.directory, WATER_LOG_PATH), store).load()
+            self.existing = {self.water_key(event) for event in self.log.events()}
+        elif tracker == "meals":
+            self.data = store.load("meal_plans", {})
+            self.changed = set()
+
+    def add(self, date, entry):
+        # Returns False for rows that are already present, raises ValueError for rows that conflict
+        if self.tracker == "exercise":
+            if (date, entry["type"], entry["duration"], entry["intensity"]) in self.existing:
+                return False
+            self.data.setdefault(date, []).append(entry)
+        elif self.tracker == "sleep":
+            _, start, end = SleepColumns.span(date, entry)
+            clashes = self.table.overlapping(start, end)
+            if any(clash.start == start and clash.end == end for clash in clashes):
+                return False
+            row = bisect.bisect_left(self.starts, start)
+            if clashes or (row > 0 and self.ends[row - 1] > start) or (row < len(self.starts) and self.starts[row] < end):
+                raise SleepOverlapError(f"overlaps another sleep session ({date} {entry['sleep_time']} - {entry['wake_time']})")
+            self.starts.insert(row, start)
+            self.ends.insert(row, end)
+            self.data[date] = sleep_sessions(self.data.get(date)) + [entry]
+        elif self.tracker == "water":
+            if self.water_key(entry) in self.existing:
+                return False
+        elif self.tracker == "meals":
+            plan = self.data.setdefault(date, {})
+            plan.update({meal: text for meal, text in entry.items() if text})
+            self.changed.add(date)
+        return True
+
+    @staticmethod
+    def water_key(event):
+        return event["ts"], event.get("glasses") or 0, event.get("goal")
+
+    def flush(self, batch):
+        if self.tracker == "water" and batch:
+            self.log.extend(batch)
+
+    def finish(self):
+        if self.tracker == "exercise":
+            self.store.save("exercise_data", self.data)
+        elif self.tracker == "sleep":
+            self.store.save("sleep_data", self.data)
+        elif self.tracker == "water":
+            self.log.checkpoint()
+        elif self.tracker == "meals":
+            self.store.save("meal_plans", self.data)
+            SearchIndex(os.path.join(self.store.directory, "search_index.db")).update_many(
+                meal_plan_document(date, self.data[date]) for date in sorted(self.changed))
+
+def import_tracker(tracker, path, file_format, store=None, on_error=None):
+    store = store or data_store
+    importer = TrackerImporter(tracker, store)
+    report = {"rows": 0, "imported": 0, "skipped": 0, "errors": 0}
+    lookup, batch = None, []
+    for number, row in read_rows(path, file_format):
+        report["rows"] += 1
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"malformed line: {row}")
+            if lookup is None:
+                lookup = column_lookup(row.keys(), TRACKER_FIELDS[tracker] + list(COLUMN_ALIASES))
+            date, entry = normalise_import_row(tracker, row, lookup)
+            if not importer.add(date, entry):
+                report["skipped"] += 1
+                continue
+        except ValueError as e:
+            report["errors"] += 1
+            if on_error is not None:
+                on_error(number, str(e))
+            continue
+        report["imported"] += 1
+        if tracker == "water":
+            batch.append(entry)
+            if len(batch) >= IMPORT_BATCH_ROWS:
+                importer.flush(batch)
+                batch = []
+    importer.flush(batch)
+    importer.finish()
+    return report
+
+def run_command_line(argv):
+    parser = argparse.ArgumentParser(prog="AI-Health.py", description="Tracker data export, import and backups")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write each tracker to DIRECTORY/<tracker>.<format>")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    export_parser.add_argument("--tracker", nargs="+", choices=list(TRACKER_FIELDS), default=list(TRACKER_FIELDS))
+    import_parser = commands.add_parser("import", help="Merge a CSV, JSONL or Parquet file into one tracker")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--tracker", choices=list(TRACKER_FIELDS), required=True)
+    import_parser.add_argument("--format", choices=EXPORT_FORMATS,
+                               help="Defaults to the file extension")
+    backup_parser = commands.add_parser("backup", help="Take an incremental backup of the data files now")
+    restore_parser = commands.add_parser("restore", help="Restore the data files from a backup")
+    restore_parser.add_argument("--at", type=datetime.fromisoformat,
+                                help="Restore the latest backup taken at or before this time (default: latest)")
+    restore_parser.add_argument("--snapshot", help="Restore this snapshot id instead")
+    restore_parser.add_argument("--to", default=".", help="Directory to restore into (default: current)")
+    snapshots_parser = commands.add_parser("snapshots", help="List backups")
+    for command_parser in (backup_parser, restore_parser, snapshots_parser):
+        command_parser.add_argument("--target", default=BACKUP_TARGET,
+                                    help="Backup directory or s3://bucket/prefix (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command in ("backup", "restore", "snapshots"):
+        try:
+            manager = BackupManager(".", backup_target(args.target))
+            if args.command == "backup":
+                snapshot, stats = manager.backup()
+                print(f"{snapshot}: {stats['files']} changed files, {stats['new_chunks']} new chunks "
+                      f"({stats['uploaded_bytes'] / 1024:.0f} KB), {stats['reused_chunks']} reused")
+            elif args.command == "restore":
+                snapshot, names = manager.restore(args.to, args.at, args.snapshot)
+                print(f"Restored {len(names)} files from {snapshot} into {args.to}")
+            else:
+                for snapshot in manager.snapshots():
+                    manifest = manager.manifest(snapshot)
+                    print(f"{snapshot}  {manifest['created']}  {len(manifest['files'])} files")
+        except (RuntimeError, OSError, SnapshotError) as e:
+            print(f"{args.command} failed: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == "export":
+        if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            parser.error("Parquet export needs pyarrow (pip install pyarrow)")
+        os.makedirs(args.directory, exist_ok=True)
+        for tracker in args.tracker:
+            path = os.path.join(args.directory, f"{tracker}.{args.format}")
+            started = time.perf_counter()
+            count = export_tracker(tracker, path, args.format)
+            print(f"{tracker}: {count} rows -> {path} ({time.perf_counter() - started:.2f}s)")
+        return 0
+
+    file_format = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    if file_format not in EXPORT_FORMATS:
+        parser.error(f"cannot tell the format of '{args.path}'; pass --format")
+    if file_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        parser.error("Parquet files need pyarrow (pip install pyarrow)")
+
+    def report_error(number, message):
+        if report_error.count < MAX_REPORTED_ERRORS:
+            print(f"{args.path}:{number}: {message}", file=sys.stderr)
+        report_error.count += 1
+    report_error.count = 0
+    started = time.perf_counter()
+    report = import_tracker(args.tracker, args.path, file_format, on_error=report_error)
+    if report["errors"] > MAX_REPORTED_ERRORS:
+        print(f"... {report['errors'] - MAX_REPORTED_ERRORS} more errors", file=sys.stderr)
+    print(f"{args.tracker}: {report['imported']} imported, {report['skipped']} already present, "
+          f"{report['errors']} rejected of {report['rows']} rows ({time.perf_counter() - started:.2f}s)")
+    return 1 if report["errors"] and not report["imported"] else 0
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("export", "import", "backup", "restore", "snapshots"):
+        sys.exit(run_command_line(sys.argv[1:]))
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     light_palette = LightPalette()
     app.setPalette(light_palette)
+    splash_pixmap = QPixmap(360, 120)
+    splash_pixmap.fill(QColor("#3498DB"))
+    splash = QSplashScreen(splash_pixmap)
+    splash.showMessage("AI Health Assistant\nLoading...", Qt.AlignmentFlag.AlignCenter, QColor("white"))
+    splash.show()
+    if PROFILE_OUTPUT:
+        sampling_profiler.start()
+    app.processEvents()
     ex = HealthAssistant()
     ex.show()
-    sys.exit(app.exec())
+    splash.finish(ex)
+    try:
+        status = run_event_loop(app)
+    finally:
+        if PROFILE_OUTPUT:
+            sampling_profiler.stop()
+            sampling_profiler.export_speedscope(PROFILE_OUTPUT)
+    sys.exit(status)
 
 if __name__ == '__main__':
     main()
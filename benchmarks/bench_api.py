@@ -0,0 +1,180 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import StubAPIServer, add_output_arguments, finish_run, load_app_module, qt_app, write_test_image
+
+
+def run_concurrently(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def bench_singleflight(workdir, submissions=8):
+    from PyQt6.QtCore import Qt
+    app_module = load_app_module()
+    image_path = write_test_image(os.path.join(workdir, "duplicate.jpg"))
+    previous_url = app_module.API_URL
+    with StubAPIServer(latency=0.3) as server:
+        app_module.API_URL = server.url
+        try:
+            completed = []
+            analysis_threads = []
+            for _ in range(submissions):
+                analysis_thread = app_module.AnalysisThread(image_path)
+                analysis_thread.analysis_complete.connect(completed.append, Qt.ConnectionType.DirectConnection)
+                analysis_threads.append(analysis_thread)
+            elapsed = run_concurrently([analysis_thread.run for analysis_thread in analysis_threads])
+        finally:
+            app_module.API_URL = previous_url
+    result = {
+        "submissions": submissions,
+        "upstream_requests": server.request_count,
+        "completed": len(completed),
+        "elapsed": elapsed,
+        "metric": "elapsed",
+    }
+    if server.request_count != 1 or len(completed) != submissions:
+        raise AssertionError(f"single-flight expected 1 upstream request and {submissions} results, got {result}")
+    return result
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_streaming_body_memory(workdir, image_bytes=8 * 1024 * 1024):
+    import base64
+    import json
+    app_module = load_app_module()
+    image_path = os.path.join(workdir, "large.jpg")
+    with open(image_path, "wb") as file:
+        file.write(os.urandom(image_bytes))
+
+    def full_copies():
+        # What the client did before: raw bytes, base64 bytes, str, then the json= serialization
+        with open(image_path, "rb") as file:
+            encoded = base64.b64encode(file.read()).decode('utf-8')
+        data = {"contents": [{"parts": [{"text": app_module.ANALYSIS_PROMPT},
+                                        {"inline_data": {"mime_type": "image/jpeg", "data": encoded}}]}]}
+        json.dumps(data).encode('utf-8')
+
+    def streaming():
+        body = app_module.StreamingRequestBody([{"text": app_module.ANALYSIS_PROMPT}, (image_path, "image/jpeg")])
+        for _ in body:
+            pass
+
+    def end_to_end():
+        analysis_thread = app_module.AnalysisThread(image_path)
+        analysis_thread.run()
+
+    previous_url = app_module.API_URL
+    with StubAPIServer() as server:
+        app_module.API_URL = server.url
+        try:
+            end_to_end()
+            analysis_peak = peak_memory(end_to_end)
+        finally:
+            app_module.API_URL = previous_url
+    started = time.perf_counter()
+    streaming_peak = peak_memory(streaming)
+    elapsed = time.perf_counter() - started
+    return {
+        "image_bytes": image_bytes,
+        "full_copies_peak_bytes": peak_memory(full_copies),
+        "streaming_peak_bytes": streaming_peak,
+        "analysis_run_peak_bytes": analysis_peak,
+        "streaming_seconds": elapsed,
+        "metric": "streaming_peak_bytes",
+    }
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {f"p{q}": ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] for q in (50, 95, 99)}
+
+
+def bench_hedged_tail_latency(workdir, requests_per_run=200, warmup=30):
+    app_module = load_app_module()
+
+    def tail_latency(seed):
+        rng = random.Random(seed)
+        lock = threading.Lock()
+
+        def latency():
+            # 4% of responses land in a slow tail an order of magnitude above the median
+            with lock:
+                return rng.uniform(0.2, 0.4) if rng.random() < 0.04 else rng.uniform(0.01, 0.03)
+        return latency
+
+    data = {"contents": [{"parts": [{"text": "stub"}]}]}
+    headers = {"Content-Type": "application/json"}
+    result = {}
+    with StubAPIServer(latency=tail_latency(1)) as primary, StubAPIServer(latency=tail_latency(2)) as alternate:
+        for hedging in (False, True):
+            router = app_module.ModelRouter([primary.url, alternate.url], hedging=hedging)
+            for _ in range(warmup):
+                router.post(data, headers, payload_bytes=10 ** 9, estimated_tokens=1)
+            samples = []
+            for _ in range(requests_per_run):
+                started = time.perf_counter()
+                router.post(data, headers, payload_bytes=10 ** 9, estimated_tokens=1)
+                samples.append(time.perf_counter() - started)
+            label = "hedged" if hedging else "unhedged"
+            result[label] = percentiles(samples)
+            result[label]["hedges_sent"] = router.hedges_sent
+            result[label]["hedges_won"] = router.hedges_won
+            router.executor.shutdown(wait=True)
+    result["hedged_p99"] = result["hedged"]["p99"]
+    result["metric"] = "hedged_p99"
+    result["p99_reduction"] = 1 - result["hedged"]["p99"] / result["unhedged"]["p99"]
+    return result
+
+
+BENCHMARKS = [
+    ("singleflight_identical_submissions", bench_singleflight),
+    ("hedged_tail_latency", bench_hedged_tail_latency),
+    ("streaming_body_peak_memory", bench_streaming_body_memory),
+]
+
+
+def run(selected=None):
+    qt_app()
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, func in BENCHMARKS:
+            if selected and name not in selected:
+                continue
+            results[name] = func(workdir)
+            print(f"{name:45s} {results[name]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis client benchmarks against local stub APIs")
+    parser.add_argument("--only", nargs="+", help="run only the named benchmarks")
+    add_output_arguments(parser, "api")
+    args = parser.parse_args()
+
+    finish_run("api", run(args.only), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import StubS3Server, add_output_arguments, finish_run, generate_dataset, load_app_module, measure
+
+
+def retained_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        value = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, value
+    finally:
+        tracemalloc.stop()
+
+
+def bench_tracker_memory(dataset, years, repeat):
+    app_module = load_app_module()
+    exercise_json = json.dumps(dataset["exercise_data.json"])
+    sleep_json = json.dumps(dataset["sleep_data.json"])
+
+    dict_bytes, _ = retained_bytes(lambda: (json.loads(exercise_json), json.loads(sleep_json)))
+    columnar_bytes, _ = retained_bytes(lambda: (
+        app_module.ExerciseColumns.from_dict(json.loads(exercise_json)),
+        app_module.SleepColumns.from_dict(json.loads(sleep_json)),
+    ))
+    return {"dict_bytes": dict_bytes, "columnar_bytes": columnar_bytes,
+            "ratio": columnar_bytes / dict_bytes, "metric": "columnar_bytes"}
+
+
+def bench_range_query(dataset, years, repeat):
+    app_module = load_app_module()
+    exercise_data = dataset["exercise_data.json"]
+    table = app_module.ExerciseColumns.from_dict(exercise_data)
+    start, end = "2024-03-01", "2024-03-31"
+
+    def dict_scan():
+        # What a range query costs against the date-keyed dicts: parse, filter and sort every key
+        return [exercise for date in sorted(exercise_data)
+                if start <= date <= end for exercise in exercise_data[date]]
+
+    def columnar():
+        return table.between(start, end)
+
+    if len(dict_scan()) != len(columnar()):
+        raise AssertionError("columnar range query disagrees with dict scan")
+    result = measure(columnar, repeat * 20)
+    result["dict_scan_median"] = measure(dict_scan, repeat)["median"]
+    return result
+
+
+def bench_calorie_engine(dataset, years, repeat):
+    app_module = load_app_module()
+    exercise_data = dataset["exercise_data.json"]
+    table = app_module.ExerciseColumns.from_dict(exercise_data)
+
+    def per_entry():
+        engine = app_module.CalorieEngine(72.5)
+        return sum(engine.met(exercise["type"], exercise["intensity"]) * 72.5 * exercise["duration"] / 60
+                   for date in exercise_data for exercise in exercise_data[date])
+
+    def vectorized():
+        engine = app_module.CalorieEngine(72.5)
+        return engine.burned_between(table, "0001-01-01", "9999-12-31")
+
+    if abs(per_entry() - vectorized()) > 1e-6 * per_entry():
+        raise AssertionError("vectorized calorie burn disagrees with per-entry loop")
+    engine = app_module.CalorieEngine(72.5)
+    engine.table_burns(table)
+    result = measure(vectorized, repeat)
+    result["entries"] = len(table)
+    result["per_entry_median"] = measure(per_entry, repeat)["median"]
+    result["cached_range_median"] = measure(
+        lambda: engine.burned_between(table, "2024-03-01", "2024-03-31"), repeat * 20)["median"]
+    return result
+
+
+def bench_sleep_queries(dataset, years, repeat):
+    app_module = load_app_module()
+    sleep_data = dataset["sleep_data.json"]
+    table = app_module.SleepColumns.from_dict(sleep_data)
+    end_date, weeks = "2024-12-31", 52 * years
+
+    def dict_scan():
+        # Weekly debt the naive way: re-derive every night's duration for each week
+        debts = []
+        for week in reversed(range(weeks)):
+            last = app_module.day_ordinal(end_date) - 7 * week
+            nights = [app_module.ordinal_date(last - offset) for offset in range(7)]
+            slept = 0
+            for night in nights:
+                for session in app_module.sleep_sessions(sleep_data.get(night)):
+                    _, start, end = app_module.SleepColumns.span(night, session)
+                    slept += end - start
+            debts.append(7 * app_module.SLEEP_TARGET_MINUTES - slept)
+        return debts
+
+    def interval_index():
+        return [debt for _, debt in table.weekly_debt(end_date, weeks)]
+
+    if dict_scan() != interval_index():
+        raise AssertionError("interval index weekly debt disagrees with dict scan")
+    window_start = app_module.day_ordinal("2024-06-01") * 1440
+    result = measure(interval_index, repeat)
+    result["weeks"] = weeks
+    result["dict_scan_median"] = measure(dict_scan, repeat)["median"]
+    result["window_query_median"] = measure(
+        lambda: table.minutes_in_window(window_start, window_start + 30 * 1440), repeat * 20)["median"]
+    return result
+
+
+def bench_water_log(dataset, years, repeat):
+    from datetime import datetime, timedelta
+    app_module = load_app_module()
+    result = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = app_module.DataStore(directory)
+        log_path = os.path.join(directory, "water_log.jsonl")
+        first_day = datetime(2024, 12, 31) - timedelta(days=365 * years)
+        with open(log_path, "w") as file:
+            for day in range(365 * years):
+                for hour in (8, 10, 12, 15, 18, 21):
+                    stamp = (first_day + timedelta(days=day, hours=hour)).isoformat(timespec="seconds")
+                    file.write(json.dumps({"ts": stamp, "glasses": 1}) + "\n")
+        result["events"] = 365 * years * 6
+        result["full_replay"] = measure(lambda: app_module.WaterLog(log_path, store).load(), repeat)["median"]
+        log = app_module.WaterLog(log_path, store).load()
+        log.checkpoint()
+        result["checkpoint_load"] = measure(lambda: app_module.WaterLog(log_path, store).load(), repeat)["median"]
+
+        def page_year():
+            return [log.month(2024, month) for month in range(1, 13)]
+        result.update(measure(page_year, repeat))
+    return result
+
+
+def bench_history_memory(dataset, years, repeat):
+    # Retained memory after browsing every analysis: the old in-memory list against the store plus its LRU
+    import random
+    app_module = load_app_module()
+    analyses = 2000 * years
+    text = "Estimated 650 kcal. Grilled chicken, rice and vegetables; add a portion of fruit. " * 24
+    entries = [{"image_path": f"/photos/meal-{index}.jpg", "result": f"Analysis {index}: {text}",
+                "created": f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}T12:00:00", "dhash": index * 7919}
+               for index in range(analyses)]
+    result = {"analyses": analyses}
+    with tempfile.TemporaryDirectory() as directory:
+        store = app_module.DataStore(directory)
+        store.save("analysis_history", entries)
+        path = os.path.join(directory, app_module.HISTORY_DB_PATH)
+        app_module.HistoryStore(path).migrate(store)
+
+        def browse(history):
+            for index in range(len(history)):
+                history[index]
+            return history
+        result["list_bytes"], _ = retained_bytes(
+            lambda: browse([(entry["image_path"], entry["result"]) for entry in json.loads(json.dumps(entries))]))
+        result["store_bytes"], history = retained_bytes(lambda: browse(app_module.HistoryStore(path)))
+        positions = [random.randrange(analyses) for _ in range(1000)]
+        result.update(measure(lambda: [history[index] for index in positions], repeat))
+    return result
+
+
+def bench_bulk_export_import(dataset, years, repeat):
+    app_module = load_app_module()
+    result = {}
+    with tempfile.TemporaryDirectory() as directory:
+        source = app_module.DataStore(os.path.join(directory, "source"))
+        os.makedirs(source.directory)
+        for name, content in dataset.items():
+            source.save(name[:-len(".json")], content)
+        formats = [name for name in app_module.EXPORT_FORMATS
+                   if name != "parquet" or importlib.util.find_spec("pyarrow") is not None]
+        for file_format in formats:
+            paths = {tracker: os.path.join(directory, f"{tracker}.{file_format}") for tracker in app_module.TRACKER_FIELDS}
+
+            def export_all():
+                return sum(app_module.export_tracker(tracker, path, file_format, source) for tracker, path in paths.items())
+
+            def import_all():
+                target = app_module.DataStore(tempfile.mkdtemp(dir=directory))
+                return sum(app_module.import_tracker(tracker, path, file_format, target)["imported"]
+                           for tracker, path in paths.items())
+            rows = export_all()
+            result[file_format] = {"rows": rows, "export": measure(export_all, repeat)["median"],
+                                   "import": measure(import_all, repeat)["median"]}
+    result["slowest_import"] = max(stats["import"] for stats in result.values())
+    result["metric"] = "slowest_import"
+    return result
+
+
+def bench_backup(dataset, years, repeat):
+    app_module = load_app_module()
+    result = {}
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "data")
+        os.makedirs(source)
+        store = app_module.DataStore(source)
+        for name, content in dataset.items():
+            store.save(name[:-len(".json")], content)
+        targets = {"local": lambda: app_module.LocalBackupTarget(tempfile.mkdtemp(dir=directory))}
+        if importlib.util.find_spec("boto3") is not None:
+            targets["s3_stub"] = lambda: app_module.S3BackupTarget(f"s3://bench/{len(os.listdir(directory))}",
+                                                                   endpoint_url=stub.url)
+        with StubS3Server() as stub:
+            for name, make_target in targets.items():
+                manager = app_module.BackupManager(source, make_target())
+                started = time.perf_counter()
+                _, full = manager.backup()
+                full_seconds = time.perf_counter() - started
+                # A week of new exercise: the snapshot changes near its end, most chunks should be reused
+                exercise = dataset["exercise_data.json"]
+                store.save("exercise_data", dict(exercise, **{f"2025-01-0{day}": [
+                    {"type": "Running", "duration": 30, "intensity": "High"}] for day in range(1, 8)}))
+                started = time.perf_counter()
+                _, incremental = manager.backup()
+                result[name] = {"full": full_seconds, "full_bytes": full["uploaded_bytes"],
+                                "incremental": time.perf_counter() - started,
+                                "incremental_bytes": incremental["uploaded_bytes"],
+                                "incremental_reused_chunks": incremental["reused_chunks"],
+                                "unchanged": measure(manager.backup, repeat)["median"]}
+                store.save("exercise_data", exercise)
+    result["local_incremental"] = result["local"]["incremental"]
+    result["metric"] = "local_incremental"
+    return result
+
+
+def bench_snapshot_backends(dataset, years, repeat):
+    app_module = load_app_module()
+    payload = {name[:-len(".json")]: content for name, content in dataset.items()}
+    result = {}
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, "legacy.json")
+
+        def legacy_save():
+            with open(legacy_path, "w") as file:
+                json.dump(payload, file)
+
+        def legacy_load():
+            with open(legacy_path, "r") as file:
+                return json.load(file)
+        legacy_save()
+        size = os.path.getsize(legacy_path)
+        result["stdlib_json_file"] = {"save": measure(legacy_save, repeat)["median"],
+                                      "load": measure(legacy_load, repeat)["median"], "bytes": size}
+
+        for backend in app_module.snapshot_backends():
+            store = app_module.DataStore(directory, backend)
+            store.save("meal_plans", payload)
+            if store.load("meal_plans", None) != payload:
+                raise AssertionError(f"{backend} snapshot did not round-trip")
+            result[backend] = {
+                "save": measure(lambda: store.save("meal_plans", payload), repeat)["median"],
+                "load": measure(lambda: store.load("meal_plans", None), repeat)["median"],
+                "bytes": os.path.getsize(store.snapshot_path("meal_plans")),
+            }
+    for name, stats in result.items():
+        stats["load_mb_per_s"] = size / stats["load"] / 1e6
+        stats["load_speedup"] = result["stdlib_json_file"]["load"] / stats["load"]
+    result["fastest_load"] = min(stats["load"] for name, stats in result.items() if isinstance(stats, dict))
+    result["metric"] = "fastest_load"
+    return result
+
+
+BENCHMARKS = [
+    ("tracker_memory", bench_tracker_memory),
+    ("exercise_range_query", bench_range_query),
+    ("calorie_engine", bench_calorie_engine),
+    ("sleep_interval_queries", bench_sleep_queries),
+    ("water_log", bench_water_log),
+    ("snapshot_backends", bench_snapshot_backends),
+    ("history_memory", bench_history_memory),
+    ("bulk_export_import", bench_bulk_export_import),
+    ("backup", bench_backup),
+]
+
+
+def run(years_list, repeat, selected=None):
+    results = {}
+    for years in years_list:
+        dataset = generate_dataset(years)
+        for name, func in BENCHMARKS:
+            if selected and name not in selected:
+                continue
+            key = f"{name}[{years}y]"
+            results[key] = func(dataset, years, repeat)
+            print(f"{key:45s} {results[key]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory tracker model and serialization benchmarks")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10, 20])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="run only the named benchmarks")
+    add_output_arguments(parser, "storage")
+    args = parser.parse_args()
+
+    finish_run("storage", run(args.years, args.repeat, args.only), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import (DatasetDirectory, StubAPIServer, add_output_arguments, finish_run, load_app_module, measure,
+                    qt_app, write_test_image)
+
+
+def bench_exercise_round_trip(window, years, repeat):
+    def round_trip():
+        window.save_exercise_data("2024-12-31", {"type": "Running", "duration": 30, "intensity": "Medium"})
+        window.load_exercise_data()
+    return measure(round_trip, repeat)
+
+
+def bench_exercise_history(window, years, repeat):
+    return measure(window.update_exercise_history, repeat)
+
+
+def bench_sleep_history(window, years, repeat):
+    return measure(window.update_sleep_history, repeat)
+
+
+def bench_meal_plan_lookup(window, years, repeat):
+    from PyQt6.QtCore import QDate
+    dates = [QDate(2024, 12, 31).addDays(-offset) for offset in range(0, 365, 7)]
+
+    def navigate():
+        for day in dates:
+            # selectionChanged drives update_meal_plan, as it does for a user clicking through the calendar
+            window.meal_calendar.setSelectedDate(day)
+    result = measure(navigate, repeat)
+    result["lookups"] = len(dates)
+    return result
+
+
+def bench_startup(window, years, repeat):
+    app_module = load_app_module()
+    app = qt_app()
+
+    def startup():
+        started = app_module.HealthAssistant()
+        started.show()
+        app.processEvents()
+        started.close()
+        started.deleteLater()
+        app.processEvents()
+    return measure(startup, repeat)
+
+
+def wait_until_hydrated(window, app, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while window.time_to_interactive is None and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def bench_time_to_interactive(window, years, repeat):
+    app_module = load_app_module()
+    app = qt_app()
+
+    def time_to_interactive():
+        started = app_module.HealthAssistant()
+        started.show()
+        wait_until_hydrated(started, app)
+        started.close()
+        started.deleteLater()
+        app.processEvents()
+    return measure(time_to_interactive, repeat)
+
+
+def bench_reminder_scheduler(window, years, repeat):
+    # Thousands of recurring reminders on one heap, driven through a simulated day by a virtual clock
+    from datetime import datetime
+    app_module = load_app_module()
+    start = datetime(2024, 1, 1)
+    rules = ["FREQ=DAILY;BYHOUR=9,11,13,15,17,19;BYMINUTE={minute}", "FREQ=HOURLY;INTERVAL=2",
+             "FREQ=WEEKLY;BYDAY=MO,WE,FR;BYHOUR=18;BYMINUTE={minute}", "FREQ=MINUTELY;INTERVAL=30"]
+    reminders = 2500 * years
+    fired = []
+
+    def simulate_day():
+        # Only the last run is counted; measure() also runs a warmup
+        fired.clear()
+        clock = app_module.VirtualClock(start)
+        scheduler = app_module.ReminderScheduler(clock)
+        scheduler.reminder_due.connect(fired.append)
+        for index in range(reminders):
+            rule = rules[index % len(rules)].format(minute=index % 60)
+            scheduler.add(app_module.Reminder(f"r{index}", "Reminder", "", rule, start))
+        for _ in range(24 * 60):
+            clock.advance(60)
+            scheduler.run_pending()
+    result = measure(simulate_day, repeat)
+    result["reminders"] = reminders
+    result["fired_per_day"] = len(fired)
+    return result
+
+
+def bench_monthly_reports(window, years, repeat):
+    import shutil
+    from datetime import date
+    app = qt_app()
+    app_module = load_app_module()
+
+    def generate():
+        window.generate_reports("monthly", 12, date(2024, 12, 31))
+        while window.reports_pending:
+            app.processEvents()
+            time.sleep(0.001)
+
+    def cold():
+        # Drop both the rendered chart cache and the report index so every chart and file is rebuilt
+        shutil.rmtree(app_module.REPORTS_DIRECTORY, ignore_errors=True)
+        window.report_renderer = None
+        generate()
+    result = measure(cold, repeat)
+    result["unchanged_median"] = measure(generate, repeat)["median"]
+    result["reports"] = 12
+    return result
+
+
+def bench_analysis_path(window, years, repeat):
+    app_module = load_app_module()
+    image_path = write_test_image(os.path.abspath("bench_meal.jpg"))
+    previous_url = app_module.API_URL
+    with StubAPIServer() as server:
+        app_module.API_URL = server.url
+        try:
+            results = []
+
+            def analyze():
+                thread = app_module.AnalysisThread(image_path)
+                thread.analysis_complete.connect(results.append)
+                thread.run()
+            result = measure(analyze, repeat)
+        finally:
+            app_module.API_URL = previous_url
+    result["completed"] = len(results)
+    return result
+
+
+BENCHMARKS = [
+    ("exercise_round_trip", bench_exercise_round_trip),
+    ("update_exercise_history", bench_exercise_history),
+    ("update_sleep_history", bench_sleep_history),
+    ("update_meal_plan_navigation", bench_meal_plan_lookup),
+    ("startup", bench_startup),
+    ("time_to_interactive", bench_time_to_interactive),
+    ("reminder_scheduler", bench_reminder_scheduler),
+    ("monthly_reports", bench_monthly_reports),
+    ("analysis_path_stub_api", bench_analysis_path),
+]
+
+
+def run(years_list, repeat, selected=None):
+    app_module = load_app_module()
+    app = qt_app()
+    results = {}
+    for years in years_list:
+        with DatasetDirectory(years):
+            window = app_module.HealthAssistant()
+            wait_until_hydrated(window, app)
+            for name, func in BENCHMARKS:
+                if selected and name not in selected:
+                    continue
+                key = f"{name}[{years}y]"
+                started = time.perf_counter()
+                results[key] = func(window, years, repeat)
+                print(f"{key:45s} median {results[key]['median'] * 1000:10.3f} ms "
+                      f"({time.perf_counter() - started:.1f}s)")
+            window.close()
+            window.deleteLater()
+            app.processEvents()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracker persistence and UI hot path benchmarks")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="run only the named benchmarks")
+    add_output_arguments(parser, "tracker")
+    args = parser.parse_args()
+
+    finish_run("tracker", run(args.years, args.repeat, args.only), args)
+
+
+if __name__ == "__main__":
+    main()
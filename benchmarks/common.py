@@ -0,0 +1,340 @@
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+EXERCISE_TYPES = ['Running', 'Cycling', 'Swimming', 'Weight Training', 'Yoga']
+INTENSITIES = ['Low', 'Medium', 'High']
+SLEEP_QUALITIES = ['Poor', 'Fair', 'Good', 'Excellent']
+MEALS = ['oatmeal with berries', 'grilled salmon', 'chicken salad', 'rice and beans',
+         'greek yogurt', 'pasta primavera', 'apple', 'almonds', 'vegetable soup', 'eggs and toast']
+
+_app_module = None
+_qt_app = None
+
+
+def load_app_module():
+    global _app_module
+    if _app_module is None:
+        spec = importlib.util.spec_from_file_location("ai_health", os.path.join(REPO_ROOT, "AI-Health.py"))
+        _app_module = importlib.util.module_from_spec(spec)
+        sys.modules["ai_health"] = _app_module
+        spec.loader.exec_module(_app_module)
+        # Benchmarks must never be shaped by the production quota
+        _app_module.quota_limiter = _app_module.QuotaLimiter(10 ** 9, 10 ** 12)
+        # ...and must never hedge to the real API while pointed at a stub
+        _app_module.API_HEDGE_URLS = []
+    return _app_module
+
+
+def qt_app():
+    global _qt_app
+    from PyQt6.QtWidgets import QApplication
+    _qt_app = QApplication.instance() or QApplication([])
+    return _qt_app
+
+
+def generate_dataset(years, seed=1234):
+    rng = random.Random(seed)
+    end = date(2024, 12, 31)
+    start = end - timedelta(days=int(365.25 * years) - 1)
+    exercise, sleep, water, meal_plans = {}, {}, {}, {}
+    day = start
+    while day <= end:
+        key = day.isoformat()
+        sessions = rng.choice([0, 1, 1, 2])
+        if sessions:
+            exercise[key] = [{
+                "type": rng.choice(EXERCISE_TYPES),
+                "duration": rng.randint(10, 120),
+                "intensity": rng.choice(INTENSITIES),
+            } for _ in range(sessions)]
+        bedtime = rng.randint(21 * 60, 24 * 60 + 60) % (24 * 60)
+        wake = (bedtime + rng.randint(300, 560)) % (24 * 60)
+        sleep[key] = {
+            "sleep_time": f"{bedtime // 60:02d}:{bedtime % 60:02d}",
+            "wake_time": f"{wake // 60:02d}:{wake % 60:02d}",
+            "quality": rng.choice(SLEEP_QUALITIES),
+        }
+        water[key] = {"goal": 8, "intake": rng.randint(2, 12)}
+        meal_plans[key] = {meal: rng.choice(MEALS) for meal in ['Breakfast', 'Lunch', 'Dinner', 'Snacks']}
+        day += timedelta(days=1)
+    return {
+        "user_data.json": {"name": "Bench", "age": 35, "gender": "Other", "height": 175, "weight": 72.5},
+        "exercise_data.json": exercise,
+        "sleep_data.json": sleep,
+        "water_data.json": water,
+        "meal_plans.json": meal_plans,
+    }
+
+
+def write_dataset(directory, dataset):
+    for name, content in dataset.items():
+        with open(os.path.join(directory, name), "w") as file:
+            json.dump(content, file)
+
+
+class DatasetDirectory:
+    def __init__(self, years):
+        self.years = years
+        self.dataset = generate_dataset(years)
+
+    def __enter__(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.previous_cwd = os.getcwd()
+        write_dataset(self.tempdir.name, self.dataset)
+        os.chdir(self.tempdir.name)
+        return self
+
+    def __exit__(self, *exc):
+        os.chdir(self.previous_cwd)
+        self.tempdir.cleanup()
+
+
+def write_test_image(path, size=640):
+    from PyQt6.QtGui import QImage, QColor
+    image = QImage(size, size, QImage.Format.Format_RGB32)
+    image.fill(QColor(200, 120, 60))
+    image.save(path, "JPEG")
+    return path
+
+
+class StubAPIServer:
+    def __init__(self, latency=0.0, text="Stub analysis: about 450 kcal."):
+        self.latency = latency
+        self.text = text
+        self.request_count = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    # Drain in small pieces so the stub does not show up in client memory benchmarks
+                    while length > 0:
+                        length -= len(self.rfile.read(min(length, 65536)))
+                else:
+                    while True:
+                        size = int(self.rfile.readline().strip() or b"0", 16)
+                        self.rfile.read(size + 2)
+                        if size == 0:
+                            break
+                with server.lock:
+                    server.request_count += 1
+                delay = server.latency() if callable(server.latency) else server.latency
+                if delay:
+                    time.sleep(delay)
+                body = json.dumps({
+                    "candidates": [{"content": {"parts": [{"text": server.text}]}}],
+                    "usageMetadata": {"promptTokenCount": 300, "candidatesTokenCount": 120, "totalTokenCount": 420},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1beta/models/stub:generateContent"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StubS3Server:
+    # In-memory, path-style S3 stand-in (PUT/GET/HEAD object, ListObjectsV2) in the spirit of a local MinIO;
+    # requests are not authenticated. Point S3BackupTarget at `url` with any credentials.
+    def __init__(self):
+        self.objects = {}
+        self.request_count = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def object_key(self):
+                bucket, _, key = unquote(urlsplit(self.path).path).lstrip("/").partition("/")
+                return bucket, key
+
+            def reply(self, status, body=b"", content_type="application/xml"):
+                with server.lock:
+                    server.request_count += 1
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def read_body(self):
+                if self.headers.get("Content-Length") is not None:
+                    body = self.rfile.read(int(self.headers["Content-Length"]))
+                else:
+                    body = b""
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                        body += self.rfile.read(size + 2)[:size]
+                        if size == 0:
+                            break
+                if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+                    # Newer botocore frames payloads as <hex size>[;ext]\r\n<data>\r\n ... 0\r\n<trailers>
+                    decoded, offset = b"", 0
+                    while True:
+                        line_end = body.index(b"\r\n", offset)
+                        size = int(body[offset:line_end].split(b";")[0], 16)
+                        if size == 0:
+                            break
+                        decoded += body[line_end + 2:line_end + 2 + size]
+                        offset = line_end + 2 + size + 2
+                    body = decoded
+                return body
+
+            def do_PUT(self):
+                body = self.read_body()
+                with server.lock:
+                    server.objects[self.object_key()] = body
+                self.reply(200)
+
+            def do_GET(self):
+                bucket, key = self.object_key()
+                if not key:
+                    prefix = parse_qs(urlsplit(self.path).query).get("prefix", [""])[0]
+                    with server.lock:
+                        keys = sorted(name for (owner, name) in server.objects if owner == bucket and name.startswith(prefix))
+                    contents = "".join(f"<Contents><Key>{escape(name)}</Key><Size>{len(server.objects[(bucket, name)])}</Size></Contents>"
+                                       for name in keys)
+                    self.reply(200, (f'<?xml version="1.0" encoding="UTF-8"?><ListBucketResult><Name>{bucket}</Name>'
+                                     f"<Prefix>{escape(prefix)}</Prefix><KeyCount>{len(keys)}</KeyCount>"
+                                     f"<IsTruncated>false</IsTruncated>{contents}</ListBucketResult>").encode())
+                    return
+                body = server.objects.get((bucket, key))
+                if body is None:
+                    self.reply(404, b"<Error><Code>NoSuchKey</Code></Error>")
+                else:
+                    self.reply(200, body, "application/octet-stream")
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def measure(func, repeat=5, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(suite, results, output=None):
+    revision = git_revision()
+    payload = {
+        "suite": suite,
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{suite}-{revision}.json")
+    with open(output, "w") as file:
+        json.dump(payload, file, indent=2, sort_keys=True)
+    return output
+
+
+def compare_results(baseline_path, current_path, threshold=0.10):
+    with open(baseline_path) as file:
+        baseline = json.load(file)["results"]
+    with open(current_path) as file:
+        current = json.load(file)["results"]
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        # Results compare on the metric they declare ("median" seconds unless stated); *_bytes metrics are sizes
+        metric = current[name].get("metric", "median")
+        before = baseline[name].get(metric)
+        after = current[name].get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        marker = "REGRESSION" if change > threshold else ""
+        if metric.endswith("bytes"):
+            values = f"{before / 1024:10.1f} KB -> {after / 1024:10.1f} KB"
+        else:
+            values = f"{before * 1000:10.3f} ms -> {after * 1000:10.3f} ms"
+        print(f"{name:60s} {metric:20s} {values} {change:+7.1%} {marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def add_output_arguments(parser, suite):
+    parser.add_argument("--output", help=f"results file (default: benchmarks/results/{suite}-<rev>.json)")
+    parser.add_argument("--compare", help="baseline results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+
+
+def finish_run(suite, results, args):
+    # Every suite saves the same way and, given --compare, exits non-zero on a regression past --threshold
+    output = save_results(suite, results, args.output)
+    print(f"Results written to {output}")
+    if args.compare and compare_results(args.compare, output, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import DatasetDirectory, StubAPIServer, load_app_module, save_results, write_test_image
+
+from PyQt6.QtCore import QDate, QEvent, QTimer
+from PyQt6.QtWidgets import QApplication
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui_baseline.json")
+MAX_KNOWN_STALLS = 3
+
+class TimedApplication(QApplication):
+    # Times every event Qt dispatches. A top-level dispatch is one uninterrupted stretch of GUI-thread work,
+    # so its duration is exactly how long the event loop was stalled; paints are timed at any depth.
+    def __init__(self, argv):
+        super().__init__(argv)
+        self.depth = 0
+        self.first_frame = None
+        self.reset()
+
+    def reset(self):
+        self.dispatches = []
+        self.paints = []
+
+    def notify(self, receiver, event):
+        kind = event.type()
+        label = f"{kind.name} -> {type(receiver).__name__}"
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            return super().notify(receiver, event)
+        finally:
+            duration = time.perf_counter() - start
+            self.depth -= 1
+            if kind == QEvent.Type.UpdateRequest:
+                self.paints.append(duration)
+            if self.depth == 0:
+                if kind == QEvent.Type.Expose and self.first_frame is None:
+                    # The window's first frame is startup, like construction: nothing can be clicked before it
+                    self.first_frame = duration
+                else:
+                    self.dispatches.append((duration, label))
+
+
+class Harness:
+    def __init__(self, app, window, budget, settle=0.1, timeout=60.0):
+        self.app = app
+        self.window = window
+        self.budget = budget
+        self.settle = settle
+        self.timeout = timeout
+        self.results = {}
+
+    def pump(self, seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def interact(self, name, *actions, done=None):
+        # Each action is posted to the event loop, as a click or key press would be, then the loop runs
+        # until the interaction's background work is done and trailing timers and paints have drained
+        self.app.reset()
+        started = time.perf_counter()
+        for action in actions:
+            QTimer.singleShot(0, action)
+            self.app.processEvents()
+        deadline = time.perf_counter() + self.timeout
+        while done is not None and not done() and time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.pump(self.settle)
+        stalls = sorted(self.app.dispatches, reverse=True)
+        paints = self.app.paints
+        result = {
+            "actions": len(actions),
+            "completed": done is None or bool(done()),
+            "wall": time.perf_counter() - started,
+            "max_stall": stalls[0][0] if stalls else 0.0,
+            "worst_event": stalls[0][1] if stalls else "",
+            "over_budget": sum(1 for duration, _ in stalls if duration > self.budget),
+            "dispatches": len(stalls),
+            "paints": len(paints),
+            "paint_median": statistics.median(paints) if paints else 0.0,
+            "paint_max": max(paints) if paints else 0.0,
+            "metric": "max_stall",
+        }
+        self.results[name] = result
+        flag = "" if result["completed"] else "  (did not complete)"
+        if result["over_budget"]:
+            flag += f"  OVER BUDGET x{result['over_budget']}"
+        print(f"{name:32s} max stall {result['max_stall'] * 1000:8.2f} ms  paint max {result['paint_max'] * 1000:7.2f} ms"
+              f"  [{result['worst_event']}]{flag}")
+        return result
+
+
+def write_history(app_module, analyses):
+    text = "Estimated 650 kcal. Grilled chicken, rice and vegetables; add a portion of fruit. " * 12
+    store = app_module.DataStore(".")
+    store.save("analysis_history", [
+        {"image_path": f"meal-{index}.jpg", "result": f"Analysis {index}: {text}",
+         "created": f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}T12:00:00", "dhash": index * 7919}
+        for index in range(analyses)])
+    app_module.HistoryStore().migrate(store)
+
+
+def run_script(harness, app_module, server):
+    window = harness.window
+    # Hydration includes the background search index build, so later interactions are not timed against it
+    harness.interact("hydrate", lambda: None, done=lambda: window.time_to_interactive is not None and (
+        window.search_thread is None or window.search_thread.isFinished()))
+
+    for button in window.nav_buttons:
+        harness.interact(f"tab:{button.text()}", button.click)
+
+    window.switch_tab('Meal Planner')
+    days = [QDate(2024, 12, 31).addDays(-offset) for offset in range(30)]
+    harness.interact("calendar:days", *[lambda day=day: window.meal_calendar.setSelectedDate(day) for day in days])
+    months = [QDate(2024, 12, 15).addMonths(-offset) for offset in range(24)]
+    harness.interact("calendar:months", *[lambda day=day: window.meal_calendar.setSelectedDate(day) for day in months],
+                     done=lambda: bool(window.meal_inputs['Breakfast'].text()))
+
+    window.switch_tab('Water Tracker')
+    harness.interact("water:months", *[lambda: window.page_water_chart(-1) for _ in range(12)])
+
+    window.switch_tab('Exercise Tracker')
+    harness.interact("history:exercise", window.update_exercise_history)
+    window.switch_tab('Sleep Tracker')
+    harness.interact("history:sleep", window.update_sleep_history)
+    window.switch_tab('Image Analysis')
+    harness.interact("history:scroll", *[window.history_list.scrollToBottom for _ in range(10)])
+    if window.search_thread is not None:
+        window.search_thread.wait()
+    harness.interact("history:search_index", lambda: setattr(window, "search_index", app_module.SearchIndex(":memory:")),
+                     window.rebuild_search_index, done=lambda: window.search_thread.isFinished())
+
+    window.switch_tab('Search')
+    harness.interact("search", lambda: window.search_input.setText("salmon"),
+                     done=lambda: window.search_results.count() > 0)
+
+    window.switch_tab('Image Analysis')
+    analyses = len(window.history)
+    window.image_path = write_test_image(os.path.abspath("harness_meal.jpg"))
+    harness.interact("analysis:stub_api", window.analyze_image, done=lambda: len(window.history) > analyses)
+    if server.request_count == 0:
+        harness.results["analysis:stub_api"]["completed"] = False
+
+
+def load_baseline(path):
+    # Known stalls are an exception list, not a ratchet: it is capped, and every entry names the
+    # follow-up that will bring its interaction back under budget
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        known = json.load(file)["known_stalls"]
+    if len(known) > MAX_KNOWN_STALLS:
+        sys.exit(f"{path}: {len(known)} known stalls, at most {MAX_KNOWN_STALLS} are allowed; fix one first")
+    for name, entry in known.items():
+        if not entry.get("follow_up"):
+            sys.exit(f"{path}: known stall '{name}' does not name its follow-up")
+    return {name: entry["max_stall_ms"] for name, entry in known.items()}
+
+
+def violations(results, budget_ms, baseline):
+    # An interaction fails when it does not complete, or stalls past both the budget and its recorded
+    # known-stall ceiling: the gate catches new regressions while the known stalls are worked down
+    failures = []
+    for name, result in results.items():
+        if result.get("completed") is False:
+            failures.append(f"{name} (did not complete)")
+            continue
+        stall = result.get("max_stall", 0.0) * 1000
+        if stall > max(budget_ms, baseline.get(name, 0)):
+            allowed = f"known-stall ceiling {baseline[name]} ms" if name in baseline else f"budget {budget_ms:g} ms"
+            failures.append(f"{name} ({stall:.1f} ms > {allowed})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted offscreen UI run that fails on event-loop stalls")
+    parser.add_argument("--years", type=int, default=20, help="years of synthetic tracker data")
+    parser.add_argument("--analyses", type=int, default=5000, help="analyses in the synthetic history")
+    parser.add_argument("--budget-ms", type=float, default=16.0, help="longest allowed event-loop stall")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/ui-<rev>.json)")
+    parser.add_argument("--profile", help="also write a speedscope profile of the run to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="known stalls allowed past the budget (default: benchmarks/ui_baseline.json); "
+                             "pass '' to hold every interaction to the budget")
+    args = parser.parse_args()
+    profile = os.path.abspath(args.profile) if args.profile else None
+
+    app = TimedApplication([])
+    app_module = load_app_module()
+    with DatasetDirectory(args.years), StubAPIServer(latency=0.2) as server:
+        previous_url = app_module.API_URL
+        app_module.API_URL = server.url
+        write_history(app_module, args.analyses)
+        if profile:
+            app_module.sampling_profiler.start()
+        try:
+            started = time.perf_counter()
+            window = app_module.HealthAssistant()
+            window.show()
+            construction = time.perf_counter() - started
+            print(f"{'construct_window':32s} {construction * 1000:8.2f} ms (before the event loop, not budgeted)")
+            harness = Harness(app, window, args.budget_ms / 1000)
+            run_script(harness, app_module, server)
+            harness.results["construct_window"] = {"wall": construction, "metric": "wall"}
+            harness.results["first_frame"] = {"wall": app.first_frame or 0.0, "metric": "wall"}
+            print(f"{'first_frame':32s} {(app.first_frame or 0.0) * 1000:8.2f} ms (startup, not budgeted)")
+            window.close()
+            window.deleteLater()
+            app.processEvents()
+        finally:
+            app_module.API_URL = previous_url
+            if profile:
+                app_module.sampling_profiler.stop()
+                app_module.sampling_profiler.export_speedscope(profile)
+
+    output = save_results("ui", harness.results, args.output)
+    print(f"Results written to {output}")
+    failures = violations(harness.results, args.budget_ms, load_baseline(args.baseline))
+    if failures:
+        print(f"{len(failures)} interaction(s) failed the event-loop budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
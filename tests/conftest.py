@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from common import load_app_module, qt_app
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    return load_app_module()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    return qt_app()
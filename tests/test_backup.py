@@ -0,0 +1,122 @@
+import hashlib
+import importlib.util
+import os
+import random
+import time
+
+import pytest
+
+from common import StubS3Server
+
+
+def chunk_digests(app_module, data):
+    return [hashlib.sha256(chunk).hexdigest() for chunk in app_module.content_chunks(data)]
+
+
+def random_bytes(size, seed=7):
+    return random.Random(seed).randbytes(size)
+
+
+def test_gear_table_is_not_constant(app_module):
+    assert len(set(app_module.GEAR)) == 256
+
+
+def test_insert_early_in_file_reuses_most_chunks(app_module):
+    data = random_bytes(1024 * 1024)
+    before = chunk_digests(app_module, data)
+    after = chunk_digests(app_module, data[:1000] + b"hello" + data[1000:])
+    reused = len(set(before) & set(after))
+    assert len(before) > 50
+    assert reused >= len(before) - 3
+
+
+def write_files(directory, files):
+    for name, data in files.items():
+        with open(os.path.join(directory, name), "wb") as file:
+            file.write(data)
+
+
+def read_files(directory):
+    files = {}
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name), "rb") as file:
+            files[name] = file.read()
+    return files
+
+
+def test_backup_reuses_chunks_after_insert(app_module, tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    data = random_bytes(512 * 1024)
+    write_files(source, {"water_log.jsonl": data})
+    manager = app_module.BackupManager(str(source), app_module.LocalBackupTarget(str(tmp_path / "backups")))
+    _, first = manager.backup()
+    write_files(source, {"water_log.jsonl": data[:100] + b"inserted" + data[100:]})
+    _, second = manager.backup()
+    assert second["reused_chunks"] >= first["new_chunks"] - 3
+    assert second["uploaded_bytes"] < first["uploaded_bytes"] / 4
+
+
+def test_restore_round_trip_at_moment(app_module, tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    original = {"exercise_data.snap": random_bytes(100000, 1), "water_log.jsonl": b'{"glasses": 1}\n' * 50}
+    write_files(source, original)
+    manager = app_module.BackupManager(str(source), app_module.LocalBackupTarget(str(tmp_path / "backups")))
+    first, _ = manager.backup()
+    # Snapshot ids have one-second resolution; make sure the second one lands in a later second
+    time.sleep(1.1)
+    write_files(source, {"exercise_data.snap": original["exercise_data.snap"][:5000] + b"edit",
+                         "sleep_data.snap": b"new file"})
+    second, _ = manager.backup()
+    assert manager.snapshots() == [first, second]
+
+    moment = app_module.datetime.strptime(first[:15], "%Y%m%dT%H%M%S")
+    snapshot, names = manager.restore(str(tmp_path / "old"), moment)
+    assert snapshot == first
+    assert names == sorted(original)
+    assert read_files(tmp_path / "old") == original
+
+    snapshot, _ = manager.restore(str(tmp_path / "new"))
+    assert snapshot == second
+    assert read_files(tmp_path / "new") == read_files(source)
+
+
+def test_restore_before_first_backup_fails(app_module, tmp_path):
+    manager = app_module.BackupManager(str(tmp_path), app_module.LocalBackupTarget(str(tmp_path / "backups")))
+    with pytest.raises(FileNotFoundError):
+        manager.restore(str(tmp_path / "out"), app_module.datetime(2000, 1, 1))
+
+
+@pytest.mark.skipif(importlib.util.find_spec("boto3") is None, reason="S3 backups need boto3")
+def test_s3_backup_round_trip(app_module, tmp_path, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    source = tmp_path / "source"
+    source.mkdir()
+    original = {"water_log.jsonl": random_bytes(200000, 3)}
+    write_files(source, original)
+    with StubS3Server() as server:
+        target = app_module.S3BackupTarget("s3://health/backups", endpoint_url=server.url)
+        manager = app_module.BackupManager(str(source), target)
+        snapshot, stats = manager.backup()
+        assert stats["new_chunks"] > 0
+        assert manager.snapshots() == [snapshot]
+        manager.restore(str(tmp_path / "restored"))
+    assert read_files(tmp_path / "restored") == original
+
+
+def test_history_database_is_backed_up_through_sqlite(app_module, tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    history = app_module.HistoryStore(str(source / app_module.HISTORY_DB_PATH))
+    for index in range(100):
+        history.append(f"meal-{index}.jpg", f"result {index}")
+    manager = app_module.BackupManager(str(source), app_module.LocalBackupTarget(str(tmp_path / "backups")))
+    manager.backup()
+    history.append("late.jpg", "written after the backup")
+    manager.restore(str(tmp_path / "restored"))
+    restored = app_module.HistoryStore(str(tmp_path / "restored" / app_module.HISTORY_DB_PATH))
+    assert len(restored) == 100
+    assert restored[99] == ("meal-99.jpg", "result 99")
@@ -0,0 +1,82 @@
+import builtins
+import json
+
+import pytest
+
+DATA = {"2024-03-01": [{"type": "Running", "duration": 30, "intensity": "High"}]}
+
+
+def without_fast_backends(monkeypatch):
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name in ("orjson", "msgpack"):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+
+
+def test_snapshot_round_trip_for_every_installed_backend(app_module, tmp_path):
+    for backend in app_module.snapshot_backends():
+        store = app_module.DataStore(str(tmp_path), backend=backend)
+        store.save("exercise_data", DATA)
+        assert app_module.DataStore(str(tmp_path)).load("exercise_data", None) == DATA
+
+
+def test_truncated_header_is_rejected(app_module, tmp_path):
+    store = app_module.DataStore(str(tmp_path))
+    blob = store.encode("exercise_data", DATA)
+    with pytest.raises(app_module.SnapshotError, match="truncated"):
+        store.decode("exercise_data", blob[:store.HEADER.size - 1])
+
+
+@pytest.mark.parametrize("damage", [lambda blob: blob[:-1], lambda blob: blob[:-1] + bytes([blob[-1] ^ 1])])
+def test_damaged_payload_fails_the_checksum(app_module, tmp_path, damage):
+    store = app_module.DataStore(str(tmp_path))
+    with pytest.raises(app_module.SnapshotError, match="checksum"):
+        store.decode("exercise_data", damage(store.encode("exercise_data", DATA)))
+
+
+def test_newer_schema_or_format_is_refused(app_module, tmp_path):
+    store = app_module.DataStore(str(tmp_path))
+    blob = store.encode("sleep_data", DATA)
+    payload = blob[store.HEADER.size:]
+    magic, version, code, schema, schema_version, checksum, length = store.HEADER.unpack_from(blob)
+    newer = store.HEADER.pack(magic, version, code, schema, schema_version + 1, checksum, length)
+    with pytest.raises(app_module.SnapshotError, match="newer version"):
+        store.decode("sleep_data", newer + payload)
+    future = store.HEADER.pack(magic, version + 1, code, schema, schema_version, checksum, length)
+    with pytest.raises(app_module.SnapshotError, match="unsupported"):
+        store.decode("sleep_data", future + payload)
+
+
+def test_legacy_json_is_read_and_migrated_on_save(app_module, tmp_path):
+    (tmp_path / "meal_plans.json").write_text(json.dumps({"2024-03-01": {"Dinner": "salmon"}}))
+    store = app_module.DataStore(str(tmp_path))
+    assert store.exists("meal_plans")
+    plans = store.load("meal_plans", {})
+    assert plans == {"2024-03-01": {"Dinner": "salmon"}}
+    store.save("meal_plans", plans)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["meal_plans.json.migrated", "meal_plans.snap"]
+    assert store.load("meal_plans", {}) == plans
+
+
+def test_missing_optional_backends_fall_back_to_json(app_module, tmp_path, monkeypatch):
+    without_fast_backends(monkeypatch)
+    monkeypatch.delenv("HEALTH_SNAPSHOT_BACKEND", raising=False)
+    assert list(app_module.snapshot_backends()) == ["json"]
+    store = app_module.DataStore(str(tmp_path))
+    assert store.backend == "json"
+    store.save("water_data", {"2024-03-01": {"intake": 3, "goal": 8}})
+    assert store.load("water_data", None) == {"2024-03-01": {"intake": 3, "goal": 8}}
+    with pytest.raises(app_module.SnapshotError, match="not installed"):
+        app_module.DataStore(str(tmp_path), backend="msgpack")
+
+
+def test_snapshot_from_an_uninstalled_backend_is_reported(app_module, tmp_path):
+    store = app_module.DataStore(str(tmp_path))
+    blob = store.encode("exercise_data", DATA)
+    magic, version, code, schema, schema_version, checksum, length = store.HEADER.unpack_from(blob)
+    foreign = store.HEADER.pack(magic, version, 9, schema, schema_version, checksum, length)
+    with pytest.raises(app_module.SnapshotError, match="backend 9 is not installed"):
+        store.decode("exercise_data", foreign + blob[store.HEADER.size:])
@@ -0,0 +1,21 @@
+def test_documents_do_not_hold_the_lock_between_pages(app_module, tmp_path):
+    history = app_module.HistoryStore(str(tmp_path / "history.db"))
+    for index in range(app_module.HISTORY_FETCH_ROWS + 5):
+        history.append(f"meal-{index}.jpg", f"result {index}")
+    documents = history.documents()
+    assert next(documents) == ("analysis", 0, "Analysis 1", "result 0")
+    assert not history.lock.locked()
+    history.append("during.jpg", "appended while streaming")
+    assert len(list(documents)) == app_module.HISTORY_FETCH_ROWS + 5
+
+
+def test_migrates_legacy_snapshot_once(app_module, tmp_path):
+    store = app_module.DataStore(str(tmp_path))
+    store.save("analysis_history", [{"image_path": "a.jpg", "result": "salad", "created": "2024-03-01T12:00:00",
+                                     "dhash": 5}])
+    history = app_module.HistoryStore(str(tmp_path / "history.db"))
+    assert history.migrate(store) == 1
+    assert not store.exists("analysis_history")
+    assert history[0] == ("a.jpg", "salad")
+    assert history.hashes() == [(0, 5)]
+    assert history.between("2024-03-01", "2024-03-01") == [("2024-03-01T12:00:00", "salad")]
@@ -0,0 +1,22 @@
+def test_prefetch_decodes_the_meal_plans_once_per_change(app_module, tmp_path, monkeypatch):
+    store = app_module.DataStore(str(tmp_path))
+    monkeypatch.setattr(app_module, "data_store", store)
+    monkeypatch.setattr(app_module.MealPlanPrefetchThread, "cache", (None, {}))
+    store.save("meal_plans", {"2024-01-31": {"Dinner": "soup"}, "2024-02-01": {"Lunch": "salad"},
+                              "2024-04-10": {"Breakfast": "oats"}})
+    loads = []
+    original_load = store.load
+    monkeypatch.setattr(store, "load", lambda name, default: loads.append(name) or original_load(name, default))
+
+    delivered = []
+    thread = app_module.MealPlanPrefetchThread([(2024, 1), (2024, 2), (2024, 3)])
+    thread.plans_loaded.connect(lambda months, plans: delivered.append(plans))
+    thread.run()
+    thread.run()
+    assert delivered == [{"2024-01-31": {"Dinner": "soup"}, "2024-02-01": {"Lunch": "salad"}}] * 2
+    assert loads == ["meal_plans"]
+
+    store.save("meal_plans", {"2024-03-05": {"Dinner": "curry"}})
+    thread.run()
+    assert delivered[-1] == {"2024-03-05": {"Dinner": "curry"}}
+    assert loads == ["meal_plans", "meal_plans"]
@@ -0,0 +1,50 @@
+import pytest
+
+ROWS = """name,serving,calories,protein_g,carbs_g,fat_g
+avocado,1 fruit,160,2.0,8.5,14.7
+avocado toast,1 slice,260,6.0,27.0,15.0
+egg,1 large,72,6.3,0.4,4.8
+eggs benedict,1 serving,520,25.0,30.0,34.0
+grilled salmon,1 fillet,367,39.0,0.0,22.0
+salmon,3 oz,175,18.8,0.0,10.5
+"""
+
+
+@pytest.fixture
+def database(app_module, tmp_path):
+    path = tmp_path / "nutrition.csv"
+    path.write_text(ROWS)
+    return app_module.NutritionDatabase(str(path))
+
+
+@pytest.mark.parametrize("item, expected", [
+    ("2 eggs", (2.0, "eggs")),
+    ("1.5 salmon", (1.5, "salmon")),
+    ("1/2 avocado", (0.5, "avocado")),
+    ("3/4 avocado toast", (0.75, "avocado toast")),
+    ("2 x egg", (2.0, "egg")),
+    ("2x egg", (2.0, "egg")),
+    ("coffee", (1.0, "coffee")),
+    ("1/0 egg", (1.0, "egg")),
+])
+def test_parse_quantity(database, item, expected):
+    assert database.parse_quantity(item) == expected
+
+
+def test_meal_totals_scale_by_quantity(database):
+    totals = database.meal_totals("2 eggs, 1/2 avocado, coffee")
+    assert totals["calories"] == pytest.approx(2 * 72 + 80)
+    assert totals["unknown"] == ["coffee"]
+
+
+def test_complete_uses_the_sorted_prefix_range(database):
+    assert database.complete("avo") == ["avocado", "avocado toast"]
+    assert database.complete("Egg", limit=1) == ["egg"]
+    assert database.complete("zucchini") == []
+
+
+def test_find_falls_back_to_word_index(database):
+    assert database.names[database.find("avocados")] == "avocado"
+    assert database.names[database.find("grilled atlantic salmon")] == "grilled salmon"
+    assert database.names[database.find("smoked salmon")] == "salmon"
+    assert database.find("tofu") is None
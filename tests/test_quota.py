@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+def test_refund_never_overfills_the_token_bucket(app_module):
+    limiter = app_module.QuotaLimiter(rpm=60, tpm=1000)
+    assert limiter.try_acquire(100, 0)
+    limiter.record_usage(400, {"promptTokenCount": 10, "candidatesTokenCount": 5})
+    assert limiter.token_bucket.tokens == 1000
+    assert limiter.token_bucket.wait_time(1000, limiter.token_bucket.updated) == 0.0
+
+
+def test_underestimate_is_charged_to_the_token_bucket(app_module):
+    limiter = app_module.QuotaLimiter(rpm=60, tpm=1000)
+    assert limiter.try_acquire(100, 0)
+    limiter.record_usage(100, {"promptTokenCount": 300})
+    assert limiter.token_bucket.tokens <= 701
+
+
+def test_throttled_seconds_counts_the_time_actually_waited(app_module):
+    limiter = app_module.QuotaLimiter(rpm=60, tpm=1000)
+    with limiter.condition:
+        limiter.blocked_until = time.monotonic() + 5.0
+    waiter = threading.Thread(target=limiter.acquire, args=(10, 0))
+    waiter.start()
+    time.sleep(0.1)
+    with limiter.condition:
+        limiter.blocked_until = 0.0
+        limiter.condition.notify_all()
+    waiter.join(timeout=5.0)
+    assert not waiter.is_alive()
+    assert 0.05 < limiter.throttled_seconds < 1.0
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+
+def fire_times(app_module, rule, start, days, step=60, **reminder_options):
+    clock = app_module.VirtualClock(start)
+    scheduler = app_module.ReminderScheduler(clock)
+    fired = []
+    scheduler.reminder_due.connect(lambda reminder: fired.append(clock.now()))
+    scheduler.add(app_module.Reminder("r", "Reminder", "", rule, start, **reminder_options))
+    for _ in range(days * 24 * 3600 // step):
+        clock.advance(step)
+        scheduler.run_pending()
+    return fired
+
+
+def test_daily_fires_at_each_byhour(app_module, qapp):
+    fired = fire_times(app_module, "FREQ=DAILY;BYHOUR=9,18;BYMINUTE=30", datetime(2024, 1, 1), 3)
+    assert fired == [datetime(2024, 1, day, hour, 30) for day in (1, 2, 3) for hour in (9, 18)]
+
+
+def test_daily_interval_skips_days(app_module, qapp):
+    fired = fire_times(app_module, "FREQ=DAILY;INTERVAL=2;BYHOUR=8;BYMINUTE=0", datetime(2024, 1, 1), 6)
+    assert fired == [datetime(2024, 1, 1, 8), datetime(2024, 1, 3, 8), datetime(2024, 1, 5, 8)]
+
+
+def test_weekly_fires_on_the_start_weekday(app_module, qapp):
+    # 2024-01-03 is a Wednesday
+    fired = fire_times(app_module, "FREQ=WEEKLY;BYHOUR=7;BYMINUTE=0", datetime(2024, 1, 3), 21)
+    assert fired == [datetime(2024, 1, 3, 7), datetime(2024, 1, 10, 7), datetime(2024, 1, 17, 7)]
+
+
+def test_weekly_byday(app_module, qapp):
+    # 2024-01-01 is a Monday
+    fired = fire_times(app_module, "FREQ=WEEKLY;BYDAY=MO,WE,FR;BYHOUR=18;BYMINUTE=0", datetime(2024, 1, 1), 8)
+    assert fired == [datetime(2024, 1, day, 18) for day in (1, 3, 5, 8)]
+
+
+def test_count_stops_after_n_occurrences(app_module, qapp):
+    # Occurrences are strictly after the moment the reminder is added, so 00:00 itself does not fire
+    fired = fire_times(app_module, "FREQ=HOURLY;COUNT=3", datetime(2024, 1, 1), 1)
+    assert fired == [datetime(2024, 1, 1, hour) for hour in (1, 2, 3)]
+
+
+def test_until_is_inclusive(app_module, qapp):
+    fired = fire_times(app_module, "FREQ=DAILY;BYHOUR=9;BYMINUTE=0;UNTIL=20240103T090000", datetime(2024, 1, 1), 5)
+    assert fired == [datetime(2024, 1, day, 9) for day in (1, 2, 3)]
+
+
+def test_missed_occurrences_collapse_into_one(app_module, qapp):
+    clock = app_module.VirtualClock(datetime(2024, 1, 1))
+    scheduler = app_module.ReminderScheduler(clock)
+    scheduler.add(app_module.Reminder("r", "Reminder", "", "FREQ=HOURLY", datetime(2024, 1, 1, 1)))
+    clock.advance(5 * 3600 + 60)
+    assert len(scheduler.run_pending()) == 1
+    assert scheduler.next_due().due == datetime(2024, 1, 1, 6)
+
+
+def test_removed_and_disabled_reminders_are_skipped_lazily(app_module, qapp):
+    clock = app_module.VirtualClock(datetime(2024, 1, 1))
+    scheduler = app_module.ReminderScheduler(clock)
+    fired = []
+    scheduler.reminder_due.connect(lambda reminder: fired.append(reminder.id))
+    for reminder_id in ("keep", "remove", "disable"):
+        scheduler.add(app_module.Reminder(reminder_id, reminder_id, "", "FREQ=HOURLY", datetime(2024, 1, 1, 1)))
+    scheduler.remove("remove")
+    scheduler.set_enabled("disable", False)
+    # The stale heap entries are still there until they are popped or compacted
+    assert len(scheduler.heap) == 3
+    clock.advance(3600)
+    scheduler.run_pending()
+    assert fired == ["keep"]
+    assert [entry[2] for entry in scheduler.heap] == ["keep"]
+    scheduler.set_enabled("disable", True)
+    clock.advance(3600)
+    scheduler.run_pending()
+    assert sorted(fired) == ["disable", "keep", "keep"]
+
+
+def test_unsupported_rule_is_rejected(app_module):
+    with pytest.raises(ValueError):
+        app_module.RecurrenceRule("FREQ=YEARLY")
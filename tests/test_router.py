@@ -0,0 +1,24 @@
+import pytest
+
+
+def router_with(app_module, latencies):
+    router = app_module.ModelRouter(endpoints=list(latencies))
+    for url, seconds in latencies.items():
+        for _ in range(app_module.HEDGE_MIN_SAMPLES if seconds is not None else 1):
+            router.histogram(url).record(seconds if seconds is not None else 0.001)
+    return router
+
+
+def test_unmeasured_endpoints_keep_the_configured_order(app_module):
+    router = router_with(app_module, {"a": None, "b": None, "c": None})
+    assert router.ranked(router.current_endpoints()) == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("latencies, expected", [
+    ({"slow": 3.0, "new": None, "fast": 0.5}, ["fast", "new", "slow"]),
+    ({"new": None, "fast": 0.5, "faster": 0.2}, ["faster", "new", "fast"]),
+    ({"new": None, "slow": 3.0, "slower": 5.0}, ["slow", "new", "slower"]),
+])
+def test_under_sampled_endpoints_rank_at_the_measured_median(app_module, latencies, expected):
+    router = router_with(app_module, latencies)
+    assert router.ranked(router.current_endpoints()) == expected
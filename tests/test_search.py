@@ -0,0 +1,54 @@
+import sqlite3
+
+
+def test_update_replaces_and_empty_body_removes(app_module, tmp_path):
+    index = app_module.SearchIndex(str(tmp_path / "search.db"))
+    assert index.is_empty()
+    index.update("analysis", 3, "Analysis 4", "grilled salmon with rice")
+    index.update("analysis", 3, "Analysis 4", "tofu noodle bowl")
+    assert index.search("salmon") == []
+    assert [row[:3] for row in index.search("tofu")] == [("analysis", "3", "Analysis 4")]
+    index.update("analysis", 3, "Analysis 4", "   ")
+    assert index.search("tofu") == []
+    assert index.is_empty()
+
+
+def test_update_many_keeps_one_document_per_key(app_module, tmp_path):
+    index = app_module.SearchIndex(str(tmp_path / "search.db"))
+    plans = {"2024-03-01": {"Breakfast": "oats", "Lunch": "salad"}, "2024-03-02": {"Dinner": "salmon"}}
+    index.update_many(app_module.meal_plan_document(date, plan) for date, plan in plans.items())
+    index.update_many([app_module.meal_plan_document("2024-03-01", {"Breakfast": "eggs"})])
+    assert index.search("oats") == []
+    assert [row[1] for row in index.search("eggs")] == ["2024-03-01"]
+    assert [row[1] for row in index.search("salmon")] == ["2024-03-02"]
+
+
+def test_index_written_before_the_key_table_is_keyed_on_open(app_module, tmp_path):
+    path = str(tmp_path / "search.db")
+    index = app_module.SearchIndex(path)
+    index.update("analysis", 0, "Analysis 1", "lentil soup")
+    with index.connection:
+        index.connection.execute("DROP TABLE document_keys")
+    index.connection.close()
+    reopened = app_module.SearchIndex(path)
+    reopened.update("analysis", 0, "Analysis 1", "pancakes")
+    assert reopened.search("lentil") == []
+    assert len(reopened.search("pancakes")) == 1
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM document_keys").fetchone() == (1,)
+
+
+def test_rebuild_thread_indexes_history_and_meal_plans(app_module, tmp_path, monkeypatch):
+    store = app_module.DataStore(str(tmp_path))
+    store.save("meal_plans", {"2024-05-01": {"Dinner": "chickpea curry"}})
+    monkeypatch.setattr(app_module, "data_store", store)
+    history = app_module.HistoryStore(str(tmp_path / "history.db"))
+    for position in range(app_module.SEARCH_INDEX_BATCH + 10):
+        history.append(f"meal-{position}.jpg", f"result {position} with quinoa")
+    index = app_module.SearchIndex(str(tmp_path / "search.db"))
+    built = []
+    thread = app_module.SearchIndexThread(index, history)
+    thread.index_built.connect(built.append)
+    thread.run()
+    assert built == [app_module.SEARCH_INDEX_BATCH + 11]
+    assert index.search("chickpea")[0][:2] == ("meal_plan", "2024-05-01")
+    assert len(index.search("quinoa", limit=10000)) == app_module.SEARCH_INDEX_BATCH + 10
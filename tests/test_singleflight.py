@@ -0,0 +1,71 @@
+import threading
+
+from PyQt6.QtCore import Qt
+
+from common import StubAPIServer, write_test_image
+
+
+def analyze_concurrently(app_module, image_paths):
+    completed, errors = [], []
+    analysis_threads = []
+    for image_path in image_paths:
+        analysis_thread = app_module.AnalysisThread(image_path)
+        analysis_thread.analysis_complete.connect(completed.append, Qt.ConnectionType.DirectConnection)
+        analysis_thread.analysis_error.connect(errors.append, Qt.ConnectionType.DirectConnection)
+        analysis_threads.append(analysis_thread)
+    threads = [threading.Thread(target=analysis_thread.run) for analysis_thread in analysis_threads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return completed, errors
+
+
+def test_identical_submissions_share_one_upstream_request(app_module, qapp, tmp_path, monkeypatch):
+    image_path = write_test_image(str(tmp_path / "duplicate.jpg"))
+    with StubAPIServer(latency=0.3, text="Stub analysis: about 450 kcal.") as server:
+        monkeypatch.setattr(app_module, "API_URL", server.url)
+        completed, errors = analyze_concurrently(app_module, [image_path] * 8)
+    assert errors == []
+    assert server.request_count == 1
+    assert completed == ["Stub analysis: about 450 kcal."] * 8
+    assert app_module.analysis_flight.in_flight() == 0
+
+
+def test_different_images_are_not_shared(app_module, qapp, tmp_path, monkeypatch):
+    first = write_test_image(str(tmp_path / "first.jpg"), size=320)
+    second = write_test_image(str(tmp_path / "second.jpg"), size=480)
+    with StubAPIServer(latency=0.2) as server:
+        monkeypatch.setattr(app_module, "API_URL", server.url)
+        completed, errors = analyze_concurrently(app_module, [first, second, first, second])
+    assert errors == []
+    assert server.request_count == 2
+    assert len(completed) == 4
+
+
+def test_single_flight_shares_errors(app_module):
+    flight = app_module.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    outcomes = []
+
+    def failing():
+        started.set()
+        release.wait()
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            outcomes.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    release.set()
+    leader.join()
+    follower.join()
+    assert outcomes == ["upstream down", "upstream down"]
+    assert flight.in_flight() == 0
@@ -0,0 +1,27 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+
+def test_add_keeps_the_index_equal_to_a_rebuild(app_module):
+    table = app_module.SleepColumns()
+    nights = [(date(2024, 1, 1) + timedelta(days=offset)).isoformat() for offset in range(60)]
+    random.Random(7).shuffle(nights)
+    for night in nights:
+        table.build_index()
+        table.add(night, {"sleep_time": "23:00", "wake_time": "06:30", "quality": "Good"})
+        incremental = tuple(list(values) for values in table.index)
+        table.index = None
+        assert tuple(list(values) for values in table.build_index()) == incremental
+    assert table.minutes_between("2024-01-01", "2024-01-31") == 31 * 450
+    assert table.minutes_in_window(table.starts[0] + 60, table.starts[0] + 1440) == 390
+
+
+def test_add_rejects_overlaps_without_touching_the_index(app_module):
+    table = app_module.SleepColumns()
+    table.add("2024-03-01", {"sleep_time": "22:00", "wake_time": "06:00", "quality": "Fair"})
+    index = tuple(list(values) for values in table.build_index())
+    with pytest.raises(app_module.SleepOverlapError):
+        table.add("2024-03-02", {"sleep_time": "05:00", "wake_time": "07:00", "quality": "Poor"})
+    assert tuple(list(values) for values in table.index) == index
@@ -0,0 +1,25 @@
+def test_tracker_list_model_exposes_rows_a_page_at_a_time(app_module, qapp):
+    rows = app_module.TRACKER_FETCH_ROWS
+    table = app_module.SleepColumns.from_dict({
+        app_module.ordinal_date(738000 + day): {"sleep_time": "23:00", "wake_time": "07:00", "quality": "Good"}
+        for day in range(rows + 50)})
+    model = app_module.TrackerListModel(lambda table, row: table[row].date)
+    model.set_table(table)
+    assert model.rowCount() == rows
+    assert model.data(model.index(0)) == table[0].date
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == rows + 50 and not model.canFetchMore()
+    # Refreshing the same table keeps what was already scrolled into view; a new table starts over
+    model.set_table(table)
+    assert model.rowCount() == rows + 50
+    model.set_table(app_module.SleepColumns())
+    assert model.rowCount() == 0
+
+
+def test_bk_tree_items_returns_every_entry(app_module):
+    tree = app_module.BKTree()
+    entries = [(0b1010, 0), (0b1010, 1), (0b0110, 2), (0b1111, 3)]
+    for key, value in entries:
+        tree.add(key, value)
+    assert sorted(tree.items()) == sorted(entries)
@@ -0,0 +1,27 @@
+import os
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def log(app_module, tmp_path):
+    store = app_module.DataStore(str(tmp_path))
+    return app_module.WaterLog(os.path.join(str(tmp_path), app_module.WATER_LOG_PATH), store).load()
+
+
+def test_corrections_never_show_negative_hours(log):
+    log.append(glasses=2, timestamp=datetime(2024, 5, 1, 9))
+    log.append(glasses=1, timestamp=datetime(2024, 5, 1, 11))
+    log.append(glasses=-2, timestamp=datetime(2024, 5, 1, 14))
+    hours = log.hours("2024-05-01")
+    assert min(hours) == 0
+    assert (hours[9], hours[11], hours[14]) == (1, 0, 0)
+    assert sum(hours) == log.intake("2024-05-01") == 1
+
+
+def test_correction_below_zero_is_rejected(log):
+    log.append(glasses=1, timestamp=datetime(2024, 5, 1, 9))
+    with pytest.raises(ValueError):
+        log.append(glasses=-2, timestamp=datetime(2024, 5, 1, 10))
+    assert log.intake("2024-05-01") == 1